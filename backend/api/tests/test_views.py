@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from users.tests.utils import make_user
+
+
+class TestTaskStatus(APITestCase):
+    def setUp(self):
+        self.client.force_login(make_user())
+        self.url = reverse(viewname="task_status", args=["task"])
+
+    def fetch(self, state, info, ready=False, successful=True):
+        with patch("api.views.AsyncResult") as async_result:
+            task = async_result.return_value
+            task.state = state
+            task.info = task.result = info
+            task.ready.return_value = ready
+            task.successful.return_value = successful
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_running_task_has_progress(self):
+        progress = {"rows_parsed": 1000, "rows_per_second": 500.0, "eta_seconds": 2.0}
+        data = self.fetch("PROGRESS", progress)
+        self.assertEqual(data["progress"], progress)
+        self.assertFalse(data["ready"])
+
+    def test_finished_task_has_no_progress(self):
+        data = self.fetch("SUCCESS", {"error": []}, ready=True)
+        self.assertIsNone(data["progress"])
+        self.assertEqual(data["result"], {"error": []})
@@ -19,12 +19,15 @@ class TaskStatus(APIView):
         task = AsyncResult(kwargs["task_id"])
         ready = task.ready()
         error = ready and not task.successful()
+        # A running task can publish its progress, e.g. the counters of an import, as the meta of a custom state.
+        progress = task.info if task.state == "PROGRESS" else None
 
         return Response(
             {
                 "ready": ready,
                 "result": task.result if ready and not error else None,
                 "error": {"text": str(task.result)} if error else None,
+                "progress": progress,
             }
         )
 
@@ -3,10 +3,12 @@ from typing import List, Type
 
 from auto_labeling_pipeline.labels import Labels
 from django.contrib.auth.models import User
+from django.db import transaction
 
 from examples.models import Example
 from label_types.models import CategoryType, LabelType, SpanType
 from labels.models import Category, Label, Span, TextLabel
+from metrics.models import LabelStatistics
 from projects.models import Project
 
 
@@ -32,7 +34,10 @@ class LabelCollection(abc.ABC):
     def save(self, project: Project, example: Example, user: User):
         labels = self.transform(project, example, user)
         labels = self.model.objects.filter_annotatable_labels(labels, project)
-        self.model.objects.bulk_create(labels)
+        # bulk_create sends no signals, so the labels are counted in the statistics here.
+        with transaction.atomic():
+            labels = self.model.objects.bulk_create(labels)
+            LabelStatistics.objects.add_labels(labels)
 
 
 class Categories(LabelCollection):
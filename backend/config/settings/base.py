@@ -14,6 +14,7 @@ from os import path
 import os
 
 import dj_database_url
+from celery.schedules import crontab
 from environs import Env, EnvError
 from furl import furl
 
@@ -257,6 +258,21 @@ if DEBUG:
 
 # Batch size for importing data
 IMPORT_BATCH_SIZE = env.int("IMPORT_BATCH_SIZE", 1000)
+# Validate the imported records by columns instead of one by one. Only the text tasks support it.
+IMPORT_VECTORIZED = env.bool("IMPORT_VECTORIZED", False)
+# How to insert the imported rows: "bulk_create", or "copy" to use COPY FROM STDIN on PostgreSQL
+IMPORT_LOADER = env.str("IMPORT_LOADER", "bulk_create")
+# Number of processes to import the files of a multi-file upload in parallel
+IMPORT_WORKERS = env.int("IMPORT_WORKERS", 1)
+# Number of processes to parse a large CSV or JSONL file with, 0 for one per core
+IMPORT_PARSE_WORKERS = env.int("IMPORT_PARSE_WORKERS", 1)
+
+# Batch size for exporting data
+EXPORT_BATCH_SIZE = env.int("EXPORT_BATCH_SIZE", 1000)
+# Number of processes to format and write the per-member files of non-collaborative projects
+EXPORT_WORKERS = env.int("EXPORT_WORKERS", 1)
+# Compression level (0-9) of the exported archives
+EXPORT_COMPRESSION_LEVEL = env.int("EXPORT_COMPRESSION_LEVEL", 6)
 
 # Necessary for email verification of new accounts
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", False)
@@ -299,6 +315,21 @@ except EnvError:
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
+CELERY_BEAT_SCHEDULE = {
+    "rebuild-label-statistics": {
+        "task": "metrics.celery_tasks.rebuild_label_statistics",
+        "schedule": crontab(minute=0, hour=env.int("LABEL_STATISTICS_REBUILD_HOUR", 3)),
+    },
+    "expire-report-exports": {
+        "task": "reports.celery_tasks.expire_report_exports",
+        "schedule": crontab(minute=30, hour=env.int("LABEL_STATISTICS_REBUILD_HOUR", 3)),
+    },
+}
+# The report exports not downloaded for this many days are removed.
+REPORT_EXPORT_MAX_AGE_DAYS = env.int("REPORT_EXPORT_MAX_AGE_DAYS", 7)
+# The report exports are stopped after the soft limit, and the worker is killed after the hard limit, in seconds.
+REPORT_EXPORT_SOFT_TIME_LIMIT = env.int("REPORT_EXPORT_SOFT_TIME_LIMIT", 15 * 60)
+REPORT_EXPORT_TIME_LIMIT = env.int("REPORT_EXPORT_TIME_LIMIT", 16 * 60)
 
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 
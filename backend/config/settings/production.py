@@ -2,6 +2,8 @@ from .base import *  # noqa: F401,F403
 
 DEBUG = False
 
+MIDDLEWARE.append("api.middleware.RangesMiddleware")  # noqa: F405
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
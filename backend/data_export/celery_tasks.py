@@ -1,71 +1,148 @@
+import json
 import os
 import shutil
 import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
-from .pipeline.dataset import Dataset
-from .pipeline.factories import (
-    create_comment,
-    create_formatter,
-    create_labels,
-    create_writer,
+from .pipeline.archive import Archive
+from .pipeline.dataset import IndividualStreamingDataset, StreamingDataset
+from .pipeline.factories import create_formatter, create_writer, select_label_collection
+from .pipeline.services import (
+    IndividualExportApplicationService,
+    StreamingExportApplicationService,
 )
-from .pipeline.services import ExportApplicationService
-from data_export.models import ExportedExample
+from data_export.models import ExportedExample, ExportWatermark
 from projects.models import Member, Project
 
 logger = get_task_logger(__name__)
 
+MANIFEST = "manifest.json"
 
-def create_collaborative_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
-    is_text_project = project.is_text_project
-    if confirmed_only:
+
+def select_examples(project: Project, confirmed_only: bool, since: Optional[datetime] = None):
+    """Select the examples to export.
+
+    In an individual project, an example is confirmed if any member has confirmed it,
+    because the file of each member only contains the examples the member has confirmed.
+    """
+    if not confirmed_only:
+        examples = ExportedExample.objects.filter(project=project)
+    elif project.collaborative_annotation:
         examples = ExportedExample.objects.confirmed(project)
     else:
-        examples = ExportedExample.objects.filter(project=project)
-    labels = create_labels(project, examples)
-    comments = create_comment(examples)
-    dataset = Dataset(examples, labels, comments, is_text_project)
+        users = Member.objects.filter(project=project).values("user")
+        examples = ExportedExample.objects.filter(project=project, states__confirmed_by__in=users).distinct()
+    if since:
+        examples = examples.updated_since(since)
+    return examples
 
-    service = ExportApplicationService(dataset, formatters, writer)
 
-    filepath = os.path.join(dirpath, f"all.{writer.extension}")
-    service.export(filepath)
+def create_collaborative_dataset(
+    project: Project, archive: Archive, confirmed_only: bool, formatters, writer, since: Optional[datetime] = None
+):
+    is_text_project = project.is_text_project
+    examples = select_examples(project, confirmed_only, since)
+    dataset = StreamingDataset(
+        examples,
+        select_label_collection(project),
+        is_text_project=is_text_project,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+    )
 
+    service = StreamingExportApplicationService(dataset, formatters, writer)
 
-def create_individual_dataset(project: Project, dirpath: str, confirmed_only: bool, formatters, writer):
-    is_text_project = project.is_text_project
-    members = Member.objects.filter(project=project)
-    for member in members:
-        if confirmed_only:
-            examples = ExportedExample.objects.confirmed(project, user=member.user)
-        else:
-            examples = ExportedExample.objects.filter(project=project)
-        labels = create_labels(project, examples, member.user)
-        comments = create_comment(examples, member.user)
-        dataset = Dataset(examples, labels, comments, is_text_project)
+    with archive.open(f"all.{writer.extension}", binary=writer.binary) as f:
+        service.export(f)
 
-        service = ExportApplicationService(dataset, formatters, writer)
 
-        filepath = os.path.join(dirpath, f"{member.username}.{writer.extension}")
-        service.export(filepath)
+def create_individual_dataset(
+    project: Project, archive: Archive, confirmed_only: bool, formatters, writer, since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    # Several files are written at the same time, so they go to a temporary directory before the archive.
+    dirpath = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4()))
+    os.makedirs(dirpath, exist_ok=True)
+    members = Member.objects.filter(project=project).select_related("user")
+    files = {
+        member.user_id: os.path.join(dirpath, archive.entry_name(f"{member.username}.{writer.extension}"))
+        for member in members
+    }
+    examples = ExportedExample.objects.filter(project=project)
+    if since:
+        examples = examples.updated_since(since)
+    dataset = IndividualStreamingDataset(
+        examples,
+        select_label_collection(project),
+        users=list(files),
+        confirmed_only=confirmed_only,
+        is_text_project=project.is_text_project,
+        batch_size=settings.EXPORT_BATCH_SIZE,
+    )
+
+    service = IndividualExportApplicationService(dataset, formatters, writer, workers=settings.EXPORT_WORKERS)
+    try:
+        timings = service.export(files)
+        for file in files.values():
+            archive.move(file)
+    finally:
+        shutil.rmtree(dirpath)
+    return timings
+
+
+def write_manifest(
+    archive: Archive,
+    project: Project,
+    file_format: str,
+    confirmed_only: bool,
+    since: Optional[datetime],
+    until: datetime,
+):
+    """Describe an incremental export, so that the consumer knows which time range the files cover."""
+    examples = select_examples(project, confirmed_only, since)
+    manifest = {
+        "project_id": project.id,
+        "format": file_format,
+        "since": since.isoformat() if since else None,
+        "until": until.isoformat(),
+        "changed_examples": examples.count(),
+        "files": sorted(archive.namelist()),
+    }
+    archive.writestr(MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
 
 
 @shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def export_dataset(project_id, file_format: str, confirmed_only=False):
+def export_dataset(project_id, file_format: str, confirmed_only=False, incremental=False, compression="deflate"):
     project = get_object_or_404(Project, pk=project_id)
-    dirpath = os.path.join(settings.MEDIA_ROOT, str(uuid.uuid4()))
-    os.makedirs(dirpath, exist_ok=True)
     formatters = create_formatter(project, file_format)
-    writer = create_writer(file_format)
-    if project.collaborative_annotation:
-        create_collaborative_dataset(project, dirpath, confirmed_only, formatters, writer)
-    else:
-        create_individual_dataset(project, dirpath, confirmed_only, formatters, writer)
-    zip_file = shutil.make_archive(dirpath, "zip", dirpath)
-    shutil.rmtree(dirpath)
-    return zip_file
+    writer = create_writer(file_format, compresslevel=settings.EXPORT_COMPRESSION_LEVEL, project=project)
+    # Take the time before reading, so the changes made during the export are included in the next one.
+    exported_at = timezone.now()
+    watermark = ExportWatermark.objects.filter(project=project).first()
+    since = watermark.exported_at if incremental and watermark else None
+    result = {}
+    zip_file = os.path.join(settings.MEDIA_ROOT, f"{uuid.uuid4()}.zip")
+    try:
+        with Archive(
+            zip_file, gzipped=compression == "gzip", compresslevel=settings.EXPORT_COMPRESSION_LEVEL
+        ) as archive:
+            if project.collaborative_annotation:
+                create_collaborative_dataset(project, archive, confirmed_only, formatters, writer, since)
+            else:
+                timings = create_individual_dataset(project, archive, confirmed_only, formatters, writer, since)
+                logger.info(f"Exported project {project_id} for each member: {timings}")
+                result.update(timings)
+            if incremental:
+                write_manifest(archive, project, file_format, confirmed_only, since, exported_at)
+    except Exception:
+        if os.path.exists(zip_file):
+            os.remove(zip_file)
+        raise
+    if incremental:
+        ExportWatermark.objects.update_or_create(project=project, defaults={"exported_at": exported_at})
+    return {"filename": zip_file, **result}
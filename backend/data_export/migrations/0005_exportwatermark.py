@@ -0,0 +1,30 @@
+# Generated by Django 4.1.13 on 2026-10-18 02:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0022_delete_annotationruletype_and_more"),
+        ("data_export", "0004_exportedcomment"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ExportWatermark",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("exported_at", models.DateTimeField()),
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="export_watermark",
+                        to="projects.project",
+                    ),
+                ),
+            ],
+        ),
+    ]
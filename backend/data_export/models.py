@@ -1,15 +1,31 @@
+from datetime import datetime
 from typing import Any, Dict, Protocol, Tuple
 
 from django.db import models
+from django.db.models import Exists, OuterRef, Q
 
-from examples.models import Comment, Example
+from examples.models import Comment, Example, ExampleState
 from labels.models import BoundingBox, Category, Relation, Segmentation, Span, TextLabel
 from projects.models import Project
 
 DATA = "data"
 
 
-class ExportedExampleManager(models.Manager):
+class ExportedExampleQuerySet(models.QuerySet):
+    def updated_since(self, since: datetime):
+        """Filter the examples that have changed since the given time.
+
+        An example has changed if the example itself, one of its labels or comments,
+        or one of its confirmation states has been created or updated since then.
+        """
+        changes = Q(updated_at__gt=since)
+        for model in [Category, Span, Relation, TextLabel, BoundingBox, Segmentation, Comment]:
+            changes |= Exists(model.objects.filter(example=OuterRef("pk"), updated_at__gt=since))
+        changes |= Exists(ExampleState.objects.filter(example=OuterRef("pk"), confirmed_at__gt=since))
+        return self.filter(changes)
+
+
+class ExportedExampleManager(models.Manager.from_queryset(ExportedExampleQuerySet)):  # type: ignore
     def confirmed(self, project: Project, user=None):
         if project.collaborative_annotation:
             return self.filter(project=project).exclude(states=None)
@@ -116,3 +132,10 @@ class ExportedSegmentation(Segmentation):
 
     class Meta:
         proxy = True
+
+
+class ExportWatermark(models.Model):
+    """The time of the last incremental export of a project."""
+
+    project = models.OneToOneField(to=Project, on_delete=models.CASCADE, related_name="export_watermark")
+    exported_at = models.DateTimeField()
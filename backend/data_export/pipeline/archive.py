@@ -0,0 +1,55 @@
+import contextlib
+import gzip
+import io
+import os
+import zipfile
+from typing import IO, Iterator, List, Union
+
+from .writers import DEFAULT_COMPRESSLEVEL
+
+
+class Archive:
+    """A zip archive the exported files are streamed into, without a temporary copy on disk.
+
+    If `gzipped` is true, every entry is a gzip file and the archive itself is not compressed again.
+    """
+
+    def __init__(self, path: str, gzipped=False, compresslevel: int = DEFAULT_COMPRESSLEVEL):
+        self.path = path
+        self.gzipped = gzipped
+        self.compresslevel = compresslevel
+        compression = zipfile.ZIP_STORED if gzipped else zipfile.ZIP_DEFLATED
+        self.zip = zipfile.ZipFile(path, mode="w", compression=compression, compresslevel=compresslevel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.zip.close()
+
+    def entry_name(self, name: str) -> str:
+        return f"{name}.gz" if self.gzipped else name
+
+    def namelist(self) -> List[str]:
+        return self.zip.namelist()
+
+    @contextlib.contextmanager
+    def open(self, name: str, binary=False) -> Iterator[Union[IO[str], IO[bytes]]]:
+        """Open the entry `name` as a UTF-8 text stream, or as a binary one if `binary` is true."""
+        with contextlib.ExitStack() as stack:
+            # Entries of unknown size need zip64, otherwise they are limited to 2 GiB.
+            f = stack.enter_context(self.zip.open(self.entry_name(name), mode="w", force_zip64=True))
+            if self.gzipped:
+                f = stack.enter_context(gzip.GzipFile(fileobj=f, mode="wb", compresslevel=self.compresslevel))
+            if binary:
+                yield f
+                return
+            yield stack.enter_context(io.TextIOWrapper(f, encoding="utf-8", newline=""))
+
+    def move(self, file: str):
+        """Move a file into the archive. The file must already be gzipped if the archive is."""
+        self.zip.write(file, arcname=os.path.basename(file))
+        os.remove(file)
+
+    def writestr(self, name: str, data: str):
+        self.zip.writestr(name, data)
@@ -1,3 +1,4 @@
+import importlib.util
 from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List, Type
@@ -5,6 +6,8 @@ from typing import Dict, List, Type
 from projects.models import ProjectType
 
 EXAMPLE_DIR = Path(__file__).parent.resolve() / "examples"
+# The columnar formats are written with pyarrow, which is an optional dependency.
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
 
 
 class Format:
@@ -33,6 +36,14 @@ class JSONL(Format):
     name = "JSONL"
 
 
+class Parquet(Format):
+    name = "Parquet"
+
+
+class Arrow(Format):
+    name = "Arrow"
+
+
 class Options:
     options: Dict[str, List] = defaultdict(list)
 
@@ -95,3 +106,14 @@ Options.register(ProjectType.IMAGE_CAPTIONING, JSONL, IMAGE_CAPTIONING_DIR / "ex
 # Speech to Text
 SPEECH2TEXT_DIR = EXAMPLE_DIR / "speech_to_text"
 Options.register(ProjectType.SPEECH2TEXT, JSONL, SPEECH2TEXT_DIR / "example.jsonl")
+
+# Columnar formats. Their example is the schema of the table, since the files are binary.
+if PYARROW_AVAILABLE:
+    for file_format in [Parquet, Arrow]:
+        Options.register(ProjectType.DOCUMENT_CLASSIFICATION, file_format, TEXT_CLASSIFICATION_DIR / "schema.txt")
+        Options.register(ProjectType.SEQUENCE_LABELING, file_format, SEQUENCE_LABELING_DIR / "schema.txt")
+        Options.register(ProjectType.SEQUENCE_LABELING, file_format, RELATION_EXTRACTION_DIR / "schema.txt", True)
+        Options.register(ProjectType.SEQ2SEQ, file_format, SEQ2SEQ_DIR / "schema.txt")
+        Options.register(
+            ProjectType.INTENT_DETECTION_AND_SLOT_FILLING, file_format, INTENT_DETECTION_DIR / "schema.txt"
+        )
@@ -1,24 +1,58 @@
 import abc
-from collections import defaultdict
-from typing import Dict, List, Tuple
-
-from django.db.models import QuerySet
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
 
 from data_export.models import ExportedComment, ExportedExample
 
 
+class CommentRecord(NamedTuple):
+    id: int
+    text: str
+
+    def to_string(self) -> str:
+        return self.text
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "comment": self.text}
+
+
 class Comments(abc.ABC):
     comment_class = ExportedComment
     column = "Comments"
-    fields: Tuple[str, ...] = ("example", "user")  # To boost performance
+    fields: Tuple[str, ...] = ("id", "text")
 
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
-        self.comment_groups = defaultdict(list)
+    def __init__(self, examples: Iterable[ExportedExample], user=None):
         comments = self.comment_class.objects.filter(example__in=examples)
         if user:
             comments = comments.filter(user=user)
-        for comment in comments.select_related(*self.fields):
-            self.comment_groups[comment.example.id].append(comment)
+        rows = comments.order_by("example_id", "created_at", "id").values_list("example_id", *self.fields)
+        self.comment_groups = self.group_by_example(rows.iterator())
+
+    @staticmethod
+    def group_by_example(rows: Iterable[Tuple]) -> Dict[int, List[CommentRecord]]:
+        return {
+            example_id: [CommentRecord(*row[1:]) for row in group]
+            for example_id, group in groupby(rows, key=itemgetter(0))
+        }
+
+    @classmethod
+    def group_by_user(cls, examples: Iterable[ExportedExample], users: List[int]) -> Dict[int, "Comments"]:
+        """Load the comments of several users with one query, and split them into one collection per user."""
+        comments = cls.comment_class.objects.filter(example__in=examples, user__in=users)
+        rows = comments.order_by("user_id", "example_id", "created_at", "id").values_list(
+            "user_id", "example_id", *cls.fields
+        )
+        groups = {
+            user_id: cls.group_by_example(row[1:] for row in group)
+            for user_id, group in groupby(rows.iterator(), key=itemgetter(0))
+        }
+        collections = {}
+        for user_id in users:
+            collection = cls.__new__(cls)
+            collection.comment_groups = groups.get(user_id, {})
+            collections[user_id] = collection
+        return collections
 
-    def find_by(self, example_id: int) -> Dict[str, List[ExportedComment]]:
-        return {self.column: self.comment_groups[example_id]}
+    def find_by(self, example_id: int) -> Dict[str, List[CommentRecord]]:
+        return {self.column: self.comment_groups.get(example_id, [])}
@@ -1,16 +1,19 @@
-from typing import Any, Dict, Iterator, List
+from functools import cached_property
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple, Type
 
 import pandas as pd
+from django.db.models import Q
 from django.db.models.query import QuerySet
 
 from .comments import Comments
 from .labels import Labels
-from data_export.models import ExportedExample
+from data_export.models import DATA, ExportedExample
+from examples.models import ExampleState
 
 
 class Dataset:
     def __init__(
-        self, examples: QuerySet[ExportedExample], labels: List[Labels], comments: List[Comments], is_text_project=True
+        self, examples: Iterable[ExportedExample], labels: List[Labels], comments: List[Comments], is_text_project=True
     ):
         self.examples = examples
         self.labels = labels
@@ -28,3 +31,173 @@ class Dataset:
 
     def to_dataframe(self) -> pd.DataFrame:
         return pd.DataFrame(self)
+
+
+class Columns:
+    """The columns of a whole dataset, and a few values of each meta column to infer its dtype from.
+
+    pandas infers the dtype of a column from the types of its values, the range of its integers
+    and whether a value is missing, so one value of each type, the smallest and largest integers
+    and a missing value stand for the whole column.
+    """
+
+    def __init__(self, trailing: List[str]):
+        self.trailing = trailing
+        self.rows = 0
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, Dict[Any, Any]] = {}
+        self._names: Dict[str, None] = {}
+
+    def add(self, meta: Dict[str, Any]):
+        self._names.update(dict.fromkeys(["id", DATA]))
+        self._names.update(dict.fromkeys(meta))
+        self._names.update(dict.fromkeys(self.trailing))
+        self.rows += 1
+        for key, value in meta.items():
+            self.counts[key] = self.counts.get(key, 0) + 1
+            samples = self.samples.setdefault(key, {})
+            if type(value) is int:
+                samples["min"] = min(samples.get("min", value), value)
+                samples["max"] = max(samples.get("max", value), value)
+            else:
+                samples.setdefault(type(value), value)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    @cached_property
+    def dtypes(self) -> Dict[str, Any]:
+        """The dtypes of the meta columns in the dataframe of the whole dataset."""
+        dtypes = {}
+        for key, samples in self.samples.items():
+            if key in ("id", DATA) or key in self.trailing:
+                continue
+            records = [{key: value} for value in samples.values()]
+            if self.counts[key] < self.rows:
+                records.append({})
+            dtypes[key] = pd.DataFrame(records, columns=[key])[key].dtype
+        return dtypes
+
+
+class StreamingDataset:
+    """Iterate over a dataset in chunks of `batch_size` examples.
+
+    Examples are fetched with keyset pagination on (created_at, id), and labels and comments
+    are loaded for one chunk at a time, so the memory usage doesn't depend on the project size.
+    """
+
+    def __init__(
+        self,
+        examples: QuerySet[ExportedExample],
+        label_collections: List[Type[Labels]],
+        user=None,
+        is_text_project=True,
+        batch_size: int = 1000,
+    ):
+        self.examples = examples.order_by("created_at", "id")
+        self.label_collections = label_collections
+        self.user = user
+        self.is_text_project = is_text_project
+        self.batch_size = batch_size
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        columns = self.columns()
+        for examples in self.iter_examples():
+            labels = [collection(examples=examples, user=self.user) for collection in self.label_collections]
+            comments = [Comments(examples=examples, user=self.user)]
+            yield self.to_dataframe(examples, labels, comments, columns)
+
+    def iter_examples(self) -> Iterator[List[ExportedExample]]:
+        chunk = list(self.examples[: self.batch_size])
+        while chunk:
+            yield chunk
+            if len(chunk) < self.batch_size:
+                break
+            last = chunk[-1]
+            examples = self.examples.filter(
+                Q(created_at__gt=last.created_at) | Q(created_at=last.created_at, id__gt=last.id)
+            )
+            chunk = list(examples[: self.batch_size])
+
+    @property
+    def trailing_columns(self) -> List[str]:
+        return [collection.column for collection in self.label_collections] + [Comments.column]
+
+    def columns(self) -> Columns:
+        """Return the columns in the same order as `Dataset.to_dataframe` would do, and their dtypes.
+
+        The meta keys can differ between examples, so every chunk must be aligned to
+        the columns of the whole dataset. Only the meta field is read here.
+        """
+        columns = Columns(self.trailing_columns)
+        for meta in self.examples.values_list("meta", flat=True).iterator():
+            columns.add(meta)
+        return columns
+
+    def to_dataframe(
+        self, examples: List[ExportedExample], labels: List[Labels], comments: List[Comments], columns: Columns
+    ) -> pd.DataFrame:
+        dataset = Dataset(examples, labels, comments, self.is_text_project)
+        return pd.DataFrame(dataset, columns=columns.names).astype(columns.dtypes)
+
+
+class IndividualStreamingDataset(StreamingDataset):
+    """Iterate over the datasets of several users together.
+
+    Each chunk of examples, labels and comments is loaded once for all the users and then split by user,
+    so a chunk is a dict from the user id to the dataset of the user. If `confirmed_only` is true,
+    the dataset of a user only contains the examples the user has confirmed.
+    """
+
+    def __init__(
+        self,
+        examples: QuerySet[ExportedExample],
+        label_collections: List[Type[Labels]],
+        users: List[int],
+        confirmed_only=False,
+        is_text_project=True,
+        batch_size: int = 1000,
+    ):
+        if confirmed_only:
+            examples = examples.filter(states__confirmed_by__in=users).distinct()
+        super().__init__(examples, label_collections, is_text_project=is_text_project, batch_size=batch_size)
+        self.users = users
+        self.confirmed_only = confirmed_only
+
+    def __iter__(self) -> Iterator[Dict[int, pd.DataFrame]]:  # type: ignore
+        columns = self.columns_by_user()
+        for examples in self.iter_examples():
+            labels = [collection.group_by_user(examples, self.users) for collection in self.label_collections]
+            comments = Comments.group_by_user(examples, self.users)
+            confirmed = self.find_confirmed(examples)
+            datasets = {}
+            for user in self.users:
+                if self.confirmed_only:
+                    user_examples = [example for example in examples if (example.id, user) in confirmed]
+                else:
+                    user_examples = examples
+                datasets[user] = self.to_dataframe(
+                    user_examples,
+                    [collection[user] for collection in labels],
+                    [comments[user]],
+                    columns[user],
+                )
+            yield datasets
+
+    def find_confirmed(self, examples: List[ExportedExample]) -> Set[Tuple[int, int]]:
+        if not self.confirmed_only:
+            return set()
+        states = ExampleState.objects.filter(example__in=examples, confirmed_by__in=self.users)
+        return set(states.values_list("example_id", "confirmed_by_id"))
+
+    def columns_by_user(self) -> Dict[int, Columns]:
+        if not self.confirmed_only:
+            columns = self.columns()
+            return {user: columns for user in self.users}
+        columns_by_user = {user: Columns(self.trailing_columns) for user in self.users}
+        states = ExampleState.objects.filter(example__in=self.examples, confirmed_by__in=self.users)
+        states = states.order_by("example__created_at", "example_id")
+        for user, meta in states.values_list("confirmed_by_id", "example__meta").iterator():
+            columns_by_user[user].add(meta)
+        return columns_by_user
@@ -1,9 +1,9 @@
-from typing import Dict, List, Type
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
 
 from django.db.models import QuerySet
 
 from . import writers
-from .catalog import CSV, JSON, JSONL, FastText
+from .catalog import CSV, JSON, JSONL, Arrow, FastText, Parquet
 from .comments import Comments
 from .formatters import (
     DictFormatter,
@@ -19,18 +19,93 @@ from data_export.models import DATA, ExportedExample
 from projects.models import Project, ProjectType
 
 
-def create_writer(file_format: str) -> writers.Writer:
+def create_writer(
+    file_format: str, compresslevel: int = writers.DEFAULT_COMPRESSLEVEL, project: Optional[Project] = None
+) -> writers.Writer:
+    if file_format in (Parquet.name, Arrow.name):
+        types: Dict[str, Any] = {}
+        json_columns: Set[str] = set()
+        if project:
+            metas = ExportedExample.objects.filter(project=project).values_list("meta", flat=True)
+            meta_types, json_columns = create_meta_types(metas.iterator())
+            column_types = create_column_types(project)
+            types = {**meta_types, **column_types}
+            json_columns -= set(column_types)
+        columnar = {Parquet.name: writers.ParquetWriter, Arrow.name: writers.ArrowWriter}
+        return columnar[file_format](compresslevel, types=types, json_columns=json_columns)
     mapping = {
-        CSV.name: writers.CsvWriter(),
-        JSON.name: writers.JsonWriter(),
-        JSONL.name: writers.JsonlWriter(),
-        FastText.name: writers.FastTextWriter(),
+        CSV.name: writers.CsvWriter(compresslevel),
+        JSON.name: writers.JsonWriter(compresslevel),
+        JSONL.name: writers.JsonlWriter(compresslevel),
+        FastText.name: writers.FastTextWriter(compresslevel),
     }
     if file_format not in mapping:
         ValueError(f"Invalid format: {file_format}")
     return mapping[file_format]
 
 
+def create_column_types(project: Project) -> Dict[str, Any]:
+    """Return the Arrow types of the label columns, which can't be inferred from a chunk without labels."""
+    import pyarrow as pa
+
+    use_relation = getattr(project, "use_relation", False)
+    strings = pa.list_(pa.string())
+    spans = pa.list_(
+        pa.struct(
+            [("id", pa.int64()), ("label", pa.string()), ("start_offset", pa.int64()), ("end_offset", pa.int64())]
+        )
+    )
+    relations = pa.list_(
+        pa.struct([("id", pa.int64()), ("from_id", pa.int64()), ("to_id", pa.int64()), ("type", pa.string())])
+    )
+    comments = pa.list_(pa.struct([("id", pa.int64()), ("comment", pa.string())]))
+    mapping: Dict[str, Dict[str, Any]] = {
+        ProjectType.DOCUMENT_CLASSIFICATION: {"label": strings, Comments.column: strings},
+        ProjectType.SEQUENCE_LABELING: {
+            Spans.column: spans,
+            Relations.column: relations,
+            Comments.column: comments,
+        }
+        if use_relation
+        else {"label": spans, Comments.column: strings},
+        ProjectType.SEQ2SEQ: {"label": strings, Comments.column: strings},
+        ProjectType.INTENT_DETECTION_AND_SLOT_FILLING: {"cats": strings, Spans.column: spans, Comments.column: strings},
+    }
+    return {"id": pa.int64(), "text": pa.string(), **mapping.get(project.project_type, {})}
+
+
+def create_meta_types(metas: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, Any], Set[str]]:
+    """Return the Arrow types of the meta columns, and the columns to write as JSON, from the meta of all examples.
+
+    The type of a meta key can't be inferred from the first chunk, since the key can be missing from it
+    or have values of another type in the next chunks. A key whose values are all booleans, integers,
+    numbers or strings has their type, and the other keys, e.g. with mixed or nested values, are written as JSON.
+    """
+    import pyarrow as pa
+
+    kinds: Dict[str, Set[Any]] = {}
+    for meta in metas:
+        for key, value in meta.items():
+            kind = type(value)
+            if kind is int and not -(2**63) <= value < 2**63:
+                kind = object
+            kinds.setdefault(key, set()).add(kind)
+    scalars = {frozenset({bool}): pa.bool_(), frozenset({int}): pa.int64(), frozenset({str}): pa.string()}
+    types = {}
+    json_columns = set()
+    for key, key_kinds in kinds.items():
+        key_kinds = frozenset(key_kinds - {type(None)})
+        if not key_kinds:
+            types[key] = pa.string()
+        elif key_kinds in scalars:
+            types[key] = scalars[key_kinds]
+        elif key_kinds <= {int, float}:
+            types[key] = pa.float64()
+        else:
+            json_columns.add(key)
+    return types, json_columns
+
+
 def create_formatter(project: Project, file_format: str) -> List[Formatter]:
     use_relation = getattr(project, "use_relation", False)
     # text tasks
@@ -49,6 +124,28 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
     # audio tasks
     mapper_speech2text = {DATA: "filename", Texts.column: "label"}
 
+    # columnar formats
+    columnar_sequence_labeling: List[Formatter] = (
+        [
+            DictFormatter(Spans.column),
+            DictFormatter(Relations.column),
+            DictFormatter(Comments.column),
+            RenameFormatter(**mapper_relation_extraction),
+        ]
+        if use_relation
+        else [
+            DictFormatter(Spans.column),
+            ListedCategoryFormatter(Comments.column),
+            RenameFormatter(**mapper_sequence_labeling),
+        ]
+    )
+    columnar_intent_detection: List[Formatter] = [
+        ListedCategoryFormatter(Categories.column),
+        DictFormatter(Spans.column),
+        ListedCategoryFormatter(Comments.column),
+        RenameFormatter(**mapper_intent_detection),
+    ]
+
     mapping: Dict[str, Dict[str, List[Formatter]]] = {
         ProjectType.DOCUMENT_CLASSIFICATION: {
             CSV.name: [
@@ -67,6 +164,16 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 RenameFormatter(**mapper_text_classification),
             ],
             FastText.name: [FastTextCategoryFormatter(Categories.column)],
+            Parquet.name: [
+                ListedCategoryFormatter(Categories.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_text_classification),
+            ],
+            Arrow.name: [
+                ListedCategoryFormatter(Categories.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_text_classification),
+            ],
         },
         ProjectType.SEQUENCE_LABELING: {
             JSONL.name: [
@@ -80,7 +187,10 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 TupledSpanFormatter(Spans.column),
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_sequence_labeling),
-            ]
+            ],
+            # The columnar formats need the spans as structs, since a tuple has items of different types.
+            Parquet.name: columnar_sequence_labeling,
+            Arrow.name: columnar_sequence_labeling,
         },
         ProjectType.SEQ2SEQ: {
             CSV.name: [
@@ -98,6 +208,16 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_seq2seq),
             ],
+            Parquet.name: [
+                ListedCategoryFormatter(Texts.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_seq2seq),
+            ],
+            Arrow.name: [
+                ListedCategoryFormatter(Texts.column),
+                ListedCategoryFormatter(Comments.column),
+                RenameFormatter(**mapper_seq2seq),
+            ],
         },
         ProjectType.IMAGE_CLASSIFICATION: {
             JSONL.name: [
@@ -119,7 +239,9 @@ def create_formatter(project: Project, file_format: str) -> List[Formatter]:
                 TupledSpanFormatter(Spans.column),
                 ListedCategoryFormatter(Comments.column),
                 RenameFormatter(**mapper_intent_detection),
-            ]
+            ],
+            Parquet.name: columnar_intent_detection,
+            Arrow.name: columnar_intent_detection,
         },
         ProjectType.BOUNDING_BOX: {
             JSONL.name: [
@@ -2,10 +2,9 @@
 Represents label collection.
 """
 import abc
-from collections import defaultdict
-from typing import Dict, List, Tuple
-
-from django.db.models import QuerySet
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple, Type
 
 from data_export.models import (
     ExportedBoundingBox,
@@ -19,54 +18,153 @@ from data_export.models import (
 )
 
 
+class CategoryRecord(NamedTuple):
+    label: str
+
+    def to_string(self) -> str:
+        return self.label
+
+
+class SpanRecord(NamedTuple):
+    id: int
+    label: str
+    start_offset: int
+    end_offset: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "label": self.label, "start_offset": self.start_offset, "end_offset": self.end_offset}
+
+    def to_tuple(self) -> Tuple:
+        return self.start_offset, self.end_offset, self.label
+
+
+class RelationRecord(NamedTuple):
+    id: int
+    from_id: int
+    to_id: int
+    type: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "from_id": self.from_id, "to_id": self.to_id, "type": self.type}
+
+
+class TextRecord(NamedTuple):
+    text: str
+
+    def to_string(self) -> str:
+        return self.text
+
+
+class BoundingBoxRecord(NamedTuple):
+    uuid: Any
+    x: float
+    y: float
+    width: float
+    height: float
+    label: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "uuid": str(self.uuid),
+            "x": self.x,
+            "y": self.y,
+            "width": self.width,
+            "height": self.height,
+            "label": self.label,
+        }
+
+    def to_tuple(self) -> Tuple:
+        return self.x, self.y, self.width, self.height
+
+
+class SegmentRecord(NamedTuple):
+    uuid: Any
+    points: list
+    label: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"uuid": str(self.uuid), "points": self.points, "label": self.label}
+
+
 class Labels(abc.ABC):
     label_class = ExportedLabel
     column = "labels"
-    fields: Tuple[str, ...] = ("example", "label")  # To boost performance
+    # The columns to fetch with `values_list`. They are passed to `record` in this order.
+    fields: Tuple[str, ...] = ()
+    record: Type = tuple
 
-    def __init__(self, examples: QuerySet[ExportedExample], user=None):
-        self.label_groups = defaultdict(list)
+    def __init__(self, examples: Iterable[ExportedExample], user=None):
         labels = self.label_class.objects.filter(example__in=examples)
         if user:
             labels = labels.filter(user=user)
-        for label in labels.select_related(*self.fields):
-            self.label_groups[label.example.id].append(label)
+        # Rows sorted by example can be grouped in a single pass without keeping model instances around.
+        rows = labels.order_by("example_id", "id").values_list("example_id", *self.fields)
+        self.label_groups = self.group_by_example(rows.iterator())
+
+    @classmethod
+    def group_by_example(cls, rows: Iterable[Tuple]) -> Dict[int, List[ExportedLabel]]:
+        return {
+            example_id: [cls.record(*row[1:]) for row in group]
+            for example_id, group in groupby(rows, key=itemgetter(0))
+        }
+
+    @classmethod
+    def group_by_user(cls, examples: Iterable[ExportedExample], users: List[int]) -> Dict[int, "Labels"]:
+        """Load the labels of several users with one query, and split them into one collection per user."""
+        labels = cls.label_class.objects.filter(example__in=examples, user__in=users)
+        rows = labels.order_by("user_id", "example_id", "id").values_list("user_id", "example_id", *cls.fields)
+        groups = {
+            user_id: cls.group_by_example(row[1:] for row in group)
+            for user_id, group in groupby(rows.iterator(), key=itemgetter(0))
+        }
+        collections = {}
+        for user_id in users:
+            collection = cls.__new__(cls)
+            collection.label_groups = groups.get(user_id, {})
+            collections[user_id] = collection
+        return collections
 
     def find_by(self, example_id: int) -> Dict[str, List[ExportedLabel]]:
-        return {self.column: self.label_groups[example_id]}
+        return {self.column: self.label_groups.get(example_id, [])}
 
 
 class Categories(Labels):
     label_class = ExportedCategory
     column = "categories"
-    fields = ("example", "label")
+    fields = ("label__text",)
+    record = CategoryRecord
 
 
 class Spans(Labels):
     label_class = ExportedSpan
     column = "entities"
-    fields = ("example", "label")
+    fields = ("id", "label__text", "start_offset", "end_offset")
+    record = SpanRecord
 
 
 class Relations(Labels):
     label_class = ExportedRelation
     column = "relations"
-    fields = ("example", "type")
+    fields = ("id", "from_id", "to_id", "type__text")
+    record = RelationRecord
 
 
 class Texts(Labels):
     label_class = ExportedText
     column = "labels"
-    fields = ("example",)
+    fields = ("text",)
+    record = TextRecord
 
 
 class BoundingBoxes(Labels):
     label_class = ExportedBoundingBox
     column = "labels"
-    fields = ("example", "label")
+    fields = ("uuid", "x", "y", "width", "height", "label__text")
+    record = BoundingBoxRecord
 
 
 class Segments(Labels):
     label_class = ExportedSegmentation
     column = "labels"
-    fields = ("example", "label")
+    fields = ("uuid", "points", "label__text")
+    record = SegmentRecord
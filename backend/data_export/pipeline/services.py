@@ -1,6 +1,11 @@
-from typing import List
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional
 
-from .dataset import Dataset
+import billiard
+import pandas as pd
+
+from .dataset import Dataset, IndividualStreamingDataset, StreamingDataset
 from .formatters import Formatter
 from .writers import Writer
 
@@ -17,3 +22,86 @@ class ExportApplicationService:
             dataset = formatter.format(dataset)
         self.writer.write(file, dataset)
         return file
+
+
+def format_dataset(dataset: pd.DataFrame, formatters: List[Formatter]) -> pd.DataFrame:
+    for formatter in formatters:
+        dataset = formatter.format(dataset)
+    return dataset
+
+
+def format_and_append(chunk: pd.DataFrame, formatters: List[Formatter], writer: Writer, file, is_first: bool) -> float:
+    """Format a chunk and append it to the file. Returns the elapsed time in seconds."""
+    start = time.perf_counter()
+    writer.append(file, format_dataset(chunk, formatters), is_first)
+    return time.perf_counter() - start
+
+
+class StreamingExportApplicationService:
+    def __init__(self, dataset: StreamingDataset, formatters: List[Formatter], writer: Writer):
+        self.dataset = dataset
+        self.formatters = formatters
+        self.writer = writer
+
+    def export(self, file):
+        chunks = (format_dataset(chunk, self.formatters) for chunk in self.dataset)
+        self.writer.write_chunks(file, chunks)
+        return file
+
+
+class IndividualExportApplicationService:
+    """Export one file per user from a dataset that is loaded once for all the users.
+
+    The formatting and writing of the users' chunks is fanned out to a process pool
+    when `workers` is greater than 1 and the writer can append to a file from another process.
+    """
+
+    def __init__(
+        self, dataset: IndividualStreamingDataset, formatters: List[Formatter], writer: Writer, workers: int = 1
+    ):
+        self.dataset = dataset
+        self.formatters = formatters
+        self.writer = writer
+        self.workers = workers if writer.reopenable else 1
+
+    def export(self, files: Dict[int, str]) -> Dict[str, Any]:
+        """Write the dataset of each user to `files[user]`, and return the timings of the export.
+
+        `speedup` is the time the formatting and writing would take in series, divided by the time it took.
+        """
+        start = time.perf_counter()
+        is_empty = dict.fromkeys(files, True)
+        busy_time = 0.0
+        fan_out_time = 0.0
+        executor: Optional[Executor] = None
+        if self.workers > 1:
+            # The export runs in a worker of the Celery prefork pool, a daemonic process, which multiprocessing
+            # doesn't allow to start children. The processes of billiard, the fork Celery uses, are allowed to.
+            executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=billiard.get_context())
+        try:
+            for datasets in self.dataset:
+                fan_out_start = time.perf_counter()
+                args = []
+                for user, chunk in datasets.items():
+                    if len(chunk) == 0:
+                        continue
+                    args.append((chunk, self.formatters, self.writer, files[user], is_empty[user]))
+                    is_empty[user] = False
+                if executor is None:
+                    busy_time += sum(format_and_append(*arg) for arg in args)
+                else:
+                    # All the chunks of a user must be appended in order, so wait for them before the next chunk.
+                    done, _ = wait([executor.submit(format_and_append, *arg) for arg in args])
+                    busy_time += sum(future.result() for future in done)
+                fan_out_time += time.perf_counter() - fan_out_start
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        for user, file in files.items():
+            self.writer.close(file, is_empty[user])
+        return {
+            "users": len(files),
+            "workers": self.workers,
+            "elapsed": time.perf_counter() - start,
+            "speedup": busy_time / fan_out_time if fan_out_time else 1.0,
+        }
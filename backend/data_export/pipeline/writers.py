@@ -1,44 +1,239 @@
 import abc
+import contextlib
+import gzip
+import json
+import math
+import os
+from typing import IO, Any, ContextManager, Dict, Iterable, Optional
 
 import pandas as pd
 
+DEFAULT_COMPRESSLEVEL = 6
+
+
+def open_text(file, mode: str, compresslevel: int = DEFAULT_COMPRESSLEVEL) -> ContextManager[IO[str]]:
+    """Open a path as a UTF-8 text file, or use an already opened text stream as it is.
+
+    Paths ending with `.gz` are gzipped. Appending to them adds a gzip member,
+    and the concatenated members are decompressed as a single file.
+    """
+    if not isinstance(file, (str, os.PathLike)):
+        return contextlib.nullcontext(file)
+    if str(file).endswith(".gz"):
+        return gzip.open(file, mode=f"{mode}t", encoding="utf-8", newline="", compresslevel=compresslevel)
+    return open(file, mode=mode, encoding="utf-8", newline="")
+
+
+def open_binary(file, mode: str, compresslevel: int = DEFAULT_COMPRESSLEVEL) -> ContextManager[IO[bytes]]:
+    """The binary counterpart of `open_text`."""
+    if not isinstance(file, (str, os.PathLike)):
+        return contextlib.nullcontext(file)
+    if str(file).endswith(".gz"):
+        return gzip.open(file, mode=f"{mode}b", compresslevel=compresslevel)
+    return open(file, mode=f"{mode}b")
+
 
 class Writer(abc.ABC):
     extension = ""
+    # Whether the writer expects a binary stream instead of a text one.
+    binary = False
+    # Whether `append` opens the file again on each call, so that a file can be appended by different processes.
+    reopenable = True
+
+    def __init__(self, compresslevel: int = DEFAULT_COMPRESSLEVEL):
+        self.compresslevel = compresslevel
 
-    @staticmethod
     @abc.abstractmethod
-    def write(file, dataset: pd.DataFrame):
+    def write(self, file, dataset: pd.DataFrame):
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    @abc.abstractmethod
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        """Append a non-empty chunk to the file. The file is truncated if `is_first` is true."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def open(self, file, is_first: bool) -> ContextManager[IO[str]]:
+        return open_text(file, "w" if is_first else "a", self.compresslevel)
+
+    def close(self, file, is_empty: bool):
+        """Finish the file written by `append`. An empty file is written in the same way as `write` does."""
+        if is_empty:
+            self.write(file, pd.DataFrame([]))
+
+    def write_chunks(self, file, chunks: Iterable[pd.DataFrame]):
+        """Write the chunks one after another. The output is the same as `write` on the concatenated chunks.
+
+        `file` is either a path or a text stream, e.g. an entry of a zip archive.
+        """
+        is_empty = True
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            self.append(file, chunk, is_empty)
+            is_empty = False
+        self.close(file, is_empty)
+
 
 class CsvWriter(Writer):
     extension = "csv"
 
-    @staticmethod
-    def write(file, dataset: pd.DataFrame):
-        dataset.to_csv(file, index=False, encoding="utf-8")
+    def write(self, file, dataset: pd.DataFrame):
+        with self.open(file, is_first=True) as f:
+            dataset.to_csv(f, index=False)
+
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        with self.open(file, is_first) as f:
+            chunk.to_csv(f, index=False, header=is_first)
 
 
 class JsonWriter(Writer):
     extension = "json"
 
-    @staticmethod
-    def write(file, dataset: pd.DataFrame):
-        dataset.to_json(file, orient="records", force_ascii=False)
+    def write(self, file, dataset: pd.DataFrame):
+        with self.open(file, is_first=True) as f:
+            dataset.to_json(f, orient="records", force_ascii=False)
+
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        records = chunk.to_json(orient="records", force_ascii=False)[1:-1]
+        with self.open(file, is_first) as f:
+            f.write("[" if is_first else ",")
+            f.write(records)
+
+    def close(self, file, is_empty: bool):
+        if is_empty:
+            return super().close(file, is_empty)
+        with self.open(file, is_first=False) as f:
+            f.write("]")
 
 
 class JsonlWriter(Writer):
     extension = "jsonl"
 
-    @staticmethod
-    def write(file, dataset: pd.DataFrame):
-        dataset.to_json(file, orient="records", force_ascii=False, lines=True)
+    def write(self, file, dataset: pd.DataFrame):
+        with self.open(file, is_first=True) as f:
+            dataset.to_json(f, orient="records", force_ascii=False, lines=True)
+
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        with self.open(file, is_first) as f:
+            f.write(chunk.to_json(orient="records", force_ascii=False, lines=True))
 
 
 class FastTextWriter(Writer):
     extension = "txt"
 
-    @staticmethod
-    def write(file, dataset: pd.DataFrame):
-        dataset.to_csv(file, index=False, encoding="utf-8", header=False)
+    def write(self, file, dataset: pd.DataFrame):
+        with self.open(file, is_first=True) as f:
+            dataset.to_csv(f, index=False, header=False)
+
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        with self.open(file, is_first) as f:
+            chunk.to_csv(f, index=False, header=False)
+
+
+class ColumnarWriter(Writer):
+    """Write the dataset as an Apache Arrow table, one record batch or row group per chunk.
+
+    Requires `pyarrow`. The type of a column is inferred from the first chunk, unless it is given in `types`,
+    so the columns that can be empty or differ in the first chunk, e.g. labels and meta, should be given.
+    The columns in `json_columns`, e.g. meta with values of different types, are written as JSON strings.
+    """
+
+    binary = True
+    # The file stays open between the chunks, so all of them must be written by the same writer.
+    reopenable = False
+
+    def __init__(
+        self,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+        types: Optional[Dict[str, Any]] = None,
+        json_columns: Iterable[str] = (),
+    ):
+        super().__init__(compresslevel)
+        self.types = types or {}
+        self.json_columns = set(json_columns)
+        self.sinks: Dict[Any, Any] = {}
+
+    def open(self, file, is_first: bool) -> ContextManager[IO[bytes]]:
+        return open_binary(file, "w" if is_first else "a", self.compresslevel)
+
+    def encode_json(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        columns = [column for column in dataset.columns if column in self.json_columns]
+        if not columns:
+            return dataset
+        dataset = dataset.copy()
+        for column in columns:
+            dataset[column] = [
+                None if value is None or (isinstance(value, float) and math.isnan(value)) else json.dumps(value)
+                for value in dataset[column]
+            ]
+        return dataset
+
+    def infer_schema(self, dataset: pd.DataFrame):
+        import pyarrow as pa
+
+        inferred = pa.Schema.from_pandas(dataset, preserve_index=False)
+        fields = []
+        for field in inferred:
+            if field.name in self.json_columns:
+                field = field.with_type(pa.string())
+            elif field.name in self.types:
+                field = field.with_type(self.types[field.name])
+            elif pa.types.is_null(field.type):
+                field = field.with_type(pa.string())
+            elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+                field = field.with_type(pa.list_(pa.string()))
+            fields.append(field)
+        return pa.schema(fields, metadata=inferred.metadata)
+
+    def to_table(self, dataset: pd.DataFrame, schema=None):
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(dataset, schema=schema or self.infer_schema(dataset), preserve_index=False)
+
+    @abc.abstractmethod
+    def create_sink(self, f: IO[bytes], schema):
+        """Create a pyarrow writer for the stream."""
+        raise NotImplementedError("Please implement this method in the subclass.")
+
+    def write(self, file, dataset: pd.DataFrame):
+        table = self.to_table(self.encode_json(dataset))
+        with self.open(file, is_first=True) as f:
+            with self.create_sink(f, table.schema) as sink:
+                sink.write_table(table)
+
+    def append(self, file, chunk: pd.DataFrame, is_first: bool):
+        chunk = self.encode_json(chunk)
+        if is_first:
+            stack = contextlib.ExitStack()
+            f = stack.enter_context(self.open(file, is_first=True))
+            schema = self.infer_schema(chunk)
+            self.sinks[file] = (stack, stack.enter_context(self.create_sink(f, schema)), schema)
+        _, sink, schema = self.sinks[file]
+        sink.write_table(self.to_table(chunk, schema))
+
+    def close(self, file, is_empty: bool):
+        if is_empty:
+            return super().close(file, is_empty)
+        stack, _, _ = self.sinks.pop(file)
+        stack.close()
+
+
+class ParquetWriter(ColumnarWriter):
+    extension = "parquet"
+
+    def create_sink(self, f: IO[bytes], schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(f, schema, compression="zstd", compression_level=self.compresslevel)
+
+
+class ArrowWriter(ColumnarWriter):
+    """Write the dataset in the Arrow IPC file format, which can be memory-mapped by the reader."""
+
+    extension = "arrow"
+
+    def create_sink(self, f: IO[bytes], schema):
+        import pyarrow as pa
+
+        options = pa.ipc.IpcWriteOptions(compression=pa.Codec("zstd", compression_level=self.compresslevel))
+        return pa.ipc.new_file(f, schema, options=options)
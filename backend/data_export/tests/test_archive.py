@@ -0,0 +1,44 @@
+import gzip
+import os
+import unittest
+import zipfile
+
+import pandas as pd
+
+from ..pipeline.archive import Archive
+from ..pipeline.writers import JsonlWriter
+
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.dataset = pd.DataFrame([{"id": 0, "text": "A"}, {"id": 1, "text": "ç"}])
+        self.expected = self.dataset.to_json(orient="records", force_ascii=False, lines=True).encode("utf-8")
+        self.file = "tmp.zip"
+
+    def tearDown(self):
+        os.remove(self.file)
+
+    def test_stream_into_entry(self):
+        with Archive(self.file) as archive:
+            with archive.open("all.jsonl") as f:
+                JsonlWriter().write_chunks(f, [self.dataset.iloc[:1], self.dataset.iloc[1:]])
+        with zipfile.ZipFile(self.file) as z:
+            self.assertEqual(z.read("all.jsonl"), self.expected)
+            self.assertEqual(z.getinfo("all.jsonl").compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_gzipped_entry(self):
+        with Archive(self.file, gzipped=True) as archive:
+            with archive.open("all.jsonl") as f:
+                JsonlWriter().write_chunks(f, [self.dataset])
+        with zipfile.ZipFile(self.file) as z:
+            self.assertEqual(gzip.decompress(z.read("all.jsonl.gz")), self.expected)
+            self.assertEqual(z.getinfo("all.jsonl.gz").compress_type, zipfile.ZIP_STORED)
+
+    def test_move_gzipped_file(self):
+        file = "user.jsonl.gz"
+        JsonlWriter().write_chunks(file, [self.dataset.iloc[:1], self.dataset.iloc[1:]])
+        with Archive(self.file, gzipped=True) as archive:
+            archive.move(file)
+        self.assertFalse(os.path.exists(file))
+        with zipfile.ZipFile(self.file) as z:
+            self.assertEqual(gzip.decompress(z.read(file)), self.expected)
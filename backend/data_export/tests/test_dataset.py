@@ -1,10 +1,23 @@
+import io
 import unittest
 from unittest.mock import MagicMock
 
 import pandas as pd
+from django.test import TestCase
+from model_mommy import mommy
 from pandas.testing import assert_frame_equal
 
-from data_export.pipeline.dataset import Dataset
+from data_export.models import ExportedExample
+from data_export.pipeline.comments import Comments
+from data_export.pipeline.dataset import (
+    Dataset,
+    IndividualStreamingDataset,
+    StreamingDataset,
+)
+from data_export.pipeline.labels import Categories
+from data_export.pipeline.writers import CsvWriter, JsonlWriter
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
 
 
 class TestDataset(unittest.TestCase):
@@ -27,3 +40,78 @@ class TestDataset(unittest.TestCase):
         df = dataset.to_dataframe()
         expected = pd.DataFrame([{"data": "example", "labels": ["label"], "comments": ["comment"]}])
         assert_frame_equal(df, expected)
+
+
+class TestStreamingDataset(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example1 = mommy.make("ExportedExample", project=self.project.item, text="a", meta={"x": 1})
+        self.example2 = mommy.make("ExportedExample", project=self.project.item, text="b", meta={"x": 2})
+        self.example3 = mommy.make("ExportedExample", project=self.project.item, text="c", meta={"y": 3})
+        mommy.make("ExportedCategory", example=self.example3, user=self.project.admin)
+        examples = ExportedExample.objects.filter(project=self.project.item)
+        self.expected = Dataset(
+            examples,
+            [Categories(examples)],
+            [Comments(examples)],
+        ).to_dataframe()
+
+    def test_chunks_are_aligned_to_the_whole_dataset(self):
+        examples = ExportedExample.objects.filter(project=self.project.item)
+        dataset = StreamingDataset(examples, [Categories], batch_size=2)
+        chunks = list(dataset)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        for chunk in chunks:
+            self.assertEqual(list(chunk.columns), list(self.expected.columns))
+        df = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(df["id"].tolist(), self.expected["id"].tolist())
+        self.assertEqual(df[Categories.column].apply(len).tolist(), [0, 0, 1])
+
+    def test_chunks_are_written_as_the_whole_dataset(self):
+        mommy.make("ExportedExample", project=self.project.item, text="d", meta={"x": 4, "flag": True})
+        mommy.make("ExportedExample", project=self.project.item, text="e", meta={"x": 2**63, "flag": False})
+        examples = ExportedExample.objects.filter(project=self.project.item)
+        expected = Dataset(examples, [Categories(examples)], [Comments(examples)]).to_dataframe()
+        chunks = list(StreamingDataset(examples, [Categories], batch_size=2))
+        for chunk in chunks:
+            self.assertEqual(chunk.dtypes.to_dict(), expected.dtypes.to_dict())
+        for writer in [CsvWriter(), JsonlWriter()]:
+            with self.subTest(writer=writer.extension):
+                whole, chunked = io.StringIO(), io.StringIO()
+                writer.write(whole, expected)
+                writer.write_chunks(chunked, chunks)
+                self.assertEqual(chunked.getvalue(), whole.getvalue())
+
+    def test_empty_dataset(self):
+        examples = ExportedExample.objects.none()
+        chunks = list(StreamingDataset(examples, [Categories]))
+        self.assertEqual(chunks, [])
+
+
+class TestIndividualStreamingDataset(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example1 = mommy.make("ExportedExample", project=self.project.item, meta={"x": 1})
+        self.example2 = mommy.make("ExportedExample", project=self.project.item, meta={"y": 2})
+        mommy.make("ExportedCategory", example=self.example1, user=self.project.admin)
+        mommy.make("ExportedCategory", example=self.example2, user=self.project.annotator)
+        mommy.make("ExampleState", example=self.example2, confirmed_by=self.project.annotator)
+        self.examples = ExportedExample.objects.filter(project=self.project.item)
+        self.users = [self.project.admin.id, self.project.annotator.id]
+
+    def test_labels_are_split_by_user(self):
+        dataset = IndividualStreamingDataset(self.examples, [Categories], self.users, batch_size=1)
+        chunks = list(dataset)
+        self.assertEqual(len(chunks), 2)
+        admin = pd.concat([chunk[self.project.admin.id] for chunk in chunks])
+        annotator = pd.concat([chunk[self.project.annotator.id] for chunk in chunks])
+        self.assertEqual(admin[Categories.column].apply(len).tolist(), [1, 0])
+        self.assertEqual(annotator[Categories.column].apply(len).tolist(), [0, 1])
+        self.assertEqual(list(admin.columns), ["id", "data", "x", Categories.column, Comments.column, "y"])
+
+    def test_confirmed_only(self):
+        dataset = IndividualStreamingDataset(self.examples, [Categories], self.users, confirmed_only=True)
+        [chunk] = list(dataset)
+        self.assertEqual(len(chunk[self.project.admin.id]), 0)
+        self.assertEqual(chunk[self.project.annotator.id]["id"].tolist(), [self.example2.id])
+        self.assertEqual(list(chunk[self.project.annotator.id].columns), ["id", "data", "y", "categories", "Comments"])
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from model_mommy import mommy
 
-from ..pipeline.labels import Categories
+from ..pipeline.labels import Categories, Spans
 from data_export.models import ExportedExample
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
@@ -26,3 +26,24 @@ class TestLabels(TestCase):
         categories = Categories(self.examples, user=self.project.annotator)
         result = categories.find_by(self.example1.id)
         self.assertEqual(len(result[Categories.column]), 0)
+
+    def test_labels_are_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            categories = Categories(self.examples)
+            result = categories.find_by(self.example1.id)
+        self.assertEqual(result[Categories.column][0].to_string(), self.category1.to_string())
+
+
+class TestSpans(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.example = mommy.make("ExportedExample", project=self.project.item)
+        self.span = mommy.make(
+            "ExportedSpan", example=self.example, user=self.project.admin, start_offset=0, end_offset=1
+        )
+
+    def test_record_is_same_as_model(self):
+        spans = Spans(ExportedExample.objects.all())
+        [record] = spans.find_by(self.example.id)[Spans.column]
+        self.assertEqual(record.to_dict(), self.span.to_dict())
+        self.assertEqual(record.to_tuple(), self.span.to_tuple())
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.utils import timezone
 from model_mommy import mommy
 
 from data_export.models import ExportedExample
@@ -28,3 +29,22 @@ class TestExportedExample(TestCase):
         self.prepare_data(collaborative=False)
         examples = ExportedExample.objects.confirmed(self.project.item, user=self.project.annotator)
         self.assertEqual(examples.count(), 0)
+
+
+class TestUpdatedSince(TestCase):
+    def setUp(self):
+        self.project = prepare_project()
+        self.example1 = mommy.make("ExportedExample", project=self.project.item)
+        self.example2 = mommy.make("ExportedExample", project=self.project.item)
+        self.since = timezone.now()
+
+    def test_returns_nothing_without_changes(self):
+        self.assertFalse(ExportedExample.objects.updated_since(self.since).exists())
+
+    def test_returns_updated_example(self):
+        self.example1.save()
+        self.assertEqual(list(ExportedExample.objects.updated_since(self.since)), [self.example1])
+
+    def test_returns_example_with_new_comment(self):
+        mommy.make("ExportedComment", example=self.example2, user=self.project.admin)
+        self.assertEqual(list(ExportedExample.objects.updated_since(self.since)), [self.example2])
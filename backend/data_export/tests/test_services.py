@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ..pipeline.formatters import RenameFormatter
+from ..pipeline.services import IndividualExportApplicationService
+from ..pipeline.writers import JsonlWriter
+
+
+def run_in_daemonic_process(func, *args):
+    """Run the function as a task runs in a worker of the Celery prefork pool, i.e. in a daemonic process."""
+    context = multiprocessing.get_context("fork")
+    queue = context.SimpleQueue()
+
+    def target():
+        try:
+            queue.put(func(*args))
+        except Exception as e:
+            queue.put(e)
+
+    process = context.Process(target=target, daemon=True)
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+class TestIndividualExportApplicationService(unittest.TestCase):
+    def setUp(self):
+        self.dirpath = tempfile.mkdtemp()
+        self.files = {user: os.path.join(self.dirpath, f"{user}.jsonl") for user in [1, 2]}
+        self.dataset = [
+            {user: pd.DataFrame([{"id": i, "data": f"{user}-{i}"}]) for user in self.files} for i in range(3)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.dirpath)
+
+    def export(self, workers: int):
+        service = IndividualExportApplicationService(
+            self.dataset, [RenameFormatter(data="text")], JsonlWriter(), workers=workers
+        )
+        return service.export(self.files)
+
+    def assert_exported(self):
+        for user, file in self.files.items():
+            expected = pd.DataFrame([{"id": i, "text": f"{user}-{i}"} for i in range(3)])
+            pd.testing.assert_frame_equal(pd.read_json(file, lines=True), expected)
+
+    def test_export_in_parallel(self):
+        self.assertEqual(self.export(workers=2)["workers"], 2)
+        self.assert_exported()
+
+    def test_export_in_parallel_from_daemonic_process(self):
+        timings = run_in_daemonic_process(self.export, 2)
+        self.assertEqual(timings["workers"], 2)
+        self.assert_exported()
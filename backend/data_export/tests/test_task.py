@@ -1,4 +1,9 @@
+import gzip
+import importlib.util
+import io
+import json
 import os
+import unittest
 import zipfile
 
 import pandas as pd
@@ -28,7 +33,7 @@ def read_zip_content(file):
 @override_settings(MEDIA_URL=os.path.dirname(__file__))
 class TestExport(TestCase):
     def export_dataset(self, confirmed_only=False):
-        file = export_dataset(self.project.id, "JSONL", confirmed_only)
+        file = export_dataset(self.project.id, "JSONL", confirmed_only)["filename"]
         if self.project.item.collaborative_annotation:
             dataset = pd.read_json(file, lines=True).to_dict(orient="records")
         else:
@@ -117,6 +122,22 @@ class TestExportCategory(TestExport):
         self.assertEqual(dataset, expected_dataset)
 
 
+@override_settings(EXPORT_BATCH_SIZE=1)
+class TestExportCategoryInChunks(TestExportCategory):
+    pass
+
+
+@override_settings(EXPORT_BATCH_SIZE=1, EXPORT_WORKERS=2)
+class TestExportCategoryInParallel(TestExportCategory):
+    def test_reports_speedup(self):
+        self.prepare_data()
+        result = export_dataset(self.project.id, "JSONL")
+        os.remove(result["filename"])
+        self.assertEqual(result["users"], 3)
+        self.assertEqual(result["workers"], 2)
+        self.assertGreater(result["speedup"], 0)
+
+
 class TestExportSeq2seq(TestExport):
     def prepare_data(self, collaborative=False):
         self.project = prepare_project(ProjectType.SEQ2SEQ, collaborative_annotation=collaborative)
@@ -359,6 +380,62 @@ class TestExportSequenceLabeling(TestExport):
         self.assertEqual(dataset, expected_dataset)
 
 
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestExportSequenceLabelingToParquet(TestExportSequenceLabeling):
+    def export_dataset(self, confirmed_only=False):
+        import pyarrow.parquet as pq
+
+        file = export_dataset(self.project.id, "Parquet", confirmed_only)["filename"]
+        datasets = {}
+        with zipfile.ZipFile(file) as z:
+            for name in z.namelist():
+                with z.open(name) as f:
+                    datasets[name.split(".")[0]] = pq.read_table(io.BytesIO(f.read())).to_pylist()
+        os.remove(file)
+        return datasets["all"] if self.project.item.collaborative_annotation else datasets
+
+    def test_unconfirmed_and_non_collaborative(self):
+        self.prepare_data()
+        datasets = self.export_dataset()
+        expected_datasets = {
+            self.project.admin.username: [
+                {**self.data1, "label": [self.span1.to_dict()], "Comments": [self.comment1.to_string()]},
+                {**self.data2, "label": [], "Comments": []},
+            ],
+            self.project.approver.username: [
+                {**self.data1, "label": [], "Comments": []},
+                {**self.data2, "label": [], "Comments": []},
+            ],
+        }
+        for username, dataset in expected_datasets.items():
+            self.assertEqual(dataset, datasets[username])
+
+    def test_unconfirmed_and_collaborative(self):
+        self.prepare_data(collaborative=True)
+        dataset = self.export_dataset()
+        expected_dataset = [
+            {
+                **self.data1,
+                "label": [self.span1.to_dict(), self.span2.to_dict()],
+                "Comments": sorted([self.comment1.to_string(), self.comment2.to_string()]),
+            },
+            {**self.data2, "label": [], "Comments": []},
+        ]
+        self.assertEqual(dataset, expected_dataset)
+
+    def test_confirmed_and_non_collaborative(self):
+        self.prepare_data()
+        datasets = self.export_dataset(confirmed_only=True)
+        expected_dataset = [{**self.data1, "label": [self.span1.to_dict()], "Comments": [self.comment1.to_string()]}]
+        self.assertEqual(datasets[self.project.admin.username], expected_dataset)
+
+    def test_confirmed_and_collaborative(self):
+        self.prepare_data(collaborative=True)
+        dataset = self.export_dataset(confirmed_only=True)
+        self.assertEqual(len(dataset), 1)
+        self.assertEqual(len(dataset[0]["label"]), 2)
+
+
 class TestExportSpeechToText(TestExport):
     def prepare_data(self, collaborative=False):
         self.project = prepare_project(ProjectType.SPEECH2TEXT, collaborative_annotation=collaborative)
@@ -824,3 +901,72 @@ class TestExportRelation(TestExport):
             }
         ]
         self.assertEqual(dataset, expected_dataset)
+
+
+class TestIncrementalExport(TestExport):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, collaborative_annotation=True)
+        self.example1 = mommy.make("ExportedExample", project=self.project.item, text="example1")
+        self.example2 = mommy.make("ExportedExample", project=self.project.item, text="example2")
+
+    def export_incrementally(self, confirmed_only=False):
+        file = export_dataset(self.project.id, "JSONL", confirmed_only, incremental=True)["filename"]
+        with zipfile.ZipFile(file) as z:
+            manifest = json.loads(z.read("manifest.json"))
+            with z.open("all.jsonl") as f:
+                dataset = pd.read_json(f, lines=True).to_dict(orient="records")
+        os.remove(file)
+        return manifest, dataset
+
+    def test_exports_only_changed_examples(self):
+        manifest, dataset = self.export_incrementally()
+        self.assertIsNone(manifest["since"])
+        self.assertEqual(manifest["changed_examples"], 2)
+        self.assertEqual(len(dataset), 2)
+
+        category = mommy.make("ExportedCategory", example=self.example2, user=self.project.admin)
+        next_manifest, dataset = self.export_incrementally()
+        self.assertEqual(next_manifest["since"], manifest["until"])
+        self.assertEqual(next_manifest["changed_examples"], 1)
+        self.assertEqual(next_manifest["files"], ["all.jsonl"])
+        self.assertEqual(
+            dataset, [{**self.data_to_text(self.example2), "label": [category.to_string()], "Comments": []}]
+        )
+
+    def test_counts_only_confirmed_examples(self):
+        mommy.make("ExampleState", example=self.example1, confirmed_by=self.project.admin)
+        manifest, dataset = self.export_incrementally(confirmed_only=True)
+        self.assertEqual(manifest["changed_examples"], 1)
+        self.assertEqual(len(dataset), 1)
+
+    def test_counts_examples_confirmed_by_any_member(self):
+        self.project.item.collaborative_annotation = False
+        self.project.item.save()
+        mommy.make("ExampleState", example=self.example1, confirmed_by=self.project.admin)
+        mommy.make("ExampleState", example=self.example1, confirmed_by=self.project.annotator)
+        file = export_dataset(self.project.id, "JSONL", confirmed_only=True, incremental=True)["filename"]
+        with zipfile.ZipFile(file) as z:
+            manifest = json.loads(z.read("manifest.json"))
+        os.remove(file)
+        self.assertEqual(manifest["changed_examples"], 1)
+
+    def test_full_export_does_not_move_watermark(self):
+        os.remove(export_dataset(self.project.id, "JSONL")["filename"])
+        manifest, _ = self.export_incrementally()
+        self.assertIsNone(manifest["since"])
+
+
+class TestGzipExport(TestExport):
+    def test_members_are_gzipped(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        example = mommy.make("ExportedExample", project=self.project.item, text="example")
+        file = export_dataset(self.project.id, "JSONL", compression="gzip")["filename"]
+        with zipfile.ZipFile(file) as z:
+            names = sorted(z.namelist())
+            dataset = pd.read_json(io.BytesIO(gzip.decompress(z.read(names[0]))), lines=True)
+        os.remove(file)
+        expected = sorted(f"{member.username}.jsonl.gz" for member in self.project.members)
+        self.assertEqual(names, expected)
+        self.assertEqual(
+            dataset.to_dict(orient="records"), [{**self.data_to_text(example), "label": [], "Comments": []}]
+        )
@@ -1,3 +1,8 @@
+import json
+import os
+import tempfile
+
+from django_celery_results.models import TaskResult
 from rest_framework import status
 from rest_framework.reverse import reverse
 
@@ -19,3 +24,39 @@ class TestDownloadCatalog(CRUDMixin):
     def test_denies_project_staff_to_list_catalog(self):
         for member in self.project.staffs:
             self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
+
+
+class TestDownloadDataset(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.content = b"0123456789"
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as f:
+            f.write(self.content)
+        self.file = f.name
+        TaskResult.objects.create(
+            task_id="task",
+            status="SUCCESS",
+            result=json.dumps({"filename": self.file}),
+            content_type="application/json",
+            content_encoding="utf-8",
+        )
+        self.url = reverse(viewname="download-dataset", args=[self.project.item.id]) + "?taskId=task"
+
+    def tearDown(self):
+        os.remove(self.file)
+
+    def test_allows_project_admin_to_download(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), self.content)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_serves_range(self):
+        self.client.force_login(self.project.admin)
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-5")
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(response.streaming_content), self.content[2:6])
+        self.assertEqual(response["Content-Range"], f"bytes 2-5/{len(self.content)}")
+
+    def test_denies_project_staff_to_download(self):
+        for member in self.project.staffs:
+            self.assert_fetch(member, status.HTTP_403_FORBIDDEN)
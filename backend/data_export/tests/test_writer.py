@@ -1,10 +1,19 @@
+import importlib.util
 import os
 import unittest
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
-from ..pipeline.writers import CsvWriter, FastTextWriter, JsonlWriter, JsonWriter
+from ..pipeline.factories import create_meta_types
+from ..pipeline.writers import (
+    ArrowWriter,
+    CsvWriter,
+    FastTextWriter,
+    JsonlWriter,
+    JsonWriter,
+    ParquetWriter,
+)
 
 
 class TestWriter(unittest.TestCase):
@@ -57,3 +66,104 @@ class TestFastText(unittest.TestCase):
         writer.write(file, self.dataset)
         loaded_dataset = open(file, encoding="utf-8").read().strip()
         self.assertEqual(loaded_dataset, self.expected)
+
+
+class TestWriteChunks(unittest.TestCase):
+    def setUp(self):
+        self.dataset = pd.DataFrame(
+            [
+                {"id": 0, "text": "A", "label": ["x"]},
+                {"id": 1, "text": "B,b", "label": []},
+                {"id": 2, "text": "ç", "label": ["y", "z"]},
+            ]
+        )
+        self.chunks = [self.dataset.iloc[:2], self.dataset.iloc[2:]]
+        self.expected_file = "expected.tmp"
+        self.file = "actual.tmp"
+
+    def tearDown(self):
+        os.remove(self.expected_file)
+        os.remove(self.file)
+
+    def assert_same_output(self, writer, dataset, chunks):
+        writer.write(self.expected_file, dataset)
+        writer.write_chunks(self.file, chunks)
+        with open(self.expected_file, mode="rb") as expected, open(self.file, mode="rb") as actual:
+            self.assertEqual(actual.read(), expected.read())
+
+    def test_write_chunks(self):
+        for writer in [CsvWriter(), JsonWriter(), JsonlWriter(), FastTextWriter()]:
+            with self.subTest(writer=writer):
+                self.assert_same_output(writer, self.dataset, self.chunks)
+
+    def test_write_empty_chunk(self):
+        for writer in [CsvWriter(), JsonWriter(), JsonlWriter(), FastTextWriter()]:
+            with self.subTest(writer=writer):
+                self.assert_same_output(writer, pd.DataFrame([]), [pd.DataFrame([])])
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+class TestColumnarWriter(unittest.TestCase):
+    def setUp(self):
+        import pyarrow as pa
+
+        self.dataset = pd.DataFrame(
+            [
+                {"id": 0, "text": "A", "label": []},
+                {"id": 1, "text": "B", "label": [{"start_offset": 0, "end_offset": 1, "label": "x"}]},
+                {"id": 2, "text": "C", "label": []},
+            ]
+        )
+        self.chunks = [self.dataset.iloc[:1], self.dataset.iloc[1:]]
+        self.types = {
+            "label": pa.list_(
+                pa.struct([("start_offset", pa.int64()), ("end_offset", pa.int64()), ("label", pa.string())])
+            )
+        }
+        self.file = "tmp.columnar"
+
+    def tearDown(self):
+        os.remove(self.file)
+
+    def test_write_chunks_in_row_groups(self):
+        import pyarrow.parquet as pq
+
+        ParquetWriter(types=self.types).write_chunks(self.file, self.chunks)
+        self.assertEqual(pq.ParquetFile(self.file).num_row_groups, 2)
+        loaded = pq.read_table(self.file).to_pylist()
+        self.assertEqual(loaded, self.dataset.to_dict(orient="records"))
+
+    def test_write_chunks_in_record_batches(self):
+        import pyarrow as pa
+
+        ArrowWriter(types=self.types).write_chunks(self.file, self.chunks)
+        with pa.memory_map(self.file) as source:
+            reader = pa.ipc.open_file(source)
+            self.assertEqual(reader.num_record_batches, 2)
+            loaded = reader.read_all().to_pylist()
+        self.assertEqual(loaded, self.dataset.to_dict(orient="records"))
+
+    def test_write_chunks_with_mixed_meta(self):
+        import pyarrow.parquet as pq
+
+        metas = [{"source": 1}, {"source": "web", "score": 2, "tags": ["a"]}, {"score": 0.5}]
+        # The chunks have the columns of the whole dataset, as StreamingDataset aligns them.
+        dataset = pd.DataFrame([{"id": i, **meta} for i, meta in enumerate(metas)])
+        chunks = [dataset.iloc[[i]] for i in range(3)]
+        types, json_columns = create_meta_types(metas)
+        ParquetWriter(types=types, json_columns=json_columns).write_chunks(self.file, chunks)
+        loaded = pq.read_table(self.file).to_pylist()
+        self.assertEqual(
+            loaded,
+            [
+                {"id": 0, "source": "1", "score": None, "tags": None},
+                {"id": 1, "source": '"web"', "score": 2.0, "tags": '["a"]'},
+                {"id": 2, "source": None, "score": 0.5, "tags": None},
+            ],
+        )
+
+    def test_write_empty_chunk(self):
+        import pyarrow.parquet as pq
+
+        ParquetWriter().write_chunks(self.file, [pd.DataFrame([])])
+        self.assertEqual(pq.read_table(self.file).num_rows, 0)
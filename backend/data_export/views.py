@@ -1,3 +1,5 @@
+import os
+
 from celery.result import AsyncResult
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
@@ -31,15 +33,25 @@ class DatasetExportAPI(APIView):
         task = AsyncResult(task_id)
         ready = task.ready()
         if ready:
-            filename = task.result
-            return FileResponse(open(filename, mode="rb"), as_attachment=True)
+            filename = task.result["filename"]
+            # RangesMiddleware serves partial content from `FileResponse.file_to_stream`.
+            response = FileResponse(open(filename, mode="rb"), as_attachment=True, filename=os.path.basename(filename))
+            response["Accept-Ranges"] = "bytes"
+            return response
         return Response({"status": "Not ready"})
 
     def post(self, request, *args, **kwargs):
         project_id = self.kwargs["project_id"]
         file_format = request.data.pop("format")
         export_approved = request.data.pop("exportApproved", False)
+        incremental = request.data.pop("incremental", False)
+        compression = request.data.pop("compression", "deflate")
         task = export_dataset.delay(
-            project_id=project_id, file_format=file_format, confirmed_only=export_approved, **request.data
+            project_id=project_id,
+            file_format=file_format,
+            confirmed_only=export_approved,
+            incremental=incremental,
+            compression=compression,
+            **request.data,
         )
         return Response({"task_id": task.task_id})
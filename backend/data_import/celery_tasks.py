@@ -1,30 +1,68 @@
-from typing import List
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import filetype
+import billiard
 from celery import shared_task
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connections
 from django.shortcuts import get_object_or_404
 from django_drf_filepond.api import store_upload
 from django_drf_filepond.models import TemporaryUpload
 
 from .datasets import load_dataset
+from .models import UploadProbe
 from .pipeline.catalog import Format, create_file_format
+from .pipeline.checkpoints import Checkpoints
 from .pipeline.exceptions import (
     FileImportException,
     FileTypeException,
     MaximumFileSizeException,
 )
+from .pipeline.label_types import create_label_types
+from .pipeline.probes import Probe, probe_file, remember
+from .pipeline.progress import PROGRESS, Progress
 from .pipeline.readers import FileName
+from label_types.models import LabelType
 from projects.models import Project
 
 
-def check_file_type(filename, file_format: Format, filepath: str):
+def probe_upload(tu: TemporaryUpload) -> Probe:
+    """Probe the uploaded file once. The probe is kept with the upload, and the parsers of this process reuse it."""
+    filepath = tu.get_file_path()
+    record = UploadProbe.objects.filter(upload=tu).first()
+    if record is None:
+        probe = probe_file(filepath)
+        UploadProbe.objects.create(
+            upload=tu,
+            encoding=probe.encoding,
+            bom=probe.bom,
+            mime=probe.mime,
+            estimated_lines=probe.estimated_lines,
+        )
+        return probe
+    stat = os.stat(filepath)
+    probe = Probe(
+        encoding=record.encoding,
+        bom=record.bom,
+        mime=record.mime,
+        estimated_lines=record.estimated_lines,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+    remember(filepath, probe)
+    return probe
+
+
+def check_file_type(filename, file_format: Format, probe: Probe):
     if not settings.ENABLE_FILE_TYPE_CHECK:
         return
-    kind = filetype.guess(filepath)
-    if not file_format.validate_mime(kind.mime):
-        raise FileTypeException(filename, kind.mime, file_format.accept_types)
+    # A file without any known magic number is just bytes.
+    mime = probe.mime or "application/octet-stream"
+    if not file_format.validate_mime(mime):
+        raise FileTypeException(filename, mime, file_format.accept_types)
 
 
 def check_uploaded_files(upload_ids: List[str], file_format: Format):
@@ -37,7 +75,7 @@ def check_uploaded_files(upload_ids: List[str], file_format: Format):
             tu.delete()
             continue
         try:
-            check_file_type(tu.upload_name, file_format, tu.get_file_path())
+            check_file_type(tu.upload_name, file_format, probe_upload(tu))
         except FileTypeException as e:
             errors.append(e)
             tu.delete()
@@ -46,8 +84,123 @@ def check_uploaded_files(upload_ids: List[str], file_format: Format):
     return cleaned_ids, errors
 
 
-@shared_task(autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
-def import_dataset(user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
+def import_files(
+    user_id,
+    project_id,
+    file_format: str,
+    filenames: List[FileName],
+    task: str,
+    checkpoint_id: Optional[str] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    types_created: bool = False,
+    **kwargs,
+) -> Tuple[List[dict], Dict[str, Any]]:
+    """Parse the files and save their examples and labels. Returns the errors as dicts, and the final progress.
+
+    The records committed under `checkpoint_id` by a previous attempt are skipped.
+    `on_progress` is called with the progress after each batch.
+    If `types_created`, the label types of the files already exist, and are read once instead of created.
+    """
+    project = Project.objects.get(pk=project_id)
+    user = get_user_model().objects.get(pk=user_id)
+    checkpoints = Checkpoints(checkpoint_id)
+    progress = Progress(filenames, skip=checkpoints.records, callback=on_progress, task_id=checkpoint_id)
+    try:
+        dataset = load_dataset(task, create_file_format(file_format), filenames, project, **kwargs)
+        if types_created:
+            dataset.load_types()
+        dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE, checkpoints=checkpoints, progress=progress)
+        errors = checkpoints.merge_errors([filename.generated_name for filename in filenames], dataset.errors)
+    except FileImportException as e:
+        errors = [e.dict()]
+    progress.finish()
+    return errors, progress.dict()
+
+
+def collect_label_types(
+    project_id, file_format: str, filenames: List[FileName], task: str, checkpoint_id: Optional[str] = None, **kwargs
+) -> List[LabelType]:
+    """Parse the files and return the label types of the records not imported yet, without saving anything."""
+    project = Project.objects.get(pk=project_id)
+    try:
+        dataset = load_dataset(task, create_file_format(file_format), filenames, project, **kwargs)
+        return dataset.collect_types(batch_size=settings.IMPORT_BATCH_SIZE, checkpoints=Checkpoints(checkpoint_id))
+    except FileImportException:
+        # The error is reported by the import of the file.
+        return []
+
+
+def import_files_in_parallel(
+    user_id,
+    project_id,
+    file_format: str,
+    filenames: List[FileName],
+    task: str,
+    checkpoint_id: Optional[str] = None,
+    on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    **kwargs,
+) -> Tuple[List[dict], Dict[str, Any]]:
+    """Import each file in its own process, and return the errors of all the files and the final progress.
+
+    The labels refer to their types, so the processes first collect the label types of their files,
+    which are created once here, and then import the files with the types read from the database.
+    Otherwise each process would insert the same new types at the same time, and cache them on its own.
+    The progress is reported as each file is finished, in the order of the files.
+    """
+    project = Project.objects.get(pk=project_id)
+    has_label_types = bool(
+        load_dataset(task, create_file_format(file_format), filenames, project, **kwargs).label_types
+    )
+    progress = Progress(filenames, skip=Checkpoints(checkpoint_id).records, callback=on_progress, task_id=checkpoint_id)
+    # The forked processes must open their own connections instead of sharing the current ones.
+    connections.close_all()
+    workers = min(settings.IMPORT_WORKERS, len(filenames))
+    errors = []
+    # This runs in a daemonic process of the Celery prefork pool. Only billiard lets it start the pool.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=billiard.get_context()) as executor:
+        if has_label_types:
+            futures = [
+                executor.submit(collect_label_types, project_id, file_format, [filename], task, checkpoint_id, **kwargs)
+                for filename in filenames
+            ]
+            create_label_types(itertools.chain.from_iterable(future.result() for future in futures))
+            # The pool can start more processes, which must not share the connection opened to create the types.
+            connections.close_all()
+        futures = [
+            executor.submit(
+                import_files,
+                user_id,
+                project_id,
+                file_format,
+                [filename],
+                task,
+                checkpoint_id,
+                types_created=has_label_types,
+                **kwargs,
+            )
+            for filename in filenames
+        ]
+        for filename, future in zip(filenames, futures):
+            file_errors, file_progress = future.result()
+            errors.extend(file_errors)
+            progress.add(filename.generated_name, file_progress)
+    progress.finish()
+    return errors, progress.dict()
+
+
+@shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=True, retry_jitter=True)
+def import_dataset(self, user_id, project_id, file_format: str, upload_ids: List[str], task: str, **kwargs):
+    """Import the uploaded files into the project.
+
+    Each committed batch is checkpointed under the task id, with the position to resume parsing each file from
+    and the errors reported so far. If the task is retried, the files are parsed from their positions,
+    so the records imported before are neither parsed nor imported again. An import that stopped,
+    e.g. because its worker was killed, is resumed the same way by sending the task again with the same id:
+
+        import_dataset.apply_async(args=[user_id, project_id, file_format, upload_ids, task], task_id=task_id)
+
+    The checkpoints are deleted when the import finishes.
+    """
     project = get_object_or_404(Project, pk=project_id)
     user = get_object_or_404(get_user_model(), pk=user_id)
     try:
@@ -59,11 +212,27 @@ def import_dataset(user_id, project_id, file_format: str, upload_ids: List[str],
             for tu in temporary_uploads
         ]
 
-        dataset = load_dataset(task, fmt, filenames, project, **kwargs)
-        dataset.save(user, batch_size=settings.IMPORT_BATCH_SIZE)
+        kwargs.setdefault("vectorized", settings.IMPORT_VECTORIZED)
+        kwargs.setdefault("loader", settings.IMPORT_LOADER)
+        kwargs.setdefault("parse_workers", settings.IMPORT_PARSE_WORKERS)
+        checkpoint_id = self.request.id
+
+        def on_progress(progress: Dict[str, Any]):
+            # The state can only be stored for a task that was sent, not for a direct call.
+            if checkpoint_id:
+                self.update_state(state=PROGRESS, meta=progress)
+
+        if settings.IMPORT_WORKERS > 1 and len(filenames) > 1:
+            file_errors, progress = import_files_in_parallel(
+                user.id, project.id, file_format, filenames, task, checkpoint_id, on_progress, **kwargs
+            )
+        else:
+            file_errors, progress = import_files(
+                user.id, project.id, file_format, filenames, task, checkpoint_id, on_progress, **kwargs
+            )
         upload_to_store(temporary_uploads)
-        errors.extend(dataset.errors)
-        return {"error": [e.dict() for e in errors]}
+        Checkpoints(checkpoint_id).delete()
+        return {"error": [e.dict() for e in errors] + file_errors, "progress": progress}
     except FileImportException as e:
         return {"error": [e.dict()]}
 
@@ -1,10 +1,13 @@
 import abc
-from typing import List, Type
+from typing import Dict, List, Optional, Set, Tuple, Type
 
+import pandas as pd
 from django.contrib.auth.models import User
+from django.db import transaction
 
 from .models import DummyLabelType
 from .pipeline.catalog import RELATION_EXTRACTION, Format
+from .pipeline.checkpoints import Checkpoints
 from .pipeline.data import BaseData, BinaryData, TextData
 from .pipeline.examples import Examples
 from .pipeline.exceptions import FileParseException
@@ -12,13 +15,22 @@ from .pipeline.factories import create_parser
 from .pipeline.label import CategoryLabel, Label, RelationLabel, SpanLabel, TextLabel
 from .pipeline.label_types import LabelTypes
 from .pipeline.labels import Categories, Labels, Relations, Spans, Texts
-from .pipeline.makers import BinaryExampleMaker, ExampleMaker, LabelMaker
+from .pipeline.loaders import BULK_CREATE, create_loader
+from .pipeline.makers import (
+    BinaryExampleMaker,
+    ExampleMaker,
+    LabelMaker,
+    VectorizedExampleMaker,
+    VectorizedLabelMaker,
+)
+from .pipeline.progress import Progress
 from .pipeline.readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
     FileName,
     Reader,
 )
+from examples.models import Example
 from label_types.models import CategoryType, LabelType, RelationType, SpanType
 from projects.models import Project, ProjectType
 
@@ -28,10 +40,65 @@ class Dataset(abc.ABC):
         self.reader = reader
         self.project = project
         self.kwargs = kwargs
-
-    def save(self, user: User, batch_size: int = 1000):
+        # The vectorized makers validate a batch by columns instead of one pydantic model per record.
+        vectorized = kwargs.get("vectorized", False)
+        self.example_maker_class = VectorizedExampleMaker if vectorized else ExampleMaker
+        self.label_maker_class = VectorizedLabelMaker if vectorized else LabelMaker
+        self.loader = create_loader(kwargs.get("loader", BULK_CREATE))
+
+    def save(
+        self,
+        user: User,
+        batch_size: int = 1000,
+        checkpoints: Optional[Checkpoints] = None,
+        progress: Optional[Progress] = None,
+    ):
+        """Save the records batch by batch, from the positions of the files in `checkpoints`.
+
+        `progress` is updated after each committed batch.
+        """
+        checkpoints = checkpoints or Checkpoints()
+        # The errors already kept with a checkpoint, by identity, since the makers sort their errors.
+        kept: Set[int] = set()
+        for records in self.reader.batch(batch_size, start=checkpoints.positions):
+            # The batch and its checkpoint are committed together, so a retry neither repeats nor loses it.
+            with transaction.atomic():
+                self.save_batch(user, records)
+                errors = [error for error in self.errors if id(error) not in kept]
+                checkpoints.save(records, self.reader.positions, errors)
+            kept.update(id(error) for error in errors)
+            if progress:
+                inserted = self.loader.inserted
+                progress.update(records, examples=inserted[Example], labels=sum(inserted.values()) - inserted[Example])
+
+    def save_batch(self, user: User, records: pd.DataFrame):
         raise NotImplementedError()
 
+    @property
+    def label_types(self) -> List[LabelTypes]:
+        """The caches of the label types that the labels of the dataset refer to."""
+        return []
+
+    def make_types(self, records: pd.DataFrame) -> List[LabelType]:
+        return []
+
+    def collect_types(self, batch_size: int = 1000, checkpoints: Optional[Checkpoints] = None) -> List[LabelType]:
+        """Read the records not counted in `checkpoints`, and return their label types without saving anything.
+
+        Each type is returned once per model and text.
+        """
+        checkpoints = checkpoints or Checkpoints()
+        collected: Dict[Tuple[Type[LabelType], str], LabelType] = {}
+        for records in self.reader.batch(batch_size, start=checkpoints.positions):
+            for label_type in self.make_types(records):
+                collected.setdefault((type(label_type), label_type.text), label_type)
+        return list(collected.values())
+
+    def load_types(self):
+        """Cache the label types of the project, so that the batches don't create them again."""
+        for types in self.label_types:
+            types.load(self.project)
+
     @property
     def errors(self) -> List[FileParseException]:
         raise NotImplementedError()
@@ -40,12 +107,11 @@ class Dataset(abc.ABC):
 class PlainDataset(Dataset):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         super().__init__(reader, project, **kwargs)
-        self.example_maker = ExampleMaker(project=project, data_class=TextData)
+        self.example_maker = self.example_maker_class(project=project, data_class=TextData)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: pd.DataFrame):
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -61,29 +127,37 @@ class DatasetWithSingleLabelType(Dataset):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         super().__init__(reader, project, **kwargs)
         self.types = LabelTypes(self.label_type)
-        self.example_maker = ExampleMaker(
+        self.example_maker = self.example_maker_class(
             project=project,
             data_class=self.data_class,
             column_data=kwargs.get("column_data") or DEFAULT_TEXT_COLUMN,
             exclude_columns=[kwargs.get("column_label") or DEFAULT_LABEL_COLUMN],
         )
-        self.label_maker = LabelMaker(
+        self.label_maker = self.label_maker_class(
             column=kwargs.get("column_label") or DEFAULT_LABEL_COLUMN, label_class=self.label_class
         )
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: pd.DataFrame):
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
 
-            # create label types
-            labels = self.labels_class(self.label_maker.make(records), self.types)
-            labels.clean(self.project)
-            labels.save_types(self.project)
+        # create label types
+        labels = self.labels_class(self.label_maker.make(records), self.types)
+        labels.clean(self.project)
+        labels.save_types(self.project)
 
-            # create Labels
-            labels.save(user, examples)
+        # create Labels
+        labels.save(user, examples, self.loader)
+
+    @property
+    def label_types(self) -> List[LabelTypes]:
+        return [self.types]
+
+    def make_types(self, records: pd.DataFrame) -> List[LabelType]:
+        labels = self.labels_class(self.label_maker.make(records), self.types)
+        labels.clean(self.project)
+        return labels.make_types(self.project)
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -95,10 +169,9 @@ class BinaryDataset(Dataset):
         super().__init__(reader, project, **kwargs)
         self.example_maker = BinaryExampleMaker(project=project, data_class=BinaryData)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: pd.DataFrame):
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -125,39 +198,54 @@ class Seq2seqDataset(DatasetWithSingleLabelType):
     label_type = DummyLabelType
     labels_class = Texts
 
+    @property
+    def label_types(self) -> List[LabelTypes]:
+        # The texts have no types.
+        return []
+
 
 class RelationExtractionDataset(Dataset):
     def __init__(self, reader: Reader, project: Project, **kwargs):
         super().__init__(reader, project, **kwargs)
         self.span_types = LabelTypes(SpanType)
         self.relation_types = LabelTypes(RelationType)
-        self.example_maker = ExampleMaker(
+        self.example_maker = self.example_maker_class(
             project=project,
             data_class=TextData,
             column_data=kwargs.get("column_data") or DEFAULT_TEXT_COLUMN,
             exclude_columns=["entities", "relations"],
         )
-        self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
-        self.relation_maker = LabelMaker(column="relations", label_class=RelationLabel)
+        self.span_maker = self.label_maker_class(column="entities", label_class=SpanLabel)
+        self.relation_maker = self.label_maker_class(column="relations", label_class=RelationLabel)
 
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
+    def save_batch(self, user: User, records: pd.DataFrame):
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
 
-            # create label types
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
+        # create label types
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        spans.save_types(self.project)
 
-            relations = Relations(self.relation_maker.make(records), self.relation_types)
-            relations.clean(self.project)
-            relations.save_types(self.project)
+        relations = Relations(self.relation_maker.make(records), self.relation_types)
+        relations.clean(self.project)
+        relations.save_types(self.project)
 
-            # create Labels
-            spans.save(user, examples)
-            relations.save(user, examples, spans=spans)
+        # create Labels
+        spans.save(user, examples, self.loader)
+        relations.save(user, examples, self.loader, spans=spans)
+
+    @property
+    def label_types(self) -> List[LabelTypes]:
+        return [self.span_types, self.relation_types]
+
+    def make_types(self, records: pd.DataFrame) -> List[LabelType]:
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        relations = Relations(self.relation_maker.make(records), self.relation_types)
+        relations.clean(self.project)
+        return spans.make_types(self.project) + relations.make_types(self.project)
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -169,33 +257,43 @@ class CategoryAndSpanDataset(Dataset):
         super().__init__(reader, project, **kwargs)
         self.category_types = LabelTypes(CategoryType)
         self.span_types = LabelTypes(SpanType)
-        self.example_maker = ExampleMaker(
+        self.example_maker = self.example_maker_class(
             project=project,
             data_class=TextData,
             column_data=kwargs.get("column_data") or DEFAULT_TEXT_COLUMN,
             exclude_columns=["cats", "entities"],
         )
-        self.category_maker = LabelMaker(column="cats", label_class=CategoryLabel)
-        self.span_maker = LabelMaker(column="entities", label_class=SpanLabel)
-
-    def save(self, user: User, batch_size: int = 1000):
-        for records in self.reader.batch(batch_size):
-            # create examples
-            examples = Examples(self.example_maker.make(records))
-            examples.save()
-
-            # create label types
-            categories = Categories(self.category_maker.make(records), self.category_types)
-            categories.clean(self.project)
-            categories.save_types(self.project)
-
-            spans = Spans(self.span_maker.make(records), self.span_types)
-            spans.clean(self.project)
-            spans.save_types(self.project)
-
-            # create Labels
-            categories.save(user, examples)
-            spans.save(user, examples)
+        self.category_maker = self.label_maker_class(column="cats", label_class=CategoryLabel)
+        self.span_maker = self.label_maker_class(column="entities", label_class=SpanLabel)
+
+    def save_batch(self, user: User, records: pd.DataFrame):
+        # create examples
+        examples = Examples(self.example_maker.make(records))
+        examples.save(self.loader)
+
+        # create label types
+        categories = Categories(self.category_maker.make(records), self.category_types)
+        categories.clean(self.project)
+        categories.save_types(self.project)
+
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        spans.save_types(self.project)
+
+        # create Labels
+        categories.save(user, examples, self.loader)
+        spans.save(user, examples, self.loader)
+
+    @property
+    def label_types(self) -> List[LabelTypes]:
+        return [self.category_types, self.span_types]
+
+    def make_types(self, records: pd.DataFrame) -> List[LabelType]:
+        categories = Categories(self.category_maker.make(records), self.category_types)
+        categories.clean(self.project)
+        spans = Spans(self.span_maker.make(records), self.span_types)
+        spans.clean(self.project)
+        return categories.make_types(self.project) + spans.make_types(self.project)
 
     @property
     def errors(self) -> List[FileParseException]:
@@ -0,0 +1,36 @@
+# Generated by Django 4.1.13 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_import", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportCheckpoint",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("task_id", models.CharField(max_length=255)),
+                ("filename", models.CharField(max_length=1024)),
+                (
+                    "records",
+                    models.PositiveIntegerField(default=0, help_text="The number of records imported from the file"),
+                ),
+                (
+                    "batches",
+                    models.PositiveIntegerField(
+                        default=0, help_text="The number of batches the records were imported in"
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="importcheckpoint",
+            constraint=models.UniqueConstraint(fields=("task_id", "filename"), name="unique_import_checkpoint"),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.13 on 2026-10-18 02:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("django_drf_filepond", "0010_temp_chunked_biginteger"),
+        ("data_import", "0002_importcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadProbe",
+            fields=[
+                (
+                    "upload",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="probe",
+                        serialize=False,
+                        to="django_drf_filepond.temporaryupload",
+                    ),
+                ),
+                ("encoding", models.CharField(max_length=64)),
+                ("bom", models.BooleanField(default=False)),
+                ("mime", models.CharField(max_length=255, null=True)),
+                ("estimated_lines", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
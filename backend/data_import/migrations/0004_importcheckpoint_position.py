@@ -0,0 +1,37 @@
+# Generated by Django 4.1.13 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("data_import", "0003_uploadprobe"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="errors",
+            field=models.JSONField(default=list, help_text="The errors reported up to the checkpoint"),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="line_num",
+            field=models.PositiveIntegerField(default=0, help_text="The number of lines before the offset"),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="offset",
+            field=models.PositiveBigIntegerField(
+                default=0, help_text="The byte offset in the file to resume parsing from"
+            ),
+        ),
+        migrations.AddField(
+            model_name="importcheckpoint",
+            name="records_after_offset",
+            field=models.PositiveIntegerField(
+                default=0, help_text="The number of the imported records after the offset"
+            ),
+        ),
+    ]
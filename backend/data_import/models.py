@@ -1,5 +1,8 @@
 from unittest.mock import MagicMock
 
+from django.db import models
+from django_drf_filepond.models import TemporaryUpload
+
 from label_types.models import CategoryType
 
 
@@ -8,3 +11,32 @@ class DummyLabelType(CategoryType):
 
     class Meta:
         proxy = True
+
+
+class ImportCheckpoint(models.Model):
+    """The progress of an import task in one of its files, committed with each batch."""
+
+    task_id = models.CharField(max_length=255)
+    filename = models.CharField(max_length=1024)
+    records = models.PositiveIntegerField(default=0, help_text="The number of records imported from the file")
+    batches = models.PositiveIntegerField(default=0, help_text="The number of batches the records were imported in")
+    offset = models.PositiveBigIntegerField(default=0, help_text="The byte offset in the file to resume parsing from")
+    line_num = models.PositiveIntegerField(default=0, help_text="The number of lines before the offset")
+    records_after_offset = models.PositiveIntegerField(
+        default=0, help_text="The number of the imported records after the offset"
+    )
+    errors = models.JSONField(default=list, help_text="The errors reported up to the checkpoint")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["task_id", "filename"], name="unique_import_checkpoint")]
+
+
+class UploadProbe(models.Model):
+    """The probe of an uploaded file, so that it is sampled only once. It is deleted with the upload."""
+
+    upload = models.OneToOneField(TemporaryUpload, on_delete=models.CASCADE, primary_key=True, related_name="probe")
+    encoding = models.CharField(max_length=64)
+    bom = models.BooleanField(default=False)
+    mime = models.CharField(max_length=255, null=True)
+    estimated_lines = models.PositiveBigIntegerField(default=0)
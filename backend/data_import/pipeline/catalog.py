@@ -217,6 +217,10 @@ class ArgDelimiter(ArgColumn):
     delimiter: Literal[",", "\t", ";", "|", " "] = ","
 
 
+class ArgExcel(ArgColumn):
+    sheet_name: str = ""
+
+
 class ArgEncoding(BaseModel):
     encoding: encodings = "utf_8"
 
@@ -345,7 +349,7 @@ Options.register(
         display_name=Excel.name,
         task_id=ProjectType.DOCUMENT_CLASSIFICATION,
         file_format=Excel,
-        arg=ArgColumn,
+        arg=ArgExcel,
         file=TEXT_CLASSIFICATION_DIR / "example.csv",
     )
 )
@@ -414,7 +418,7 @@ Options.register(
         display_name=Excel.name,
         task_id=ProjectType.SEQ2SEQ,
         file_format=Excel,
-        arg=ArgColumn,
+        arg=ArgExcel,
         file=SEQ2SEQ_DIR / "example.csv",
     )
 )
@@ -0,0 +1,81 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .exceptions import FileParseException
+from .readers import FILE_NAME_COLUMN, Position
+from data_import.models import ImportCheckpoint
+
+
+class Checkpoints:
+    """The number of records of each file that an import task has committed so far.
+
+    Each checkpoint also keeps the position to resume parsing the file from, so that a resumed import
+    seeks past the committed records instead of parsing them again, and the errors reported up to it,
+    since the records before the position are not read again.
+    Without a task id, e.g. when the task is called directly, nothing is persisted.
+    """
+
+    def __init__(self, task_id: Optional[str] = None):
+        self.task_id = task_id
+        self.records: Dict[str, int] = {}
+        self.positions: Dict[str, Position] = {}
+        self.errors: Dict[str, List[Dict[str, Any]]] = {}
+        if task_id:
+            for checkpoint in ImportCheckpoint.objects.filter(task_id=task_id).order_by("id"):
+                self.records[checkpoint.filename] = checkpoint.records
+                self.positions[checkpoint.filename] = Position(
+                    checkpoint.offset, checkpoint.line_num, checkpoint.records_after_offset
+                )
+                self.errors[checkpoint.filename] = checkpoint.errors
+
+    def save(
+        self,
+        batch: pd.DataFrame,
+        positions: Optional[Dict[str, Position]] = None,
+        errors: Optional[List[FileParseException]] = None,
+    ):
+        """Count the records of the batch in. Call it in the transaction that saves the batch.
+
+        Args:
+            batch: the records of the batch.
+            positions: the position after the last record of each file, by default after all its records.
+            errors: the errors reported since the previous batch, kept with the checkpoint of its last file.
+        """
+        positions = positions or {}
+        last_filename = batch[FILE_NAME_COLUMN].iloc[-1] if len(batch) else None
+        for filename, count in batch[FILE_NAME_COLUMN].value_counts().items():
+            self.records[filename] = self.records.get(filename, 0) + count
+            self.positions[filename] = positions.get(filename, Position(records=self.records[filename]))
+            if errors and filename == last_filename:
+                # The line numbers of the vectorized makers are numpy integers.
+                saved = [{**error.dict(), "line": int(error.line_num)} for error in errors]
+                self.errors[filename] = self.errors.get(filename, []) + saved
+            if not self.task_id:
+                continue
+            checkpoint, _ = ImportCheckpoint.objects.get_or_create(task_id=self.task_id, filename=filename)
+            position = self.positions[filename]
+            checkpoint.records = self.records[filename]
+            checkpoint.batches += 1
+            checkpoint.offset = position.offset
+            checkpoint.line_num = position.line_num
+            checkpoint.records_after_offset = position.records
+            checkpoint.errors = self.errors.get(filename, [])
+            checkpoint.save()
+
+    def merge_errors(self, filenames: Iterable[str], errors: List[FileParseException]) -> List[Dict[str, Any]]:
+        """Returns the errors kept with the checkpoints of the files, then the `errors` that weren't kept yet.
+
+        The errors of a range parsed in parallel are reported together, so some may be reported again on resume.
+        """
+        merged = [error for filename in filenames for error in self.errors.get(filename, [])]
+        kept = {tuple(error.values()) for error in merged}
+        for error in errors:
+            error_dict = error.dict()
+            if tuple(error_dict.values()) not in kept:
+                merged.append(error_dict)
+        return merged
+
+    def delete(self):
+        if self.task_id:
+            ImportCheckpoint.objects.filter(task_id=self.task_id).delete()
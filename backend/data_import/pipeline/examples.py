@@ -1,7 +1,8 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from pydantic import UUID4
 
+from .loaders import BulkCreateLoader, Loader
 from examples.models import Example
 
 
@@ -16,6 +17,7 @@ class Examples:
     def __contains__(self, uuid: UUID4) -> bool:
         return uuid in self.uuid_to_example
 
-    def save(self):
-        examples = Example.objects.bulk_create(self.examples)
+    def save(self, loader: Optional[Loader] = None):
+        loader = loader or BulkCreateLoader()
+        examples = loader.save(Example, self.examples)
         self.uuid_to_example = {example.uuid: example for example in examples}
@@ -1,7 +1,9 @@
 import abc
 import uuid
-from typing import Any, Optional
+from typing import Any, List, Optional, Sequence
 
+import numpy as np
+import pandas as pd
 from pydantic import UUID4, BaseModel, NonNegativeInt, constr, root_validator
 
 from .label_types import LabelTypes
@@ -15,6 +17,32 @@ from labels.models import TextLabel as TextLabelModel
 from projects.models import Project
 
 
+def is_non_empty_string(values: pd.Series) -> np.ndarray:
+    """Return a mask of the values that pass `constr(min_length=1)`."""
+    return np.fromiter((isinstance(value, str) and value != "" for value in values), dtype=bool, count=len(values))
+
+
+def to_integers(values: pd.Series, minimum: Optional[int] = None) -> pd.Series:
+    """Convert the values to integers as pydantic does, and set NaN to the invalid ones.
+
+    Integral floats and numeric strings are accepted, but fractions are not.
+    """
+    numbers = pd.to_numeric(values, errors="coerce").astype(float)
+    valid = numbers.notna() & np.isfinite(numbers) & (numbers == np.floor(numbers))
+    if minimum is not None:
+        valid &= numbers >= minimum
+    return numbers.where(valid)
+
+
+def to_frame(objs: pd.Series, columns: Sequence[str]) -> pd.DataFrame:
+    """Spread the dicts, or the lists in the order of `columns`, into columns. Other values become empty rows."""
+    records = [
+        dict(zip(columns, obj)) if isinstance(obj, (list, tuple)) else obj if isinstance(obj, dict) else {}
+        for obj in objs
+    ]
+    return pd.DataFrame.from_records(records, columns=list(columns), index=objs.index)
+
+
 class Label(BaseModel, abc.ABC):
     id: int = -1
     uuid: UUID4
@@ -32,6 +60,21 @@ class Label(BaseModel, abc.ABC):
     def parse(cls, example_uuid: UUID4, obj: Any):
         raise NotImplementedError()
 
+    @classmethod
+    def parse_column(cls, example_uuids: pd.Series, objs: pd.Series) -> List["Label"]:
+        """Parse a column of labels at once, skipping the invalid ones.
+
+        Subclasses validate the column with pandas and build the labels with `model_construct`,
+        which is much faster than validating each label. This implementation parses them one by one.
+        """
+        labels = []
+        for example_uuid, obj in zip(example_uuids, objs):
+            try:
+                labels.append(cls.parse(example_uuid, obj))
+            except ValueError:
+                pass
+        return labels
+
     @abc.abstractmethod
     def create_type(self, project: Project) -> Optional[LabelType]:
         raise NotImplementedError()
@@ -54,6 +97,14 @@ class CategoryLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, label=obj)  # type: ignore
 
+    @classmethod
+    def parse_column(cls, example_uuids: pd.Series, objs: pd.Series) -> List[Label]:
+        valid = is_non_empty_string(objs)
+        return [
+            cls.model_construct(uuid=uuid.uuid4(), example_uuid=example_uuid, label=label)
+            for example_uuid, label in zip(example_uuids[valid], objs[valid])
+        ]
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return CategoryType(text=self.label, project=project)
 
@@ -86,6 +137,32 @@ class SpanLabel(Label):
             return cls(example_uuid=example_uuid, **obj)
         raise ValueError("SpanLabel.parse()")
 
+    @classmethod
+    def parse_column(cls, example_uuids: pd.Series, objs: pd.Series) -> List[Label]:
+        df = to_frame(objs, ["start_offset", "end_offset", "label", "id"])
+        df["id"] = to_integers(df["id"]).where(df["id"].notna(), -1)
+        df["start_offset"] = to_integers(df["start_offset"], minimum=0)
+        df["end_offset"] = to_integers(df["end_offset"], minimum=0)
+        valid = (
+            df[["id", "start_offset", "end_offset"]].notna().all(axis=1).to_numpy()
+            & is_non_empty_string(df["label"])
+            & (df["start_offset"] < df["end_offset"]).to_numpy()
+        )
+        df = df[valid].astype({"id": int, "start_offset": int, "end_offset": int})
+        return [
+            cls.model_construct(
+                uuid=uuid.uuid4(),
+                example_uuid=example_uuid,
+                id=span_id,
+                label=label,
+                start_offset=start_offset,
+                end_offset=end_offset,
+            )
+            for example_uuid, span_id, label, start_offset, end_offset in zip(
+                example_uuids[valid], df["id"], df["label"], df["start_offset"], df["end_offset"]
+            )
+        ]
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return SpanType(text=self.label, project=project)
 
@@ -110,6 +187,14 @@ class TextLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, text=obj)  # type: ignore
 
+    @classmethod
+    def parse_column(cls, example_uuids: pd.Series, objs: pd.Series) -> List[Label]:
+        valid = is_non_empty_string(objs)
+        return [
+            cls.model_construct(uuid=uuid.uuid4(), example_uuid=example_uuid, text=text)
+            for example_uuid, text in zip(example_uuids[valid], objs[valid])
+        ]
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return None
 
@@ -129,6 +214,31 @@ class RelationLabel(Label):
     def parse(cls, example_uuid: UUID4, obj: Any):
         return cls(example_uuid=example_uuid, **obj)
 
+    @classmethod
+    def parse_column(cls, example_uuids: pd.Series, objs: pd.Series) -> List[Label]:
+        is_dict = np.fromiter((isinstance(obj, dict) for obj in objs), dtype=bool, count=len(objs))
+        df = to_frame(objs, ["from_id", "to_id", "type", "id"])
+        df["id"] = to_integers(df["id"]).where(df["id"].notna(), -1)
+        df["from_id"] = to_integers(df["from_id"])
+        df["to_id"] = to_integers(df["to_id"])
+        valid = (
+            is_dict & df[["id", "from_id", "to_id"]].notna().all(axis=1).to_numpy() & is_non_empty_string(df["type"])
+        )
+        df = df[valid].astype({"id": int, "from_id": int, "to_id": int})
+        return [
+            cls.model_construct(
+                uuid=uuid.uuid4(),
+                example_uuid=example_uuid,
+                id=relation_id,
+                from_id=from_id,
+                to_id=to_id,
+                type=relation_type,
+            )
+            for example_uuid, relation_id, from_id, to_id, relation_type in zip(
+                example_uuids[valid], df["id"], df["from_id"], df["to_id"], df["type"]
+            )
+        ]
+
     def create_type(self, project: Project) -> Optional[LabelType]:
         return RelationType(text=self.type, project=project)
 
@@ -1,13 +1,22 @@
-from typing import Dict, List, Type
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Type
 
 from label_types.models import LabelType
 from projects.models import Project
 
 
 class LabelTypes:
+    """The label types of a project by text, cached across the batches of an import.
+
+    Only the types that are not cached yet are inserted and selected, so a batch whose types
+    have all been seen before doesn't query the types at all.
+    """
+
     def __init__(self, label_type_class: Type[LabelType]):
         self.types: Dict[str, LabelType] = {}
         self.label_type_class = label_type_class
+        # The texts saved since the last update, which are selected by the next update.
+        self.unseen: Set[str] = set()
 
     def __contains__(self, text: str) -> bool:
         return text in self.types
@@ -16,8 +25,35 @@ class LabelTypes:
         return self.types[text]
 
     def save(self, label_types: List[LabelType]):
-        self.label_type_class.objects.bulk_create(label_types, ignore_conflicts=True)
+        new_types = {}
+        for label_type in label_types:
+            if label_type.text not in self.types and label_type.text not in new_types:
+                new_types[label_type.text] = label_type
+        if not new_types:
+            return
+        # Insert in a fixed order, so that concurrent imports lock the same new types in the same order.
+        ordered = [new_types[text] for text in sorted(new_types)]
+        # The types that already exist, e.g. created before the import or by another process, are ignored.
+        self.label_type_class.objects.bulk_create(ordered, ignore_conflicts=True)
+        self.unseen.update(new_types)
 
-    def update(self, project: Project):
+    def load(self, project: Project):
+        """Cache all the types of the project, e.g. when they were created before the batches are saved."""
         types = self.label_type_class.objects.filter(project=project)
-        self.types = {label_type.text: label_type for label_type in types}
+        self.types.update({label_type.text: label_type for label_type in types})
+
+    def update(self, project: Project):
+        if not self.unseen:
+            return
+        types = self.label_type_class.objects.filter(project=project, text__in=self.unseen)
+        self.types.update({label_type.text: label_type for label_type in types})
+        self.unseen.clear()
+
+
+def create_label_types(label_types: Iterable[LabelType]):
+    """Create the label types once per model and text, e.g. the types collected from all the files of an import."""
+    by_class: Dict[Type[LabelType], List[LabelType]] = defaultdict(list)
+    for label_type in label_types:
+        by_class[type(label_type)].append(label_type)
+    for label_type_class, types in by_class.items():
+        LabelTypes(label_type_class).save(types)
@@ -1,15 +1,21 @@
 import abc
-from itertools import groupby
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import UUID4
 
 from .examples import Examples
 from .label import Label
 from .label_types import LabelTypes
+from .loaders import BulkCreateLoader, Loader
+from label_types.models import LabelType
 from labels.models import Category as CategoryModel
 from labels.models import Label as LabelModel
 from labels.models import Relation as RelationModel
 from labels.models import Span as SpanModel
 from labels.models import TextLabel as TextLabelModel
+from metrics.models import LabelStatistics
 from projects.models import Project
 
 
@@ -19,6 +25,8 @@ class Labels(abc.ABC):
     def __init__(self, labels: List[Label], types: LabelTypes):
         self.labels = labels
         self.types = types
+        # The instances inserted by `save`, with their primary keys if the database returns them.
+        self.saved: List[LabelModel] = []
 
     def __len__(self) -> int:
         return len(self.labels)
@@ -26,19 +34,66 @@ class Labels(abc.ABC):
     def clean(self, project: Project):
         pass
 
-    def save_types(self, project: Project):
+    def make_types(self, project: Project) -> List[LabelType]:
         types = [label.create_type(project) for label in self.labels]
-        filtered_types = list(filter(None, types))
-        self.types.save(filtered_types)
+        return list(filter(None, types))
+
+    def save_types(self, project: Project):
+        self.types.save(self.make_types(project))
         self.types.update(project)
 
-    def save(self, user, examples: Examples, **kwargs):
+    def save(self, user, examples: Examples, loader: Optional[Loader] = None, **kwargs):
         labels = [
             label.create(user, examples[label.example_uuid], self.types, **kwargs)
             for label in self.labels
             if label.example_uuid in examples
         ]
-        self.label_model.objects.bulk_create(labels)
+        loader = loader or BulkCreateLoader()
+        self.saved = loader.save(self.label_model, labels)
+        # The loaders send no signals, so the labels are counted in the statistics here.
+        LabelStatistics.objects.add_labels(self.saved)
+
+
+def example_codes(labels: List[Label]) -> np.ndarray:
+    """Numbers the examples of the labels in the order they first appear.
+
+    A dict is much faster than `pd.factorize` on UUID objects.
+    """
+    codes: Dict[UUID4, int] = {}
+    return np.fromiter(
+        (codes.setdefault(label.example_uuid, len(codes)) for label in labels), dtype=np.int64, count=len(labels)
+    )
+
+
+def non_overlapping(examples: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> List[int]:
+    """Returns the indices of the spans to keep, so that the spans of an example don't overlap.
+
+    The spans are sorted by (example, start, end) at once, and a span is kept if it starts at or after
+    the end of the last span kept in its example. A span that starts after the end of every span before it
+    is kept whatever happened to them, which a running maximum finds for all the spans at once.
+    Only the examples with other spans are swept one span at a time, because whether such a span is kept
+    depends on the spans kept before it.
+    """
+    order = np.lexsort((ends, starts, examples))
+    examples, starts, ends = examples[order], starts[order], ends[order]
+    # Shift each example past the offsets of the previous ones, so that one running maximum serves all of them.
+    shift = examples * (int(ends.max()) + 1)
+    reach = np.maximum.accumulate(ends + shift)
+    clear = np.empty(len(order), dtype=bool)
+    clear[0] = True
+    clear[1:] = starts[1:] + shift[1:] >= reach[:-1]
+    if clear.all():
+        return order.tolist()
+    keep = np.isin(examples, examples[~clear], invert=True)
+    last_example, last_end = -1, -1
+    for i in np.flatnonzero(~keep).tolist():
+        example, start = examples[i], starts[i]
+        if example != last_example:
+            last_example, last_end = example, -1
+        if start >= last_end:
+            keep[i] = True
+            last_end = ends[i]
+    return order[keep].tolist()
 
 
 class Categories(Labels):
@@ -46,9 +101,10 @@ class Categories(Labels):
 
     def clean(self, project: Project):
         exclusive = getattr(project, "single_class_classification", False)
-        if exclusive:
-            groups = groupby(self.labels, lambda label: label.example_uuid)
-            self.labels = [next(group) for _, group in groups]
+        if exclusive and self.labels:
+            # Keep the first category of each example, wherever the others are in the batch.
+            duplicated = pd.Series([label.example_uuid for label in self.labels]).duplicated().to_numpy()
+            self.labels = [label for label, is_duplicated in zip(self.labels, duplicated) if not is_duplicated]
 
 
 class Spans(Labels):
@@ -56,25 +112,31 @@ class Spans(Labels):
 
     def clean(self, project: Project):
         allow_overlapping = getattr(project, "allow_overlapping", False)
-        if allow_overlapping:
+        if allow_overlapping or not self.labels:
             return
-        spans = []
-        groups = groupby(self.labels, lambda label: label.example_uuid)
-        for _, group in groups:
-            labels = sorted(group)
-            last_offset = -1
-            for label in labels:
-                if getattr(label, "start_offset") >= last_offset:
-                    last_offset = getattr(label, "end_offset")
-                    spans.append(label)
-        self.labels = spans
+        # The examples are numbered in the order they first appear, so they keep their order.
+        examples = example_codes(self.labels)
+        starts = np.fromiter((label.start_offset for label in self.labels), dtype=np.int64, count=len(self.labels))
+        ends = np.fromiter((label.end_offset for label in self.labels), dtype=np.int64, count=len(self.labels))
+        self.labels = [self.labels[i] for i in non_overlapping(examples, starts, ends)]
 
     @property
     def id_to_span(self) -> Dict[Tuple[int, str], SpanModel]:
-        uuids = [str(span.uuid) for span in self.labels]
-        spans = SpanModel.objects.filter(uuid__in=uuids)
-        uuid_to_span = {span.uuid: span for span in spans}
-        return {(span.id, str(span.example_uuid)): uuid_to_span[span.uuid] for span in self.labels}
+        """Maps the ids of the spans in the file and their examples to the saved spans.
+
+        The spans come from `save`, so no query is needed, unless the database doesn't return
+        the primary keys of the inserted rows. Then they are selected by uuid.
+        The spans not saved, e.g. of invalid examples, are left out.
+        """
+        uuid_to_span = {span.uuid: span for span in self.saved if span.pk is not None}
+        missing = [str(span.uuid) for span in self.saved if span.pk is None]
+        if missing:
+            uuid_to_span.update({span.uuid: span for span in SpanModel.objects.filter(uuid__in=missing)})
+        return {
+            (span.id, str(span.example_uuid)): uuid_to_span[span.uuid]
+            for span in self.labels
+            if span.uuid in uuid_to_span
+        }
 
 
 class Texts(Labels):
@@ -84,6 +146,6 @@ class Texts(Labels):
 class Relations(Labels):
     label_model = RelationModel
 
-    def save(self, user, examples: Examples, **kwargs):
+    def save(self, user, examples: Examples, loader: Optional[Loader] = None, **kwargs):
         id_to_span = kwargs["spans"].id_to_span
-        super().save(user, examples, id_to_span=id_to_span)
+        super().save(user, examples, loader, id_to_span=id_to_span)
@@ -4,9 +4,10 @@ import pandas as pd
 
 from .data import BaseData
 from .exceptions import FileParseException
-from .label import Label
+from .label import Label, is_non_empty_string
 from .readers import (
     DEFAULT_TEXT_COLUMN,
+    FILE_NAME_COLUMN,
     LINE_NUMBER_COLUMN,
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
@@ -72,6 +73,48 @@ class ExampleMaker:
         return self._errors
 
 
+class VectorizedExampleMaker(ExampleMaker):
+    """Make examples from the columns of a batch, without validating each record with pydantic.
+
+    The text column is validated as `TextData` does, so it only supports text data.
+    """
+
+    def make(self, df: pd.DataFrame) -> List[Example]:
+        if not self.check_column_existence(df):
+            return []
+        self.check_value_existence(df)
+        df = df.loc[:, ~df.columns.isin(self.exclude_columns)]
+        df = df.dropna(subset=[self.column_data])
+
+        valid = is_non_empty_string(df[self.column_data])
+        line_nums = df[LINE_NUMBER_COLUMN] if LINE_NUMBER_COLUMN in df.columns else pd.Series(0, index=df.index)
+        for upload_name, line_num in zip(df.loc[~valid, UPLOAD_NAME_COLUMN], line_nums[~valid]):
+            message = f"Invalid data in line {line_num}"
+            self._errors.append(FileParseException(upload_name, line_num, message))
+        df = df[valid]
+
+        # The rest of the columns go to meta, as `BaseData.parse` does with the keyword arguments.
+        reserved = [LINE_NUMBER_COLUMN, UUID_COLUMN, FILE_NAME_COLUMN, UPLOAD_NAME_COLUMN, DEFAULT_TEXT_COLUMN]
+        meta_columns = df.columns[~df.columns.isin([*reserved, self.column_data])]
+        if len(meta_columns):
+            metas = df[meta_columns].to_dict(orient="records")
+        else:
+            metas = [{} for _ in range(len(df))]
+        return [
+            Example(
+                uuid=example_uuid,
+                project=self.project,
+                filename=filename,
+                upload_name=upload_name,
+                text=text,
+                meta=meta,
+            )
+            for example_uuid, filename, upload_name, text, meta in zip(
+                df[UUID_COLUMN], df[FILE_NAME_COLUMN], df[UPLOAD_NAME_COLUMN], df[self.column_data], metas
+            )
+        ]
+
+
 class BinaryExampleMaker(ExampleMaker):
     def make(self, df: pd.DataFrame) -> List[Example]:
         examples = []
@@ -116,3 +159,15 @@ class LabelMaker:
     def errors(self) -> List[FileParseException]:
         self._errors.sort(key=lambda error: error.line_num)
         return self._errors
+
+
+class VectorizedLabelMaker(LabelMaker):
+    """Make labels with `Label.parse_column`, which validates the whole column at once."""
+
+    def make(self, df: pd.DataFrame) -> List[Label]:
+        if not self.check_column_existence(df):
+            return []
+
+        df_label = df[[UUID_COLUMN, self.column]].explode(self.column, ignore_index=True)
+        df_label.dropna(subset=[self.column], inplace=True)
+        return self.label_class.parse_column(df_label[UUID_COLUMN], df_label[self.column])
@@ -0,0 +1,192 @@
+import codecs
+import collections
+import csv
+import dataclasses
+import importlib.util
+import io
+import json
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import billiard
+
+from .readers import LINE_NUMBER_COLUMN
+
+# The size of the byte ranges parsed by each process. Small files are parsed in the current process.
+CHUNK_SIZE = 4 * 1024 * 1024
+ORJSON_AVAILABLE = importlib.util.find_spec("orjson") is not None
+
+
+@dataclasses.dataclass(frozen=True)
+class ByteRange:
+    """A part of a file that starts and ends on a line boundary."""
+
+    start: int
+    end: int
+    # The number of the first line of the range in the file, starting from 1.
+    first_line: int
+    # The number of the last line of the range in the file.
+    last_line: int
+
+
+def resolve_workers(workers: int) -> int:
+    """Returns the number of processes. 0 or less means one per core."""
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def splittable_encoding(encoding: str) -> Optional[str]:
+    """Returns the encoding to decode each range with, or None if the file can't be split on newline bytes.
+
+    A BOM is skipped when the ranges are made, so UTF-8 with BOM is decoded as UTF-8.
+    """
+    codec = codecs.lookup(encoding)
+    if codec.name == "utf-8-sig":
+        return "utf-8"
+    # The newline of UTF-16 and UTF-32 is more than one byte, and their other characters can contain a newline byte.
+    if codec.encode("\n")[0] != b"\n":
+        return None
+    return encoding
+
+
+def json_decoder() -> Callable[[str], Any]:
+    """Returns `orjson.loads` if orjson is installed, otherwise `json.loads`.
+
+    orjson rejects a few things the standard library accepts, e.g. NaN. Such lines are decoded again
+    by the standard library, so the results and the error messages are the same either way.
+    """
+    if not ORJSON_AVAILABLE:
+        return json.loads
+    import orjson
+
+    def loads(line: str):
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return json.loads(line)
+
+    return loads
+
+
+def split_ranges(
+    mm: mmap.mmap, start: int, chunk_size: int = CHUNK_SIZE, quote: Optional[bytes] = None, first_line: int = 1
+) -> Iterator[ByteRange]:
+    """Splits the file from `start` into ranges of about `chunk_size` bytes, ending on newlines.
+
+    If `quote` is given, a newline is only a boundary if it's not in a quoted field,
+    i.e. the number of quotes before it is even. That holds as long as quotes only appear
+    in quoted fields, as RFC 4180 requires. `first_line` is the number of the line at `start`.
+    """
+    size = len(mm)
+    while start < size:
+        end = min(start + chunk_size, size)
+        quotes = 0
+        scanned = start
+        while end < size:
+            newline = mm.find(b"\n", max(end - 1, scanned))
+            if newline == -1:
+                end = size
+                break
+            end = newline + 1
+            if quote is None:
+                break
+            quotes += mm[scanned:end].count(quote)
+            scanned = end
+            if quotes % 2 == 0:
+                break
+        newlines = mm[start:end].count(b"\n")
+        # The last range can end without a newline.
+        last_line = first_line + newlines - (1 if mm[end - 1 : end] == b"\n" else 0)
+        yield ByteRange(start, end, first_line, last_line)
+        first_line += newlines
+        start = end
+
+
+def read_range(byte_range: ByteRange, filename: str, encoding: str) -> str:
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return mm[byte_range.start : byte_range.end].decode(encoding)
+
+
+def parse_jsonl_range(
+    byte_range: ByteRange, filename: str, encoding: str
+) -> Tuple[List[Dict[Any, Any]], List[Tuple[int, str]]]:
+    """Returns the records of the range with their line numbers, and the line numbers and messages of the errors."""
+    loads = json_decoder()
+    text = read_range(byte_range, filename, encoding)
+    lines = text.split("\n")
+    if text.endswith("\n"):
+        lines.pop()
+    records = []
+    errors = []
+    for line_num, line in enumerate(lines, start=byte_range.first_line):
+        try:
+            records.append({LINE_NUMBER_COLUMN: line_num, **loads(line.rstrip())})
+        except json.decoder.JSONDecodeError as e:
+            errors.append((line_num, str(e)))
+    return records, errors
+
+
+def parse_csv_range(
+    byte_range: ByteRange, filename: str, encoding: str, fieldnames: List[str], delimiter: str
+) -> List[Dict[Any, Any]]:
+    """Returns the rows of the range. The line numbers are the row numbers, so they are given by the caller."""
+    text = read_range(byte_range, filename, encoding)
+    # Translate the newlines as reading the file in text mode does.
+    f = io.StringIO(text, newline=None)
+    return list(csv.DictReader(f, fieldnames=fieldnames, delimiter=delimiter))
+
+
+def map_ranges(func: Callable, ranges: Iterator[ByteRange], workers: int, *args) -> Iterator[Tuple[ByteRange, Any]]:
+    """Applies `func` to the ranges in a process pool, and yields each range and its result in the order of the ranges.
+
+    Only a few ranges per process are in flight, so the memory use does not depend on the file size.
+    The pool is started with billiard, because multiprocessing refuses to start it in the daemonic processes
+    of the Celery prefork pool, where the files are imported.
+    """
+    with ProcessPoolExecutor(max_workers=workers, mp_context=billiard.get_context()) as executor:
+        futures: collections.deque = collections.deque()
+        for byte_range in ranges:
+            futures.append((byte_range, executor.submit(func, byte_range, *args)))
+            if len(futures) >= 2 * workers:
+                done_range, future = futures.popleft()
+                yield done_range, future.result()
+        while futures:
+            done_range, future = futures.popleft()
+            yield done_range, future.result()
+
+
+def iter_jsonl(
+    filename: str, encoding: str, workers: int, chunk_size: int = CHUNK_SIZE, start: int = 0, first_line: int = 1
+) -> Iterator[Tuple[ByteRange, List[Dict[Any, Any]], List[Tuple[int, str]]]]:
+    """Parses a JSONL file in parallel from the byte `start` of line `first_line`,
+    and yields each range with its records and errors in order.
+    """
+    if os.path.getsize(filename) == 0:
+        return
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start == 0 and mm[:3] == codecs.BOM_UTF8:
+            start = len(codecs.BOM_UTF8)
+        ranges = split_ranges(mm, start, chunk_size, first_line=first_line)
+        for byte_range, (records, errors) in map_ranges(parse_jsonl_range, ranges, workers, filename, encoding):
+            yield byte_range, records, errors
+
+
+def iter_csv(
+    filename: str, encoding: str, delimiter: str, workers: int, chunk_size: int = CHUNK_SIZE, start: int = 0
+) -> Iterator[Tuple[ByteRange, List[Dict[Any, Any]]]]:
+    """Parses a CSV file in parallel, from the byte `start` if it's after the header,
+    and yields each range with its rows in order.
+    """
+    if os.path.getsize(filename) == 0:
+        return
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_start = len(codecs.BOM_UTF8) if mm[:3] == codecs.BOM_UTF8 else 0
+        # The header is the first record, which can span lines if it is quoted.
+        header = next(split_ranges(mm, header_start, chunk_size=0, quote=b'"'), None)
+        if header is None:
+            return
+        header_text = io.StringIO(mm[header.start : header.end].decode(encoding), newline=None)
+        fieldnames = next(csv.reader(header_text, delimiter=delimiter))
+        ranges = split_ranges(mm, max(header.end, start), chunk_size, quote=b'"')
+        yield from map_ranges(parse_csv_range, ranges, workers, filename, encoding, fieldnames, delimiter)
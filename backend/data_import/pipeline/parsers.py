@@ -1,60 +1,45 @@
+import codecs
 import csv
-import io
+import itertools
 import json
 import os
-from typing import Any, Dict, Iterator, List, Tuple
+import zipfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import chardet
+import openpyxl
 import pyexcel
 import pyexcel.exceptions
-from chardet import UniversalDetector
+from openpyxl.utils.exceptions import InvalidFileException
 from seqeval.scheme import BILOU, IOB2, IOBES, IOE2, Tokens
 
+from . import parallel
 from .exceptions import FileParseException
+from .probes import probe_file
 from .readers import (
     DEFAULT_LABEL_COLUMN,
     DEFAULT_TEXT_COLUMN,
     LINE_NUMBER_COLUMN,
     Parser,
+    Position,
 )
 
 DEFAULT_ENCODING = "Auto"
 
 
-def detect_encoding(filename: str, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> str:
+def detect_encoding(filename: str) -> str:
     """Detects character encoding automatically.
 
+    The file is probed once, and the result is reused by the later calls.
     If you want to know the supported encodings, please see the following document:
     https://chardet.readthedocs.io/en/latest/supported-encodings.html
 
     Args:
         filename: the filename for detecting the encoding.
-        buffer_size: the buffer size to read file contents incrementally.
 
     Returns:
         The character encoding.
     """
-    # For a small file.
-    if os.path.getsize(filename) < buffer_size:
-        detected = chardet.detect(open(filename, "rb").read())
-        return detected.get("encoding", "utf-8")
-
-    # For a large file, call the Universal Encoding Detector incrementally.
-    # It will stop as soon as it is confident enough to report its results.
-    # See: https://chardet.readthedocs.io/en/latest/usage.html
-    with open(filename, "rb") as f:
-        detector = UniversalDetector()
-        while True:
-            binary = f.read(buffer_size)
-            detector.feed(binary)
-            if binary == b"":
-                break
-            if detector.done:
-                break
-        if detector.done:
-            return detector.result["encoding"] or "utf-8"
-        else:
-            return "utf-8"
+    return probe_file(filename).encoding
 
 
 def decide_encoding(filename: str, encoding: str) -> str:
@@ -76,23 +61,68 @@ def decide_encoding(filename: str, encoding: str) -> str:
         return encoding
 
 
+def split_lines(text: str) -> List[str]:
+    """Splits the text on its line breaks, translated to '\\n' as reading in text mode does."""
+    lines = [line + "\n" for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n")]
+    # The text after the last line break.
+    last = lines.pop()[:-1]
+    if last:
+        lines.append(last)
+    return lines
+
+
+def read_lines(filename: str, encoding: str, offset: int = 0) -> Iterator[Tuple[str, Optional[int]]]:
+    """Reads the lines of the file from the byte `offset`, as reading in text mode does.
+
+    Each line comes with the byte offset after it, or None if it doesn't end on a newline byte, e.g. on a lone '\\r'.
+    The encodings that can't be split on newline bytes are read in text mode from the start, without offsets.
+    """
+    splittable = parallel.splittable_encoding(encoding)
+    if splittable is None:
+        with open(filename, encoding=encoding) as f:
+            for line in f:
+                yield line, None
+        return
+    with open(filename, "rb") as f:
+        if offset == 0 and codecs.lookup(encoding).name == "utf-8-sig" and f.read(3) == codecs.BOM_UTF8:
+            offset = len(codecs.BOM_UTF8)
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            line = raw.decode(splittable)
+            if "\r" in line:
+                *lines, line = split_lines(line)
+                for part in lines:
+                    yield part, None
+            yield line, offset
+
+
 class LineReader:
     """LineReader is a helper class to read a file line by line.
 
     Attributes:
         filename: The filename to read.
         encoding: The character encoding.
+        start: The byte offset to read from.
+        offset: The byte offset after the last line read, or None if it isn't on a line boundary of the file.
     """
 
-    def __init__(self, filename: str, encoding: str = DEFAULT_ENCODING):
+    def __init__(self, filename: str, encoding: str = DEFAULT_ENCODING, start: int = 0):
         self.filename = filename
         self.encoding = encoding
+        self.start = start
+        self.offset: Optional[int] = None
 
     def __iter__(self) -> Iterator[str]:
+        for line in self.lines():
+            yield line.rstrip()
+
+    def lines(self) -> Iterator[str]:
+        """Yields the lines with their line breaks."""
         encoding = decide_encoding(self.filename, self.encoding)
-        with open(self.filename, encoding=encoding) as f:
-            for line in f:
-                yield line.rstrip()
+        for line, offset in read_lines(self.filename, encoding, self.start):
+            self.offset = offset
+            yield line
 
 
 class PlainParser(Parser):
@@ -119,9 +149,15 @@ class LineParser(Parser):
         self.encoding = encoding
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
-            yield {DEFAULT_TEXT_COLUMN: line, LINE_NUMBER_COLUMN: line_num}
+        yield from self.parse_from(filename, Position())
+
+    def parse_from(self, filename: str, start: Position) -> Iterator[Dict[Any, Any]]:
+        reader = LineReader(filename, self.encoding, start.offset)
+        rows = (
+            ({DEFAULT_TEXT_COLUMN: line, LINE_NUMBER_COLUMN: line_num}, reader.offset, line_num)
+            for line_num, line in enumerate(reader, start=start.line_num + 1)
+        )
+        yield from self.track(rows, start)
 
 
 class TextFileParser(Parser):
@@ -140,24 +176,66 @@ class TextFileParser(Parser):
             yield {DEFAULT_TEXT_COLUMN: f.read()}
 
 
+def can_parse_in_parallel(filename: str, encoding: str, parse_workers: int) -> bool:
+    """Whether to split the file into byte ranges and parse them in a process pool.
+
+    Small files are not worth starting the processes for.
+    """
+    if parse_workers == 1 or os.path.getsize(filename) <= parallel.CHUNK_SIZE:
+        return False
+    return parallel.splittable_encoding(encoding) is not None
+
+
 class CSVParser(Parser):
     """CSVParser is a parser to read a csv file and return its rows.
 
     Attributes:
         encoding: The character encoding.
         delimiter: A one-character string used to separate fields. It defaults to ','.
+        parse_workers: The number of processes to parse a large file with. 0 means one per core.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, delimiter: str = ",", **kwargs):
+    def __init__(self, encoding: str = DEFAULT_ENCODING, delimiter: str = ",", parse_workers: int = 1, **kwargs):
         self.encoding = encoding
         self.delimiter = delimiter
+        self.parse_workers = parse_workers
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        yield from self.parse_from(filename, Position())
+
+    def parse_from(self, filename: str, start: Position) -> Iterator[Dict[Any, Any]]:
         encoding = decide_encoding(filename, self.encoding)
-        with open(filename, encoding=encoding) as f:
-            reader = csv.DictReader(f, delimiter=self.delimiter)
-            for line_num, row in enumerate(reader, start=1):
-                yield {LINE_NUMBER_COLUMN: line_num, **row}
+        if can_parse_in_parallel(filename, encoding, self.parse_workers):
+            yield from self.track(self.parse_in_parallel(filename, encoding, start), start)
+            return
+        reader = LineReader(filename, encoding)
+        lines = reader.lines()
+        fieldnames = next(csv.reader(lines, delimiter=self.delimiter), None)
+        if fieldnames is None:
+            return
+        if start.offset:
+            reader = LineReader(filename, encoding, start.offset)
+            lines = reader.lines()
+        rows = csv.DictReader(lines, fieldnames=fieldnames, delimiter=self.delimiter)
+        # The line numbers are the numbers of the rows.
+        records = (
+            ({LINE_NUMBER_COLUMN: line_num, **row}, reader.offset, line_num)
+            for line_num, row in enumerate(rows, start=start.line_num + 1)
+        )
+        yield from self.track(records, start)
+
+    def parse_in_parallel(
+        self, filename: str, encoding: str, start: Position
+    ) -> Iterator[Tuple[Dict[Any, Any], Optional[int], int]]:
+        encoding = parallel.splittable_encoding(encoding)
+        workers = parallel.resolve_workers(self.parse_workers)
+        line_num = start.line_num
+        ranges = parallel.iter_csv(filename, encoding, self.delimiter, workers, parallel.CHUNK_SIZE, start.offset)
+        for byte_range, rows in ranges:
+            for i, row in enumerate(rows, start=1):
+                line_num += 1
+                # Only the end of the range is known to be on a line boundary.
+                yield {LINE_NUMBER_COLUMN: line_num, **row}, byte_range.end if i == len(rows) else None, line_num
 
 
 class JSONParser(Parser):
@@ -192,47 +270,136 @@ class JSONLParser(Parser):
 
     Attributes:
         encoding: The character encoding.
+        parse_workers: The number of processes to parse a large file with. 0 means one per core.
     """
 
-    def __init__(self, encoding: str = DEFAULT_ENCODING, **kwargs):
+    def __init__(self, encoding: str = DEFAULT_ENCODING, parse_workers: int = 1, **kwargs):
         self.encoding = encoding
+        self.parse_workers = parse_workers
         self._errors: List[FileParseException] = []
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+        yield from self.parse_from(filename, Position())
+
+    def parse_from(self, filename: str, start: Position) -> Iterator[Dict[Any, Any]]:
+        encoding = decide_encoding(filename, self.encoding)
+        if can_parse_in_parallel(filename, encoding, self.parse_workers):
+            yield from self.track(self.parse_in_parallel(filename, encoding, start), start)
+        else:
+            yield from self.track(self.parse_lines(filename, encoding, start), start)
+
+    def parse_lines(
+        self, filename: str, encoding: str, start: Position
+    ) -> Iterator[Tuple[Dict[Any, Any], Optional[int], int]]:
+        loads = parallel.json_decoder()
+        reader = LineReader(filename, encoding, start.offset)
+        for line_num, line in enumerate(reader, start=start.line_num + 1):
             try:
-                row = json.loads(line)
-                yield {LINE_NUMBER_COLUMN: line_num, **row}
+                row = loads(line)
+                yield {LINE_NUMBER_COLUMN: line_num, **row}, reader.offset, line_num
             except json.decoder.JSONDecodeError as e:
                 error = FileParseException(filename, line_num, str(e))
                 self._errors.append(error)
 
+    def parse_in_parallel(
+        self, filename: str, encoding: str, start: Position
+    ) -> Iterator[Tuple[Dict[Any, Any], Optional[int], int]]:
+        encoding = parallel.splittable_encoding(encoding)
+        workers = parallel.resolve_workers(self.parse_workers)
+        ranges = parallel.iter_jsonl(filename, encoding, workers, parallel.CHUNK_SIZE, start.offset, start.line_num + 1)
+        for byte_range, records, errors in ranges:
+            self._errors.extend(FileParseException(filename, line_num, message) for line_num, message in errors)
+            for i, record in enumerate(records, start=1):
+                # Only the end of the range is known to be on a line boundary.
+                yield record, byte_range.end if i == len(records) else None, byte_range.last_line
+
     @property
     def errors(self) -> List[FileParseException]:
         return self._errors
 
 
 class ExcelParser(Parser):
-    """ExcelParser is a parser to read a excel file."""
+    """ExcelParser is a parser to read a excel file.
 
-    def __init__(self, **kwargs):
+    An .xlsx file is streamed row by row in openpyxl's read-only mode, so the memory usage
+    doesn't depend on the number of rows. The other formats are read by pyexcel.
+
+    Attributes:
+        sheet_name: The name of the sheet to read. The first sheet is read if it is empty.
+    """
+
+    def __init__(self, sheet_name: str = "", **kwargs):
+        self.sheet_name = sheet_name
         self._errors = []
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        rows = pyexcel.iget_records(file_name=filename)
         try:
-            for line_num, row in enumerate(rows, start=1):
-                yield {LINE_NUMBER_COLUMN: line_num, **row}
-        except pyexcel.exceptions.FileTypeNotSupported as e:
+            rows = self.open_records(filename)
+        except (pyexcel.exceptions.FileTypeNotSupported, InvalidFileException, zipfile.BadZipFile, KeyError) as e:
             error = FileParseException(filename, line_num=1, message=str(e))
             self._errors.append(error)
+            return
+        for line_num, row in enumerate(rows, start=1):
+            yield {LINE_NUMBER_COLUMN: line_num, **row}
+
+    def open_records(self, filename: str) -> Iterator[Dict[Any, Any]]:
+        """Opens the file and selects the sheet, and returns the rows after the header as dicts.
+
+        The errors of opening the file are raised here, so they aren't confused with the errors of the rows.
+        """
+        if zipfile.is_zipfile(filename):
+            workbook = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+            try:
+                sheet = workbook[self.sheet_name] if self.sheet_name else workbook.worksheets[0]
+            except KeyError:
+                workbook.close()
+                raise
+            return self.iter_xlsx_records(workbook, sheet)
+        if self.sheet_name:
+            rows = pyexcel.iget_records(file_name=filename, sheet_name=self.sheet_name)
+        else:
+            rows = pyexcel.iget_records(file_name=filename)
+        # pyexcel opens the file when the first row is read.
+        first = next(rows, None)
+        return itertools.chain([first], rows) if first is not None else iter(())
+
+    def iter_xlsx_records(self, workbook: openpyxl.Workbook, sheet) -> Iterator[Dict[Any, Any]]:
+        """Yields the rows after the header as dicts, in the same way as `pyexcel.iget_records` does.
+
+        Empty cells are empty strings. The empty rows at the end of the sheet are dropped,
+        so only the number of pending empty rows is kept, not the rows.
+        """
+        try:
+            rows = sheet.iter_rows(values_only=True)
+            header = [cell if cell is not None else "" for cell in trim_row(next(rows, ()))]
+            empty_rows = 0
+            for row in rows:
+                row = trim_row(row)
+                if not row:
+                    empty_rows += 1
+                    continue
+                for _ in range(empty_rows):
+                    yield dict.fromkeys(header, "")
+                empty_rows = 0
+                values = [cell if cell is not None else "" for cell in row]
+                values += [""] * (len(header) - len(values))
+                yield dict(zip(header, values))
+        finally:
+            workbook.close()
 
     @property
     def errors(self) -> List[FileParseException]:
         return self._errors
 
 
+def trim_row(row: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    """Removes the empty cells at the end of the row."""
+    end = len(row)
+    while end > 0 and row[end - 1] is None:
+        end -= 1
+    return row[:end]
+
+
 class FastTextParser(Parser):
     """FastTextParser is a parser to read a fastText format and returns a text and labels.
 
@@ -251,8 +418,14 @@ class FastTextParser(Parser):
         self.label = label
 
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
-        reader = LineReader(filename, self.encoding)
-        for line_num, line in enumerate(reader, start=1):
+        yield from self.parse_from(filename, Position())
+
+    def parse_from(self, filename: str, start: Position) -> Iterator[Dict[Any, Any]]:
+        yield from self.track(self.parse_lines(filename, start), start)
+
+    def parse_lines(self, filename: str, start: Position) -> Iterator[Tuple[Dict[Any, Any], Optional[int], int]]:
+        reader = LineReader(filename, self.encoding, start.offset)
+        for line_num, line in enumerate(reader, start=start.line_num + 1):
             labels = []
             tokens = []
             for token in line.rstrip().split(" "):
@@ -262,7 +435,8 @@ class FastTextParser(Parser):
                 else:
                     tokens.append(token)
             text = " ".join(tokens)
-            yield {DEFAULT_TEXT_COLUMN: text, DEFAULT_LABEL_COLUMN: labels, LINE_NUMBER_COLUMN: line_num}
+            record = {DEFAULT_TEXT_COLUMN: text, DEFAULT_LABEL_COLUMN: labels, LINE_NUMBER_COLUMN: line_num}
+            yield record, reader.offset, line_num
 
 
 class CoNLLParser(Parser):
@@ -0,0 +1,120 @@
+import codecs
+import dataclasses
+import io
+import os
+from typing import Dict, Optional
+
+import filetype
+from chardet import UniversalDetector
+
+# Enough to tell the encoding of most files, and more than `filetype` needs for the magic numbers.
+SAMPLE_SIZE = 64 * 1024
+CACHE_SIZE = 1024
+
+# The longer BOMs first, the UTF-32 LE BOM starts with the UTF-16 LE one.
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+@dataclasses.dataclass(frozen=True)
+class Probe:
+    """What the import pipeline needs to know about a file before parsing it."""
+
+    encoding: str
+    bom: bool
+    mime: Optional[str]
+    estimated_lines: int
+    size: int
+    mtime_ns: int
+
+
+def scan_utf8(f, sample: bytes, buffer_size: int = SAMPLE_SIZE) -> Optional[str]:
+    """Checks that the whole file decodes as UTF-8, starting from the sample and reading on from `f`.
+
+    A file can turn non-ASCII or invalid after the sample. Decoding the rest is still much faster than chardet.
+
+    Returns:
+        "ascii" if the file is ASCII, "utf-8" if it decodes as UTF-8, otherwise None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    is_ascii = True
+    binary = sample
+    try:
+        while binary:
+            is_ascii = is_ascii and binary.isascii()
+            decoder.decode(binary)
+            binary = f.read(buffer_size)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return None
+    return "ascii" if is_ascii else "utf-8"
+
+
+def detect_encoding(f, sample: bytes, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> str:
+    """Detects the encoding with chardet, starting from the sample and reading on from `f` if it is not confident."""
+    detector = UniversalDetector()
+    binary = sample
+    while binary and not detector.done:
+        detector.feed(binary)
+        binary = f.read(buffer_size)
+    detector.close()
+    return detector.result["encoding"] or "utf-8"
+
+
+def estimate_lines(sample: bytes, size: int) -> int:
+    """Counts the lines of the sample, and scales the count to the file size if the sample is partial."""
+    lines = sample.count(b"\n")
+    if len(sample) == size:
+        return lines + 1 if sample and not sample.endswith(b"\n") else lines
+    return round(lines * size / len(sample))
+
+
+def sample_file(filename: str, sample_size: int = SAMPLE_SIZE) -> Probe:
+    """Reads the beginning of the file once, and works the probe out from it.
+
+    Without a BOM, the rest of the file is decoded as UTF-8 too, and chardet only runs if that fails.
+    """
+    stat = os.stat(filename)
+    with open(filename, "rb") as f:
+        sample = f.read(sample_size)
+        encoding = next((name for bom, name in BOMS if sample.startswith(bom)), None)
+        bom = encoding is not None
+        if encoding is None:
+            encoding = scan_utf8(f, sample)
+        if encoding is None:
+            f.seek(len(sample))
+            encoding = detect_encoding(f, sample)
+    kind = filetype.guess(sample)
+    return Probe(
+        encoding=encoding,
+        bom=bom,
+        mime=kind.mime if kind else None,
+        estimated_lines=estimate_lines(sample, stat.st_size),
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+    )
+
+
+# The probes of this process by path. The forked import processes inherit them.
+cache: Dict[str, Probe] = {}
+
+
+def remember(filename: str, probe: Probe):
+    if filename not in cache and len(cache) >= CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+    cache[filename] = probe
+
+
+def probe_file(filename: str) -> Probe:
+    """Returns the probe of the file, sampling it only if it is not cached or has changed since."""
+    stat = os.stat(filename)
+    probe = cache.get(filename)
+    if probe is None or (probe.size, probe.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+        probe = sample_file(filename)
+        remember(filename, probe)
+    return probe
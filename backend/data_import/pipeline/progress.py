@@ -0,0 +1,112 @@
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .probes import probe_file
+from .readers import FILE_NAME_COLUMN, FileName
+
+# The Celery state of an import task that is running, with the progress as its meta.
+PROGRESS = "PROGRESS"
+
+logger = logging.getLogger(__name__)
+
+
+class Progress:
+    """How far an import has got. It is reported after each committed batch.
+
+    The bytes read are estimated from the rows parsed and the number of lines of each file
+    estimated by its probe, because the parsers don't tell where they are in the file.
+    The rows skipped on a resumed import are counted as parsed, but not in the rate.
+    """
+
+    def __init__(
+        self,
+        filenames: List[FileName],
+        skip: Optional[Dict[str, int]] = None,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        task_id: Optional[str] = None,
+    ):
+        self.names = [filename.generated_name for filename in filenames]
+        self.sizes = {filename.generated_name: os.path.getsize(filename.full_path) for filename in filenames}
+        self.lines = {
+            filename.generated_name: max(probe_file(filename.full_path).estimated_lines, 1) for filename in filenames
+        }
+        self.rows = {name: (skip or {}).get(name, 0) for name in self.names}
+        self.examples = 0
+        self.labels = 0
+        self.callback = callback
+        self.task_id = task_id
+        self.finished = False
+        self.started = time.monotonic()
+        self.resumed_rows = self.rows_parsed
+        self.resumed_bytes = self.bytes_read
+
+    @property
+    def rows_parsed(self) -> int:
+        return sum(self.rows.values())
+
+    @property
+    def bytes_total(self) -> int:
+        return sum(self.sizes.values())
+
+    @property
+    def bytes_read(self) -> int:
+        if self.finished:
+            return self.bytes_total
+        # The files are read in order, so the ones before the last file with rows have been read through.
+        current = max((i for i, name in enumerate(self.names) if self.rows[name]), default=0)
+        total = 0
+        for i, name in enumerate(self.names):
+            size = self.sizes[name]
+            total += size if i < current else min(size, size * self.rows[name] // self.lines[name])
+        return total
+
+    def update(self, batch: pd.DataFrame, examples: int, labels: int):
+        """Count the batch in. `examples` and `labels` are the numbers inserted so far."""
+        for name, count in batch[FILE_NAME_COLUMN].value_counts().items():
+            self.rows[name] += int(count)
+        self.examples = examples
+        self.labels = labels
+        self.report()
+
+    def add(self, name: str, progress: Dict[str, Any]):
+        """Count in the finished import of a single file, e.g. done by another process."""
+        self.rows[name] = progress["rows_parsed"]
+        self.examples += progress["examples_inserted"]
+        self.labels += progress["labels_inserted"]
+        self.report()
+
+    def finish(self):
+        self.finished = True
+        self.report()
+
+    def dict(self) -> Dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        bytes_read = self.bytes_read
+        bytes_this_run = bytes_read - self.resumed_bytes
+        eta = None
+        if self.finished:
+            eta = 0.0
+        elif bytes_this_run > 0:
+            eta = round(elapsed * (self.bytes_total - bytes_read) / bytes_this_run, 1)
+        return {
+            "bytes_read": bytes_read,
+            "bytes_total": self.bytes_total,
+            "rows_parsed": self.rows_parsed,
+            "examples_inserted": self.examples,
+            "labels_inserted": self.labels,
+            "rows_per_second": round((self.rows_parsed - self.resumed_rows) / elapsed, 1) if elapsed > 0 else 0.0,
+            "elapsed_seconds": round(elapsed, 1),
+            "eta_seconds": eta,
+        }
+
+    def report(self):
+        progress = self.dict()
+        # One key=value pair per counter, so that the lines can be parsed to plan the capacity of the workers.
+        fields = {"task_id": self.task_id, **progress}
+        logger.info("import_progress %s", " ".join(f"{key}={value}" for key, value in fields.items()))
+        if self.callback:
+            self.callback(progress)
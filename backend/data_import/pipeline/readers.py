@@ -1,8 +1,9 @@
 import abc
 import collections.abc
 import dataclasses
+import itertools
 import uuid
-from typing import Any, Dict, Iterator, List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
@@ -38,14 +39,68 @@ class BaseReader(collections.abc.Iterable):
         raise NotImplementedError("Please implement this method in the subclass.")
 
 
+@dataclasses.dataclass(frozen=True)
+class Position:
+    """A place in a file to resume parsing it from.
+
+    Attributes:
+        offset: The byte offset of a line boundary that the parser can seek to, or 0 for the start of the file.
+        line_num: The number of lines, or rows for CSV, before `offset`, so that the numbering goes on from it.
+        records: The number of records after `offset` that were parsed too, and are skipped.
+    """
+
+    offset: int = 0
+    line_num: int = 0
+    records: int = 0
+
+    def advance(self, offset: Optional[int], line_num: int) -> "Position":
+        """Returns the position after one more record, which ends on line `line_num` at `offset` if it's known."""
+        if offset is None:
+            return dataclasses.replace(self, records=self.records + 1)
+        return Position(offset, line_num)
+
+
 class Parser(abc.ABC):
     """The abstract file parser."""
 
+    # The position after the last record returned by `parse_from`.
+    position = Position()
+
     @abc.abstractmethod
     def parse(self, filename: str) -> Iterator[Dict[Any, Any]]:
         """Parses the file and returns the dictionary."""
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def parse_from(self, filename: str, start: Position) -> Iterator[Dict[Any, Any]]:
+        """Parses the file from `start`, and keeps the position after each record in `position`.
+
+        This parses the file from its start and skips the records before `start`.
+        The parsers that can seek to a byte offset override it.
+        """
+        rows = itertools.islice(self.parse(filename), start.records, None)
+        for records, row in enumerate(rows, start=start.records + 1):
+            self.position = Position(records=records)
+            yield row
+
+    def track(
+        self, rows: Iterator[Tuple[Dict[Any, Any], Optional[int], int]], start: Position
+    ) -> Iterator[Dict[Any, Any]]:
+        """Keeps the position after each row in `position`, and skips the rows before `start`.
+
+        Args:
+            rows: the rows parsed from the offset of `start`, with the byte offset after each one,
+                or None if it doesn't end on a line boundary, and its line number.
+            start: the position the rows are parsed from.
+        """
+        self.position = Position(start.offset, start.line_num)
+        skipped = 0
+        for row, offset, line_num in rows:
+            self.position = self.position.advance(offset, line_num)
+            if skipped < start.records:
+                skipped += 1
+                continue
+            yield row
+
     @property
     def errors(self) -> List[FileParseException]:
         """Returns parsing errors."""
@@ -63,11 +118,23 @@ class Reader(BaseReader):
     def __init__(self, filenames: List[FileName], parser: Parser):
         self.filenames = filenames
         self.parser = parser
+        # The position after the last record returned from each file.
+        self.positions: Dict[str, Position] = {}
 
     def __iter__(self) -> Iterator[Dict[Any, Any]]:
+        return self.iter_records()
+
+    def iter_records(self, start: Optional[Dict[str, Position]] = None) -> Iterator[Dict[Any, Any]]:
+        """Iterate the records of the files.
+
+        `start` maps a generated file name to the position to parse it from,
+        e.g. the one after the records imported before a retry.
+        """
+        start = start or {}
         for filename in self.filenames:
-            rows = self.parser.parse(filename.full_path)
-            for row in rows:
+            name = filename.generated_name
+            for row in self.parser.parse_from(filename.full_path, start.get(name, Position())):
+                self.positions[name] = self.parser.position
                 yield {
                     UUID_COLUMN: uuid.uuid4(),
                     FILE_NAME_COLUMN: filename.generated_name,
@@ -75,9 +142,9 @@ class Reader(BaseReader):
                     **row,
                 }
 
-    def batch(self, batch_size: int) -> Iterator[pd.DataFrame]:
+    def batch(self, batch_size: int, start: Optional[Dict[str, Position]] = None) -> Iterator[pd.DataFrame]:
         batch = []
-        for record in self:
+        for record in self.iter_records(start):
             batch.append(record)
             if len(batch) == batch_size:
                 yield pd.DataFrame(batch)
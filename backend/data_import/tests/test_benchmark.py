@@ -0,0 +1,150 @@
+import itertools
+import logging
+import os
+import time
+import unittest
+import uuid
+
+import pandas as pd
+from django.test import TestCase
+
+from data_import.pipeline.data import TextData
+from data_import.pipeline.label import SpanLabel
+from data_import.pipeline.label_types import LabelTypes
+from data_import.pipeline.labels import Spans
+from data_import.pipeline.loaders import BulkCreateLoader, CopyLoader
+from data_import.pipeline.makers import (
+    ExampleMaker,
+    LabelMaker,
+    VectorizedExampleMaker,
+    VectorizedLabelMaker,
+)
+from data_import.pipeline.readers import (
+    FILE_NAME_COLUMN,
+    LINE_NUMBER_COLUMN,
+    UPLOAD_NAME_COLUMN,
+    UUID_COLUMN,
+)
+from examples.models import Example
+from label_types.models import SpanType
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+# The benchmarks run only if IMPORT_BENCHMARK_ROWS is set, e.g. to 100000, to measure the throughput.
+ROWS = int(os.environ.get("IMPORT_BENCHMARK_ROWS", 0))
+skip_unless_benchmark = unittest.skipUnless(ROWS, "Set IMPORT_BENCHMARK_ROWS to run the benchmarks.")
+
+logger = logging.getLogger(__name__)
+
+
+def rows_per_second(make, df: pd.DataFrame) -> float:
+    start = time.perf_counter()
+    make(df)
+    return len(df) / (time.perf_counter() - start)
+
+
+def report(name: str, baseline: float, optimized: float):
+    # A warning, because the test settings configure no handler and only warnings reach the console then.
+    logger.warning(f"{name}: {baseline:,.0f} rows/s -> {optimized:,.0f} rows/s ({optimized / baseline:.1f}x)")
+
+
+@skip_unless_benchmark
+class TestImportBenchmark(TestCase):
+    """Compare the throughput of the per-record and the vectorized makers on the same batch."""
+
+    def setUp(self):
+        self.project = prepare_project()
+        self.df = pd.DataFrame(
+            [
+                {
+                    LINE_NUMBER_COLUMN: i,
+                    UUID_COLUMN: uuid.uuid4(),
+                    FILE_NAME_COLUMN: "file",
+                    UPLOAD_NAME_COLUMN: "upload",
+                    "text": f"text{i}",
+                    "label": [[0, 1, "A"], [2, 3, "B"]],
+                    "source": "benchmark",
+                }
+                for i in range(ROWS)
+            ]
+        )
+
+    def test_examples(self):
+        maker = ExampleMaker(self.project.item, TextData, exclude_columns=["label"])
+        vectorized_maker = VectorizedExampleMaker(self.project.item, TextData, exclude_columns=["label"])
+        baseline = rows_per_second(maker.make, self.df)
+        vectorized = rows_per_second(vectorized_maker.make, self.df)
+        report("ExampleMaker", baseline, vectorized)
+        self.assertEqual(len(vectorized_maker.make(self.df)), ROWS)
+
+    def test_spans(self):
+        maker = LabelMaker(column="label", label_class=SpanLabel)
+        vectorized_maker = VectorizedLabelMaker(column="label", label_class=SpanLabel)
+        baseline = rows_per_second(maker.make, self.df)
+        vectorized = rows_per_second(vectorized_maker.make, self.df)
+        report("LabelMaker", baseline, vectorized)
+        self.assertEqual(len(vectorized_maker.make(self.df)), ROWS * 2)
+
+
+@skip_unless_benchmark
+class TestLoaderBenchmark(TestCase):
+    """Compare the throughput of `bulk_create` and COPY on the same examples."""
+
+    def setUp(self):
+        self.project = prepare_project()
+
+    def make_examples(self):
+        return [Example(project=self.project.item, text=f"text{i}", meta={"source": "benchmark"}) for i in range(ROWS)]
+
+    def load(self, loader) -> float:
+        examples = self.make_examples()
+        start = time.perf_counter()
+        loader.save(Example, examples)
+        return len(examples) / (time.perf_counter() - start)
+
+    def test_examples(self):
+        baseline = self.load(BulkCreateLoader())
+        optimized = self.load(CopyLoader())
+        report("Loader", baseline, optimized)
+        self.assertEqual(Example.objects.count(), ROWS * 2)
+
+
+def clean_by_groups(labels):
+    """Drop the overlapping spans example by example, as Spans.clean did, after grouping the examples together."""
+    spans = []
+    labels = sorted(labels, key=lambda label: str(label.example_uuid))
+    for _, group in itertools.groupby(labels, lambda label: label.example_uuid):
+        last_offset = -1
+        for label in sorted(group, key=lambda label: (label.start_offset, label.end_offset)):
+            if label.start_offset >= last_offset:
+                last_offset = label.end_offset
+                spans.append(label)
+    return spans
+
+
+@skip_unless_benchmark
+class TestSpanCleanBenchmark(TestCase):
+    """Compare dropping the overlapping spans by groups and by the sorted sweep, on ROWS * 10 spans.
+
+    Set IMPORT_BENCHMARK_ROWS=100000 for 1M spans.
+    """
+
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING, allow_overlapping=False)
+        example_uuids = [uuid.uuid4() for _ in range(ROWS)]
+        self.labels = [
+            SpanLabel.model_construct(example_uuid=example_uuid, label="A", start_offset=start, end_offset=start + 3)
+            for start in range(0, 20, 2)
+            for example_uuid in example_uuids
+        ]
+
+    def test_spans(self):
+        def sweep(labels):
+            spans = Spans(labels, LabelTypes(SpanType))
+            spans.clean(self.project.item)
+            return spans.labels
+
+        baseline = rows_per_second(clean_by_groups, self.labels)
+        optimized = rows_per_second(sweep, self.labels)
+        report("Spans.clean", baseline, optimized)
+        self.assertEqual(len(sweep(self.labels)), len(clean_by_groups(self.labels)))
@@ -0,0 +1,96 @@
+import pathlib
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from data_import.datasets import TextClassificationDataset, load_dataset
+from data_import.models import ImportCheckpoint
+from data_import.pipeline.catalog import JSONL
+from data_import.pipeline.checkpoints import Checkpoints
+from data_import.pipeline.readers import FileName
+from examples.models import Example
+from labels.models import Category
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestResumeImport(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.user = self.project.admin
+        path = pathlib.Path(__file__).parent / "data" / "text_classification" / "example.jsonl"
+        self.filenames = [FileName(full_path=str(path), generated_name="example.jsonl", upload_name="example.jsonl")]
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir)
+
+    def import_dataset(self, checkpoint_id="task"):
+        dataset = load_dataset(
+            ProjectType.DOCUMENT_CLASSIFICATION, JSONL, self.filenames, self.project.item, column_label="labels"
+        )
+        checkpoints = Checkpoints(checkpoint_id)
+        dataset.save(self.user, batch_size=1, checkpoints=checkpoints)
+        return checkpoints.merge_errors([filename.generated_name for filename in self.filenames], dataset.errors)
+
+    def fail_at_second_batch(self):
+        save_batch = TextClassificationDataset.save_batch
+        calls = []
+
+        def side_effect(dataset, user, records):
+            calls.append(records)
+            if len(calls) == 2:
+                raise RuntimeError("The worker died.")
+            save_batch(dataset, user, records)
+
+        return patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=side_effect)
+
+    def test_checkpoint_only_committed_batches(self):
+        with self.fail_at_second_batch(), self.assertRaises(RuntimeError):
+            self.import_dataset()
+        checkpoint = ImportCheckpoint.objects.get(task_id="task", filename="example.jsonl")
+        self.assertEqual((checkpoint.records, checkpoint.batches), (1, 1))
+        self.assertEqual(Example.objects.count(), 1)
+
+    def test_resume_without_duplicates(self):
+        with self.fail_at_second_batch(), self.assertRaises(RuntimeError):
+            self.import_dataset()
+        self.import_dataset()
+        self.assertEqual(sorted(Example.objects.values_list("text", flat=True)), ["exampleA", "exampleB", "exampleC"])
+        self.assertEqual(Category.objects.count(), 3)
+        self.assertEqual(ImportCheckpoint.objects.get(task_id="task").records, 3)
+
+    def test_resume_from_saved_offset(self):
+        with self.fail_at_second_batch(), self.assertRaises(RuntimeError):
+            self.import_dataset()
+        checkpoint = ImportCheckpoint.objects.get(task_id="task")
+        self.assertEqual((checkpoint.line_num, checkpoint.records_after_offset), (1, 0))
+        with open(self.filenames[0].full_path, "rb") as f:
+            self.assertEqual(checkpoint.offset, len(f.readline()))
+
+    def test_resume_keeps_earlier_errors(self):
+        path = pathlib.Path(self.test_dir) / "broken.jsonl"
+        lines = ['{"text": "exampleA", "labels": ["positive"]}', "{broken", '{"text": "exampleB", "labels": []}']
+        path.write_text("\n".join(lines + ['{"text": "exampleC", "labels": []}']))
+        self.filenames = [FileName(full_path=str(path), generated_name="broken.jsonl", upload_name="broken.jsonl")]
+        save_batch = TextClassificationDataset.save_batch
+        calls = []
+
+        def side_effect(dataset, user, records):
+            calls.append(records)
+            if len(calls) == 3:
+                raise RuntimeError("The worker died.")
+            save_batch(dataset, user, records)
+
+        with patch.object(TextClassificationDataset, "save_batch", autospec=True, side_effect=side_effect):
+            with self.assertRaises(RuntimeError):
+                self.import_dataset()
+        errors = self.import_dataset()
+        self.assertEqual([error["line"] for error in errors], [2])
+        self.assertEqual(Example.objects.count(), 3)
+
+    def test_import_from_start_without_checkpoint_id(self):
+        self.import_dataset(checkpoint_id=None)
+        self.import_dataset(checkpoint_id=None)
+        self.assertEqual(Example.objects.count(), 6)
+        self.assertFalse(ImportCheckpoint.objects.exists())
@@ -1,5 +1,7 @@
 import uuid
+from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase
 
 from data_import.pipeline.examples import Examples
@@ -23,3 +25,16 @@ class TestExamples(TestCase):
         self.examples.save()
         example = self.examples[self.example_uuid]
         self.assertEqual(example.uuid, self.example_uuid)
+
+    def test_save_with_one_query_per_batch(self):
+        examples = Examples([Example(uuid=uuid.uuid4(), text=str(i), project=self.project.item) for i in range(10)])
+        with self.assertNumQueries(1):
+            examples.save()
+        for example in examples.examples:
+            self.assertEqual(examples[example.uuid].id, Example.objects.get(uuid=example.uuid).id)
+
+    def test_save_without_returning_ids(self):
+        with patch.object(connection.features, "can_return_rows_from_bulk_insert", False):
+            with self.assertNumQueries(2):
+                self.examples.save()
+        self.assertEqual(self.examples[self.example_uuid].id, Example.objects.get(uuid=self.example_uuid).id)
@@ -1,8 +1,8 @@
 from django.test import TestCase
 from model_mommy import mommy
 
-from data_import.pipeline.label_types import LabelTypes
-from label_types.models import CategoryType
+from data_import.pipeline.label_types import LabelTypes, create_label_types
+from label_types.models import CategoryType, SpanType
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -27,3 +27,45 @@ class TestCategoryLabel(TestCase):
         label_types.update(self.project.item)
         category_type = label_types["A"]
         self.assertEqual(category_type.text, "A")
+
+    def test_update_selects_only_new_types(self):
+        label_types = LabelTypes(CategoryType)
+        label_types.save([CategoryType(text="A", project=self.project.item)])
+        label_types.update(self.project.item)
+        with self.assertNumQueries(0):
+            label_types.save([CategoryType(text="A", project=self.project.item)])
+            label_types.update(self.project.item)
+        with self.assertNumQueries(2):
+            label_types.save([CategoryType(text=text, project=self.project.item) for text in ["A", "B", "B"]])
+            label_types.update(self.project.item)
+        self.assertEqual(label_types["B"].text, "B")
+        self.assertEqual(CategoryType.objects.count(), 2)
+
+    def test_existing_type_is_shared(self):
+        existing = mommy.make("CategoryType", text="A", project=self.project.item)
+        label_types = LabelTypes(CategoryType)
+        label_types.save([CategoryType(text="A", project=self.project.item)])
+        label_types.update(self.project.item)
+        self.assertEqual(label_types["A"].id, existing.id)
+
+    def test_load_caches_existing_types(self):
+        existing = mommy.make("CategoryType", text="A", project=self.project.item)
+        label_types = LabelTypes(CategoryType)
+        label_types.load(self.project.item)
+        with self.assertNumQueries(0):
+            label_types.save([CategoryType(text="A", project=self.project.item)])
+            label_types.update(self.project.item)
+        self.assertEqual(label_types["A"].id, existing.id)
+
+    def test_create_label_types_once_per_model_and_text(self):
+        mommy.make("CategoryType", text="A", project=self.project.item)
+        create_label_types(
+            [
+                CategoryType(text="A", project=self.project.item),
+                CategoryType(text="B", project=self.project.item),
+                CategoryType(text="B", project=self.project.item),
+                SpanType(text="B", project=self.project.item),
+            ]
+        )
+        self.assertCountEqual(CategoryType.objects.values_list("text", flat=True), ["A", "B"])
+        self.assertCountEqual(SpanType.objects.values_list("text", flat=True), ["B"])
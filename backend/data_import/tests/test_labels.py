@@ -46,6 +46,20 @@ class TestCategories(TestCase):
         self.categories.clean(self.project.item)
         self.assertEqual(len(self.categories), 1)
 
+    def test_clean_with_exclusive_labels_of_non_adjacent_examples(self):
+        self.project.item.single_class_classification = True
+        self.project.item.save()
+        example_uuid1 = uuid.uuid4()
+        example_uuid2 = uuid.uuid4()
+        labels = [
+            CategoryLabel(example_uuid=example_uuid1, label="A"),
+            CategoryLabel(example_uuid=example_uuid2, label="B"),
+            CategoryLabel(example_uuid=example_uuid1, label="C"),
+        ]
+        categories = Categories(labels, self.types)
+        categories.clean(self.project.item)
+        self.assertEqual([label.label for label in categories.labels], ["A", "B"])
+
     def test_save(self):
         self.categories.save_types(self.project.item)
         self.categories.save(self.user, self.examples)
@@ -100,6 +114,20 @@ class TestSpans(TestCase):
         spans.clean(self.project.item)
         self.assertEqual(len(spans), 2)
 
+    def test_clean_with_non_adjacent_spans_of_an_example(self):
+        self.disable_overlapping()
+        example_uuid1 = uuid.uuid4()
+        example_uuid2 = uuid.uuid4()
+        labels = [
+            SpanLabel(example_uuid=example_uuid1, label="A", start_offset=5, end_offset=8),
+            SpanLabel(example_uuid=example_uuid2, label="B", start_offset=0, end_offset=3),
+            SpanLabel(example_uuid=example_uuid1, label="C", start_offset=0, end_offset=6),
+            SpanLabel(example_uuid=example_uuid1, label="D", start_offset=0, end_offset=2),
+        ]
+        spans = Spans(labels, self.types)
+        spans.clean(self.project.item)
+        self.assertEqual([label.label for label in spans.labels], ["D", "A", "B"])
+
     def test_save(self):
         self.spans.save_types(self.project.item)
         self.spans.save(self.user, self.examples)
@@ -109,6 +137,29 @@ class TestSpans(TestCase):
         self.spans.save_types(self.project.item)
         self.assertEqual(SpanType.objects.count(), 2)
 
+    def test_id_to_span_without_query(self):
+        self.spans.save_types(self.project.item)
+        self.spans.save(self.user, self.examples)
+        with self.assertNumQueries(0):
+            id_to_span = self.spans.id_to_span
+        self.assertEqual(len(id_to_span), 1)
+        self.assertEqual(list(id_to_span.values())[0].pk, Span.objects.last().pk)
+
+    def test_id_to_span_selects_spans_without_primary_key(self):
+        self.spans.save_types(self.project.item)
+        self.spans.save(self.user, self.examples)
+        for span in self.spans.saved:
+            span.pk = None
+        with self.assertNumQueries(1):
+            id_to_span = self.spans.id_to_span
+        self.assertIsNotNone(list(id_to_span.values())[0].pk)
+
+    def test_id_to_span_leaves_out_unsaved_spans(self):
+        self.spans.save_types(self.project.item)
+        self.examples.__contains__.return_value = False
+        self.spans.save(self.user, self.examples)
+        self.assertEqual(self.spans.id_to_span, {})
+
 
 class TestTexts(TestCase):
     def setUp(self):
@@ -0,0 +1,68 @@
+import uuid
+from unittest.mock import patch
+
+from django.db import connection
+from django.db.models import JSONField
+from django.test import TestCase
+from psycopg2.extras import Json
+
+from data_import.pipeline.loaders import (
+    BULK_CREATE,
+    COPY,
+    BulkCreateLoader,
+    CopyLoader,
+    create_loader,
+)
+from examples.models import Example
+from label_types.models import SpanType
+from labels.models import Span
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestCopyLoader(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.SEQUENCE_LABELING)
+        self.loader = CopyLoader()
+
+    def test_save_examples(self):
+        texts = ["A", "tab\there", "new\nline", "back\\slash", "\\N", ""]
+        examples = [
+            Example(uuid=uuid.uuid4(), project=self.project.item, text=text, meta={"text": text}) for text in texts
+        ]
+        saved = self.loader.save(Example, examples)
+        self.assertEqual(len(saved), len(texts))
+        for example in saved:
+            loaded = Example.objects.get(pk=example.pk)
+            self.assertEqual(loaded.uuid, example.uuid)
+            self.assertEqual(loaded.text, example.text)
+            self.assertEqual(loaded.meta, example.meta)
+            self.assertIsNotNone(loaded.created_at)
+
+    def test_save_non_ascii_meta(self):
+        meta = {"name": "café 東京", "nested": {"quote": "'", "tab": "\t", "list": [1, None]}}
+        # From Django 4.2 on, a JSONField is prepared as an adapter of psycopg2, which must not be written as is.
+        with patch.object(JSONField, "get_db_prep_save", side_effect=lambda value, connection: Json(value)):
+            example = self.loader.save(Example, [Example(project=self.project.item, text="example", meta=meta)])[0]
+        self.assertEqual(Example.objects.get(pk=example.pk).meta, meta)
+
+    def test_save_labels_referring_to_saved_rows(self):
+        example = self.loader.save(Example, [Example(project=self.project.item, text="example")])[0]
+        label = SpanType.objects.create(project=self.project.item, text="A")
+        span = Span(example=example, user=self.project.admin, label=label, start_offset=0, end_offset=1)
+        self.loader.save(Span, [span])
+        self.assertEqual(Span.objects.get(pk=span.pk).example, example)
+
+    def test_save_nothing(self):
+        self.assertEqual(self.loader.save(Example, []), [])
+
+
+class TestCreateLoader(TestCase):
+    def test_copy_on_postgresql(self):
+        with patch.object(connection, "vendor", "postgresql"):
+            self.assertIsInstance(create_loader(COPY), CopyLoader)
+
+    def test_fall_back_to_bulk_create(self):
+        with patch.object(connection, "vendor", "sqlite"):
+            self.assertIsInstance(create_loader(COPY), BulkCreateLoader)
+        self.assertIsInstance(create_loader(BULK_CREATE), BulkCreateLoader)
@@ -4,8 +4,13 @@ import pandas as pd
 from django.test import TestCase
 
 from data_import.pipeline.data import TextData
-from data_import.pipeline.label import CategoryLabel
-from data_import.pipeline.makers import ExampleMaker, LabelMaker
+from data_import.pipeline.label import CategoryLabel, RelationLabel, SpanLabel
+from data_import.pipeline.makers import (
+    ExampleMaker,
+    LabelMaker,
+    VectorizedExampleMaker,
+    VectorizedLabelMaker,
+)
 from data_import.pipeline.readers import (
     FILE_NAME_COLUMN,
     LINE_NUMBER_COLUMN,
@@ -50,7 +55,31 @@ class TestExamplesMaker(TestCase):
         self.assertEqual(len(self.maker.errors), 1)
 
 
+class TestVectorizedExamplesMaker(TestExamplesMaker):
+    def setUp(self):
+        super().setUp()
+        self.maker = VectorizedExampleMaker(self.project.item, TextData, self.text_column, [self.label_column])
+
+    def test_make_same_examples_as_example_maker(self):
+        records = [
+            {**self.record, LINE_NUMBER_COLUMN: 1, UUID_COLUMN: uuid.uuid4(), "meta": "a"},
+            {**self.record, LINE_NUMBER_COLUMN: 2, UUID_COLUMN: uuid.uuid4(), self.text_column: 2},
+            {**self.record, LINE_NUMBER_COLUMN: 3, UUID_COLUMN: uuid.uuid4(), self.text_column: None},
+        ]
+        df = pd.DataFrame(records)
+        expected_maker = ExampleMaker(self.project.item, TextData, self.text_column, [self.label_column])
+        expected = expected_maker.make(df)
+        examples = self.maker.make(df)
+        self.assertEqual(
+            [(e.uuid, e.filename, e.upload_name, e.text, e.meta) for e in examples],
+            [(e.uuid, e.filename, e.upload_name, e.text, e.meta) for e in expected],
+        )
+        self.assertEqual([e.dict() for e in self.maker.errors], [e.dict() for e in expected_maker.errors])
+
+
 class TestLabelFormatter(TestCase):
+    maker_class = LabelMaker
+
     def setUp(self):
         self.label_column = "label"
         self.label_class = CategoryLabel
@@ -62,7 +91,7 @@ class TestLabelFormatter(TestCase):
         )
 
     def test_make(self):
-        label_maker = LabelMaker(column=self.label_column, label_class=self.label_class)
+        label_maker = self.maker_class(column=self.label_column, label_class=self.label_class)
         labels = label_maker.make(self.df)
         self.assertEqual(len(labels), 3)
         with self.subTest():
@@ -70,12 +99,12 @@ class TestLabelFormatter(TestCase):
                 self.assertEqual(getattr(label, "label"), expected)
 
     def test_format_without_specified_column(self):
-        label_maker = LabelMaker(column="invalid_column", label_class=self.label_class)
+        label_maker = self.maker_class(column="invalid_column", label_class=self.label_class)
         with self.assertRaises(KeyError):
             label_maker.make(self.df)
 
     def test_format_with_partially_correct_column(self):
-        label_maker = LabelMaker(column=self.label_column, label_class=self.label_class)
+        label_maker = self.maker_class(column=self.label_column, label_class=self.label_class)
         df = pd.DataFrame(
             [
                 {LINE_NUMBER_COLUMN: 1, UUID_COLUMN: uuid.uuid4(), self.label_column: ["A"]},
@@ -86,3 +115,35 @@ class TestLabelFormatter(TestCase):
         )
         labels = label_maker.make(df)
         self.assertEqual(len(labels), 1)
+
+
+class TestVectorizedLabelMaker(TestLabelFormatter):
+    maker_class = VectorizedLabelMaker
+
+    def assert_same_labels(self, label_class, values):
+        df = pd.DataFrame([{UUID_COLUMN: uuid.uuid4(), self.label_column: value} for value in values])
+        expected = LabelMaker(column=self.label_column, label_class=label_class).make(df)
+        labels = VectorizedLabelMaker(column=self.label_column, label_class=label_class).make(df)
+        exclude = {"uuid"}
+        self.assertEqual(
+            [label.model_dump(exclude=exclude) for label in labels],
+            [label.model_dump(exclude=exclude) for label in expected],
+        )
+
+    def test_make_same_categories(self):
+        self.assert_same_labels(CategoryLabel, [["A"], ["B", "C"], [""], [1], "D", [None]])
+
+    def test_make_same_spans(self):
+        spans = [
+            [[0, 1, "A"], (1, 2, "B")],
+            [{"id": 3, "start_offset": 0, "end_offset": 1, "label": "C"}],
+            [[1, 0, "D"], [-1, 1, "E"], [0, 1.5, "F"], [0, 1, ""], [0, "1", "G"], [0, 1], "H"],
+        ]
+        self.assert_same_labels(SpanLabel, spans)
+
+    def test_make_same_relations(self):
+        relations = [
+            [{"id": 0, "from_id": 0, "to_id": 1, "type": "A"}, {"from_id": 1, "to_id": 2, "type": "B"}],
+            [{"from_id": 0, "to_id": 1, "type": ""}, {"from_id": 0, "type": "C"}],
+        ]
+        self.assert_same_labels(RelationLabel, relations)
@@ -3,9 +3,13 @@ import os
 import shutil
 import tempfile
 import unittest
+from unittest.mock import patch
 
-from data_import.pipeline import parsers
-from data_import.pipeline.readers import LINE_NUMBER_COLUMN
+import openpyxl
+
+from data_import.pipeline import parallel, parsers
+from data_import.pipeline.readers import LINE_NUMBER_COLUMN, Position
+from data_import.tests.utils import run_in_daemonic_process
 
 
 class TestParser(unittest.TestCase):
@@ -93,6 +97,164 @@ class TestJSONLParser(TestParser):
         self.assert_record(content, parser, expected)
 
 
+class TestParallelParsing(TestParser):
+    def setUp(self):
+        super().setUp()
+        # Split even the small test files into many ranges.
+        patcher = patch.object(parallel, "CHUNK_SIZE", 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def parse(self, parser_class, content, encoding="utf-8", **kwargs):
+        with open(self.test_file, "w", encoding=encoding) as f:
+            f.write(content)
+        sequential = parser_class(parse_workers=1, **kwargs)
+        in_parallel = parser_class(parse_workers=2, **kwargs)
+        expected = list(sequential.parse(self.test_file))
+        with patch.object(parallel, "map_ranges", wraps=parallel.map_ranges) as map_ranges:
+            records = list(in_parallel.parse(self.test_file))
+        self.assertEqual(records, expected)
+        return in_parallel, map_ranges, sequential
+
+    def test_jsonl_keeps_line_numbers_and_order(self):
+        lines = [json.dumps({"text": f"line{i}", "label": ["あ"]}) for i in range(50)]
+        lines[10] = "{broken"
+        lines[20] = ""
+        parser, map_ranges, sequential = self.parse(parsers.JSONLParser, "\n".join(lines) + "\n")
+        map_ranges.assert_called_once()
+        self.assertEqual([e.dict() for e in parser.errors], [e.dict() for e in sequential.errors])
+        self.assertEqual([e.dict()["line"] for e in parser.errors], [11, 21])
+
+    def test_jsonl_in_daemonic_process(self):
+        lines = [json.dumps({"text": f"line{i}"}) for i in range(50)]
+        self.create_file("\n".join(lines))
+        parser = parsers.JSONLParser(parse_workers=2)
+        records = run_in_daemonic_process(lambda: list(parser.parse(self.test_file)))
+        self.assertEqual([record["text"] for record in records], [f"line{i}" for i in range(50)])
+
+    def test_jsonl_with_bom(self):
+        content = "\n".join(json.dumps({"text": f"line{i}"}) for i in range(10))
+        _, map_ranges, _ = self.parse(parsers.JSONLParser, content, encoding="utf-8-sig")
+        map_ranges.assert_called_once()
+
+    def test_csv_with_quoted_newlines(self):
+        rows = [f'{i},"multi\nline ""quoted"" text {i}"' for i in range(30)]
+        content = "label,text\n" + "\r\n".join(rows)
+        _, map_ranges, _ = self.parse(parsers.CSVParser, content, delimiter=",")
+        map_ranges.assert_called_once()
+
+    def test_utf16_is_parsed_sequentially(self):
+        content = "\n".join(json.dumps({"text": f"line{i}"}) for i in range(10))
+        _, map_ranges, _ = self.parse(parsers.JSONLParser, content, encoding="utf-16")
+        map_ranges.assert_not_called()
+
+
+class TestParseFrom(TestParser):
+    def setUp(self):
+        super().setUp()
+        patcher = patch.object(parallel, "CHUNK_SIZE", 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assert_resumes(self, parser_class, content, **kwargs):
+        with open(self.test_file, "w", newline="") as f:
+            f.write(content)
+        parser = parser_class(**kwargs)
+        records, positions = [], []
+        for record in parser.parse_from(self.test_file, Position()):
+            records.append(record)
+            positions.append(parser.position)
+        self.assertTrue(any(position.offset for position in positions))
+        for i, position in enumerate(positions):
+            resumed = parser_class(**kwargs)
+            self.assertEqual(list(resumed.parse_from(self.test_file, position)), records[i + 1 :])
+
+    def test_jsonl(self):
+        lines = [json.dumps({"text": f"line{i}"}) for i in range(20)]
+        lines[5] = "{broken"
+        self.assert_resumes(parsers.JSONLParser, "\r\n".join(lines))
+
+    def test_jsonl_in_parallel(self):
+        lines = [json.dumps({"text": f"line{i}"}) for i in range(20)]
+        self.assert_resumes(parsers.JSONLParser, "\n".join(lines), parse_workers=2)
+
+    def test_csv(self):
+        rows = [f'{i},"multi\nline text {i}"' for i in range(10)]
+        self.assert_resumes(parsers.CSVParser, "label,text\n" + "\n".join(rows), delimiter=",")
+
+    def test_csv_in_parallel(self):
+        rows = [f'{i},"multi\nline text {i}"' for i in range(30)]
+        self.assert_resumes(parsers.CSVParser, "label,text\n" + "\n".join(rows), delimiter=",", parse_workers=2)
+
+    def test_lines(self):
+        self.assert_resumes(parsers.LineParser, "a\nb\r\nc\n\nd")
+
+    def test_skips_errors_before_position(self):
+        lines = [json.dumps({"text": f"line{i}"}) for i in range(10)]
+        lines[2] = "{broken"
+        self.create_file("\n".join(lines))
+        parser = parsers.JSONLParser()
+        it = parser.parse_from(self.test_file, Position())
+        for _ in range(5):
+            next(it)
+        resumed = parsers.JSONLParser()
+        records = list(resumed.parse_from(self.test_file, parser.position))
+        self.assertEqual([record[LINE_NUMBER_COLUMN] for record in records], [7, 8, 9, 10])
+        self.assertEqual(resumed.errors, [])
+
+
+class TestExcelParser(TestParser):
+    def create_workbook(self, sheets):
+        self.test_file = os.path.join(self.test_dir, "test_file.xlsx")
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for title, rows in sheets.items():
+            sheet = workbook.create_sheet(title)
+            for row in rows:
+                sheet.append(row)
+        workbook.save(self.test_file)
+
+    def test_read(self):
+        rows = [["text", "label"], ["exampleA", "positive"], ["exampleB"], [], [None, "negative"], [], []]
+        self.create_workbook({"Sheet1": rows})
+        parser = parsers.ExcelParser()
+        expected = [
+            {"text": "exampleA", "label": "positive", LINE_NUMBER_COLUMN: 1},
+            {"text": "exampleB", "label": "", LINE_NUMBER_COLUMN: 2},
+            {"text": "", "label": "", LINE_NUMBER_COLUMN: 3},
+            {"text": "", "label": "negative", LINE_NUMBER_COLUMN: 4},
+        ]
+        self.assertEqual(list(parser.parse(self.test_file)), expected)
+
+    def test_can_select_sheet(self):
+        self.create_workbook({"Sheet1": [["text"], ["first"]], "Sheet2": [["text"], ["second"]]})
+        self.assertEqual(next(parsers.ExcelParser().parse(self.test_file))["text"], "first")
+        self.assertEqual(next(parsers.ExcelParser(sheet_name="Sheet2").parse(self.test_file))["text"], "second")
+
+    def test_unknown_sheet_is_error(self):
+        self.create_workbook({"Sheet1": [["text"], ["first"]]})
+        parser = parsers.ExcelParser(sheet_name="Sheet2")
+        self.assertEqual(list(parser.parse(self.test_file)), [])
+        self.assertEqual(len(parser.errors), 1)
+
+    def test_error_while_reading_rows_is_not_file_error(self):
+        self.create_workbook({"Sheet1": [["text"], ["first"], ["second"]]})
+        parser = parsers.ExcelParser()
+        with patch.object(parsers, "trim_row", side_effect=[("text",), ("first",), KeyError("second")]):
+            rows = parser.parse(self.test_file)
+            self.assertEqual(next(rows)["text"], "first")
+            with self.assertRaises(KeyError):
+                next(rows)
+        self.assertEqual(parser.errors, [])
+
+    def test_unsupported_file_is_error(self):
+        self.test_file = os.path.join(self.test_dir, "test_file.txt")
+        self.create_file("text\nfirst\n")
+        parser = parsers.ExcelParser()
+        self.assertEqual(list(parser.parse(self.test_file)), [])
+        self.assertEqual(len(parser.errors), 1)
+
+
 class TestFastTextParser(TestParser):
     def test_read(self):
         content = "__label__sauce __label__cheese Text"
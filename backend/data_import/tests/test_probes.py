@@ -0,0 +1,127 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from django.core.files import File
+from django.test import TestCase, override_settings
+from django_drf_filepond.models import TemporaryUpload
+from django_drf_filepond.utils import _get_file_id
+
+from data_import.celery_tasks import probe_upload
+from data_import.models import UploadProbe
+from data_import.pipeline import probes
+
+
+class TestProbe(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.test_file = os.path.join(self.test_dir, "test_file.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def create_file(self, content: bytes):
+        with open(self.test_file, "wb") as f:
+            f.write(content)
+
+    def test_utf8_does_not_run_chardet(self):
+        self.create_file("こんにちは\nworld\n".encode("utf-8"))
+        with patch.object(probes, "UniversalDetector") as detector:
+            probe = probes.sample_file(self.test_file)
+        detector.assert_not_called()
+        self.assertEqual(probe.encoding, "utf-8")
+        self.assertFalse(probe.bom)
+
+    def test_utf8_character_cut_at_the_end_of_the_sample(self):
+        content = "あ".encode("utf-8") * 10
+        self.create_file(content)
+        probe = probes.sample_file(self.test_file, sample_size=len(content) - 1)
+        self.assertEqual(probe.encoding, "utf-8")
+
+    def test_ascii(self):
+        self.create_file(b"hello\nworld\n")
+        with patch.object(probes, "UniversalDetector") as detector:
+            probe = probes.sample_file(self.test_file)
+        detector.assert_not_called()
+        self.assertEqual(probe.encoding, "ascii")
+
+    def test_utf8_after_the_sample(self):
+        self.create_file(b"hello\n" * 10 + "こんにちは\n".encode("utf-8"))
+        self.assertEqual(probes.sample_file(self.test_file, sample_size=16).encoding, "utf-8")
+
+    def test_other_encoding_after_the_sample_runs_chardet(self):
+        content = "hello\n" * 10 + "こんにちは、世界。日本語のテキストです。\n" * 20
+        self.create_file(content.encode("shift_jis"))
+        probe = probes.sample_file(self.test_file, sample_size=16)
+        self.assertNotIn(probe.encoding, ["ascii", "utf-8"])
+        with open(self.test_file, encoding=probe.encoding) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_bom(self):
+        for encoding, expected in [("utf-8-sig", "utf-8-sig"), ("utf-16", "utf-16"), ("utf-32", "utf-32")]:
+            with self.subTest(encoding=encoding):
+                self.create_file("text\n".encode(encoding))
+                probe = probes.sample_file(self.test_file)
+                self.assertEqual(probe.encoding, expected)
+                self.assertTrue(probe.bom)
+
+    def test_other_encoding_runs_chardet(self):
+        content = "こんにちは、世界。日本語のテキストです。\n" * 20
+        self.create_file(content.encode("shift_jis"))
+        probe = probes.sample_file(self.test_file)
+        self.assertNotEqual(probe.encoding, "utf-8")
+        with open(self.test_file, encoding=probe.encoding) as f:
+            self.assertEqual(f.read(), content)
+
+    def test_estimated_lines(self):
+        self.create_file(b"line\n" * 1000 + b"last")
+        self.assertEqual(probes.sample_file(self.test_file).estimated_lines, 1001)
+        self.assertEqual(probes.sample_file(self.test_file, sample_size=500).estimated_lines, 1001)
+
+    def test_mime(self):
+        self.create_file(b"\x89PNG\r\n\x1a\n" + b"\x00" * 100)
+        self.assertEqual(probes.sample_file(self.test_file).mime, "image/png")
+        self.create_file(b"text")
+        self.assertIsNone(probes.sample_file(self.test_file).mime)
+
+    def test_probe_file_is_cached_until_the_file_changes(self):
+        self.create_file(b"text")
+        with patch.object(probes, "sample_file", wraps=probes.sample_file) as sample_file:
+            probes.probe_file(self.test_file)
+            probes.probe_file(self.test_file)
+            self.assertEqual(sample_file.call_count, 1)
+            self.create_file(b"longer text")
+            probes.probe_file(self.test_file)
+            self.assertEqual(sample_file.call_count, 2)
+
+
+@override_settings(MEDIA_ROOT=os.path.join(os.path.dirname(__file__), "data"))
+class TestProbeUpload(TestCase):
+    def setUp(self):
+        file_path = pathlib.Path(__file__).parent / "data" / "text_classification" / "example.jsonl"
+        self.upload_id = _get_file_id()
+        self.upload = TemporaryUpload.objects.create(
+            upload_id=self.upload_id,
+            file_id="1",
+            file=File(open(file_path, mode="rb"), "example.jsonl"),
+            upload_name="example.jsonl",
+            upload_type="F",
+        )
+
+    def tearDown(self):
+        TemporaryUpload.objects.filter(upload_id=self.upload_id).delete()
+
+    def test_probe_is_kept_with_the_upload(self):
+        probe = probe_upload(self.upload)
+        self.assertEqual(UploadProbe.objects.get(upload=self.upload).encoding, probe.encoding)
+        with patch.object(probes, "sample_file") as sample_file:
+            self.assertEqual(probe_upload(self.upload), probe)
+        sample_file.assert_not_called()
+
+    def test_probe_is_deleted_with_the_upload(self):
+        probe_upload(self.upload)
+        self.upload.delete()
+        self.assertFalse(UploadProbe.objects.exists())
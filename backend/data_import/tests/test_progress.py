@@ -0,0 +1,48 @@
+import pathlib
+
+from django.test import TestCase
+
+from data_import.datasets import load_dataset
+from data_import.pipeline.catalog import JSONL
+from data_import.pipeline.checkpoints import Checkpoints
+from data_import.pipeline.progress import Progress
+from data_import.pipeline.readers import FileName, Position
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestProgress(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.user = self.project.admin
+        path = pathlib.Path(__file__).parent / "data" / "text_classification" / "example.jsonl"
+        self.filenames = [FileName(full_path=str(path), generated_name="example.jsonl", upload_name="example.jsonl")]
+        self.reports = []
+
+    def import_dataset(self, skip=None) -> Progress:
+        checkpoints = Checkpoints()
+        checkpoints.records = dict(skip or {})
+        checkpoints.positions = {filename: Position(records=count) for filename, count in checkpoints.records.items()}
+        progress = Progress(self.filenames, skip=checkpoints.records, callback=self.reports.append)
+        dataset = load_dataset(
+            ProjectType.DOCUMENT_CLASSIFICATION, JSONL, self.filenames, self.project.item, column_label="labels"
+        )
+        dataset.save(self.user, batch_size=1, checkpoints=checkpoints, progress=progress)
+        progress.finish()
+        return progress
+
+    def test_report_after_each_batch(self):
+        self.import_dataset()
+        self.assertEqual([report["rows_parsed"] for report in self.reports], [1, 2, 3, 3])
+        self.assertEqual([report["examples_inserted"] for report in self.reports], [1, 2, 3, 3])
+        self.assertEqual(self.reports[-1]["labels_inserted"], 3)
+        self.assertEqual(self.reports[-1]["eta_seconds"], 0.0)
+        self.assertEqual(self.reports[-1]["bytes_read"], self.reports[-1]["bytes_total"])
+        bytes_read = [report["bytes_read"] for report in self.reports]
+        self.assertEqual(bytes_read, sorted(bytes_read))
+
+    def test_resumed_rows_are_not_in_the_rate(self):
+        progress = self.import_dataset(skip={"example.jsonl": 2})
+        self.assertEqual(progress.rows_parsed, 3)
+        self.assertEqual(progress.resumed_rows, 2)
+        self.assertEqual(self.reports[-1]["examples_inserted"], 1)
@@ -8,6 +8,7 @@ from data_import.pipeline.readers import (
     FILE_NAME_COLUMN,
     UPLOAD_NAME_COLUMN,
     UUID_COLUMN,
+    Position,
     Reader,
 )
 
@@ -15,7 +16,7 @@ from data_import.pipeline.readers import (
 class TestReader(unittest.TestCase):
     def setUp(self):
         self.parser = MagicMock()
-        self.parser.parse.return_value = [{"a": 1}, {"a": 2}]
+        self.parser.parse_from.side_effect = lambda filename, start: iter([{"a": 1}, {"a": 2}][start.records :])
         filename = MagicMock()
         filename.generated_name = "filename"
         filename.upload_name = "upload_name"
@@ -49,3 +50,11 @@ class TestReader(unittest.TestCase):
         batch = next(reader.batch(2))
         expected_df = pd.DataFrame(self.rows)
         assert_frame_equal(batch, expected_df)
+
+    @patch("data_import.pipeline.readers.uuid.uuid4")
+    def test_batch_skips_imported_records(self, mock):
+        mock.return_value = "uuid"
+        reader = Reader(self.filenames, self.parser)
+        batch = next(reader.batch(2, start={"filename": Position(records=1)}))
+        expected_df = pd.DataFrame(self.rows[1:])
+        assert_frame_equal(batch, expected_df)
@@ -3,15 +3,19 @@ import pathlib
 import shutil
 
 from django.core.files import File
-from django.test import TestCase, override_settings
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
 from django_drf_filepond.models import StoredUpload, TemporaryUpload
 from django_drf_filepond.utils import _get_file_id
 
-from data_import.celery_tasks import import_dataset
+from data_import.celery_tasks import collect_label_types, import_dataset
 from data_import.pipeline.catalog import RELATION_EXTRACTION
+from data_import.pipeline.readers import FileName
+from data_import.tests.utils import run_in_daemonic_process
 from examples.models import Example
-from label_types.models import SpanType
+from label_types.models import CategoryType, SpanType
 from labels.models import Category, Span
+from metrics.models import LabelStatistics
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -97,6 +101,25 @@ class TestImportClassificationData(TestImportData):
         self.import_dataset(filename, file_format, self.task, kwargs)
         self.assert_examples(dataset)
 
+    def test_result_has_progress(self):
+        filename = "text_classification/example.jsonl"
+        file_format = "JSONL"
+        kwargs = {"column_label": "labels"}
+        response = self.import_dataset(filename, file_format, self.task, kwargs)
+        progress = response["progress"]
+        self.assertEqual((progress["rows_parsed"], progress["examples_inserted"]), (3, 3))
+        self.assertEqual(progress["labels_inserted"], 3)
+        self.assertEqual(progress["bytes_read"], progress["bytes_total"])
+
+    def test_count_labels_in_statistics(self):
+        kwargs = {"column_label": "labels"}
+        self.import_dataset("text_classification/example.jsonl", "JSONL", self.task, kwargs)
+        fields = ["user", "kind", "label_type_id", "dataset", "day", "count", "first_created_at", "last_created_at"]
+        counted = list(LabelStatistics.objects.order_by("label_type_id").values(*fields))
+        self.assertEqual(sum(statistics["count"] for statistics in counted), 3)
+        LabelStatistics.objects.rebuild(self.project.id)
+        self.assertEqual(list(LabelStatistics.objects.order_by("label_type_id").values(*fields)), counted)
+
     def test_csv(self):
         filename = "text_classification/example.csv"
         file_format = "CSV"
@@ -173,6 +196,72 @@ class TestImportClassificationData(TestImportData):
         self.assert_parse_error(response)
 
 
+@override_settings(IMPORT_VECTORIZED=True)
+class TestImportClassificationDataVectorized(TestImportClassificationData):
+    pass
+
+
+@override_settings(IMPORT_LOADER="copy")
+class TestImportClassificationDataWithCopy(TestImportClassificationData):
+    pass
+
+
+@override_settings(MEDIA_ROOT=os.path.join(os.path.dirname(__file__), "data"), IMPORT_WORKERS=2)
+class TestImportMultipleFilesInParallel(TransactionTestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.user = self.project.admin
+        self.data_path = pathlib.Path(__file__).parent / "data"
+        self.upload_ids = []
+
+    def tearDown(self):
+        for su in StoredUpload.objects.filter(upload_id__in=self.upload_ids):
+            shutil.rmtree(pathlib.Path(su.get_absolute_file_path()).parent)
+
+    def upload(self, filename):
+        upload_id = _get_file_id()
+        TemporaryUpload.objects.create(
+            upload_id=upload_id,
+            file_id="1",
+            file=File(open(str(self.data_path / filename), mode="rb"), filename.split("/")[-1]),
+            upload_name=filename,
+            upload_type="F",
+        )
+        self.upload_ids.append(upload_id)
+
+    def test_import_files_in_parallel(self):
+        filenames = ["text_classification/example.csv", "text_classification/example_out_of_order_columns.csv"]
+        for filename in filenames:
+            self.upload(filename)
+        response = import_dataset(
+            self.user.id, self.project.item.id, "CSV", self.upload_ids, self.project.item.project_type
+        )
+        self.assertEqual(Example.objects.count(), 4)
+        self.assertEqual(Category.objects.filter(label__text="positive").count(), 2)
+        types = CategoryType.objects.filter(project=self.project.item).values_list("text", flat=True)
+        self.assertCountEqual(types, ["positive", "negative"])
+        self.assertEqual({error["filename"] for error in response["error"]}, set(filenames))
+
+    def test_collect_label_types_without_saving(self):
+        full_path = str(self.data_path / "text_classification/example.csv")
+        filenames = [FileName(full_path=full_path, generated_name="example.csv", upload_name="example.csv")]
+        types = collect_label_types(self.project.item.id, "CSV", filenames, self.project.item.project_type)
+        self.assertCountEqual([label_type.text for label_type in types], ["positive", "negative"])
+        self.assertFalse(CategoryType.objects.exists())
+        self.assertFalse(Example.objects.exists())
+
+    def test_import_files_in_parallel_from_daemonic_process(self):
+        filenames = ["text_classification/example.csv", "text_classification/example_out_of_order_columns.csv"]
+        for filename in filenames:
+            self.upload(filename)
+        # The forked process must not share the connections of this one.
+        connections.close_all()
+        run_in_daemonic_process(
+            import_dataset, self.user.id, self.project.item.id, "CSV", self.upload_ids, self.project.item.project_type
+        )
+        self.assertEqual(Example.objects.count(), 4)
+
+
 class TestImportSequenceLabelingData(TestImportData):
     task = ProjectType.SEQUENCE_LABELING
 
@@ -216,6 +305,11 @@ class TestImportSequenceLabelingData(TestImportData):
         self.assertEqual(len(response["error"]), 0)
 
 
+@override_settings(IMPORT_VECTORIZED=True)
+class TestImportSequenceLabelingDataVectorized(TestImportSequenceLabelingData):
+    pass
+
+
 class TestImportRelationExtractionData(TestImportData):
     task = ProjectType.SEQUENCE_LABELING
 
@@ -252,6 +346,16 @@ class TestImportRelationExtractionData(TestImportData):
         self.assert_examples(dataset)
 
 
+@override_settings(IMPORT_VECTORIZED=True)
+class TestImportRelationExtractionDataVectorized(TestImportRelationExtractionData):
+    pass
+
+
+@override_settings(IMPORT_LOADER="copy")
+class TestImportRelationExtractionDataWithCopy(TestImportRelationExtractionData):
+    pass
+
+
 class TestImportSeq2seqData(TestImportData):
     task = ProjectType.SEQ2SEQ
 
@@ -284,6 +388,11 @@ class TestImportSeq2seqData(TestImportData):
         self.assert_examples(dataset)
 
 
+@override_settings(IMPORT_VECTORIZED=True)
+class TestImportSeq2seqDataVectorized(TestImportSeq2seqData):
+    pass
+
+
 class TestImportIntentDetectionAndSlotFillingData(TestImportData):
     task = ProjectType.INTENT_DETECTION_AND_SLOT_FILLING
 
@@ -309,6 +418,11 @@ class TestImportIntentDetectionAndSlotFillingData(TestImportData):
         self.assert_examples(dataset)
 
 
+@override_settings(IMPORT_VECTORIZED=True)
+class TestImportIntentDetectionAndSlotFillingDataVectorized(TestImportIntentDetectionAndSlotFillingData):
+    pass
+
+
 class TestImportImageClassificationData(TestImportData):
     task = ProjectType.IMAGE_CLASSIFICATION
 
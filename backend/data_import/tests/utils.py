@@ -0,0 +1,21 @@
+import multiprocessing
+
+
+def run_in_daemonic_process(func, *args):
+    """Runs the function in a daemonic process, as the workers of the Celery prefork pool run tasks."""
+    context = multiprocessing.get_context("fork")
+    queue = context.SimpleQueue()
+
+    def target():
+        try:
+            queue.put(func(*args))
+        except Exception as e:
+            queue.put(e)
+
+    process = context.Process(target=target, daemon=True)
+    process.start()
+    result = queue.get()
+    process.join()
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -1,9 +1,10 @@
 from django.contrib import admin
 
 from .models import Comment, Example
+from metrics.admin import LabelStatisticsAdminMixin
 
 
-class ExampleAdmin(admin.ModelAdmin):
+class ExampleAdmin(LabelStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ("text", "project", "meta")
     ordering = ("project",)
     search_fields = ("text",)
@@ -3,7 +3,11 @@ from django.db.models import Count, Manager
 
 class ExampleManager(Manager):
     def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
-        super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        objs = super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        # The primary keys are set by `INSERT ... RETURNING` on the backends that support it, e.g. PostgreSQL.
+        if all(obj.pk is not None for obj in objs):
+            return objs
+        # Otherwise, e.g. on MySQL or when conflicts are ignored, read them back by uuid.
         uuids = [data.uuid for data in objs]
         examples = self.in_bulk(uuids, field_name="uuid")
         return [examples[uid] for uid in uuids]
@@ -0,0 +1,25 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0008_assignment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(fields=["assignee", "id"], name="assignment_assignee_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "created_at", "id"], name="example_project_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "score", "id"], name="example_project_score_idx"),
+        ),
+    ]
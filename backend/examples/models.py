@@ -36,6 +36,11 @@ class Example(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            # For the keyset pagination of the examples of a project.
+            models.Index(fields=["project", "created_at", "id"], name="example_project_created_idx"),
+            models.Index(fields=["project", "score", "id"], name="example_project_score_idx"),
+        ]
 
 
 class Assignment(models.Model):
@@ -48,6 +53,10 @@ class Assignment(models.Model):
 
     class Meta:
         unique_together = (("example", "assignee"),)
+        indexes = [
+            # For the keyset pagination of the examples assigned to a user in random order.
+            models.Index(fields=["assignee", "id"], name="assignment_assignee_id_idx"),
+        ]
 
     def clean(self):
         # assignee must be a member of the project
@@ -0,0 +1,183 @@
+import base64
+import datetime
+import hashlib
+import json
+import uuid
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import F, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def encode_key(value: Any) -> Any:
+    # Unlike DjangoJSONEncoder, which rounds them to milliseconds, the datetimes must be exact to seek by them.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not a valid key")
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks past the last row of the previous page instead of using OFFSET.
+
+    The keys are the fields the queryset is ordered by, e.g. by the `ordering` query parameter,
+    followed by the primary key to break ties. So a page costs the same however deep it is,
+    as long as an index covers the keys. The keys must not be null.
+
+    The total count is only computed if `count=true` is given, and it is cached for a while.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    count_query_param = "count"
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 1000
+    count_cache_timeout = 60
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset: QuerySet, request, view=None) -> Optional[List[Any]]:
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_limit(request)
+        self.count = self.get_count(queryset) if self.wants_count(request) else None
+        self.keys = self.get_keys(queryset)
+        values, backwards = self.decode_cursor(request)
+
+        aliases = [f"_key{i}" for i in range(len(self.keys))]
+        queryset = queryset.annotate(**{alias: F(name) for alias, (name, _) in zip(aliases, self.keys)})
+        if values is not None:
+            queryset = queryset.filter(self.seek(aliases, values, backwards))
+        ordering = [
+            F(alias).desc() if descending != backwards else F(alias).asc()
+            for alias, (_, descending) in zip(aliases, self.keys)
+        ]
+        rows = list(queryset.order_by(*ordering)[: self.limit + 1])
+
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.first = [getattr(rows[0], alias) for alias in aliases] if rows else None
+        self.last = [getattr(rows[-1], alias) for alias in aliases] if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_limit(self, request) -> int:
+        try:
+            return _positive_int(request.query_params[self.limit_query_param], strict=True, cutoff=self.max_limit)
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def wants_count(self, request) -> bool:
+        return request.query_params.get(self.count_query_param, "").lower() in ("1", "true")
+
+    def get_count(self, queryset: QuerySet) -> int:
+        # The SQL identifies the filters, e.g. the project and the assignee, so each list has its own count.
+        key = "keyset_count:" + hashlib.md5(str(queryset.query).encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    @staticmethod
+    def get_keys(queryset: QuerySet) -> List[Tuple[str, bool]]:
+        """Returns the names of the fields to seek by, and whether each is in descending order."""
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        keys = []
+        for field in ordering:
+            assert isinstance(field, str) and field != "?", "Keyset pagination needs to be ordered by fields."
+            keys.append((field.lstrip("-"), field.startswith("-")))
+        pk = queryset.model._meta.pk.name
+        if not any(name in ("pk", pk) for name, _ in keys):
+            # In the direction of the last key, so that a single index can be scanned for all keys.
+            keys.append((pk, keys[-1][1] if keys else False))
+        return keys
+
+    def seek(self, aliases: List[str], values: List[Any], backwards: bool) -> Q:
+        """Returns the condition for the rows after the values in the order, or before them if `backwards`.
+
+        (a, b) > (x, y) is written as a >= x AND (a > x OR (a = x AND b > y)),
+        so that the database can start the index scan at x.
+        """
+        condition = None
+        for alias, (_, descending), value in reversed(list(zip(aliases, self.keys, values))):
+            lookup = "lt" if descending != backwards else "gt"
+            after = Q(**{f"{alias}__{lookup}": value})
+            condition = after if condition is None else after | (Q(**{alias: value}) & condition)
+        lookup = "lte" if self.keys[0][1] != backwards else "gte"
+        return Q(**{f"{aliases[0]}__{lookup}": values[0]}) & condition
+
+    def encode_cursor(self, values: List[Any], backwards: bool) -> str:
+        data = json.dumps({"k": values, "b": backwards}, default=encode_key)
+        cursor = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request) -> Tuple[Optional[List[Any]], bool]:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            values, backwards = data["k"], bool(data["b"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        # The ordering has changed since the cursor was made.
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            raise NotFound(self.invalid_cursor_message)
+        return values, backwards
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, backwards=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, backwards=True)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.limit_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Whether to count all the results.",
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -1,8 +1,10 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.http import urlencode
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from .utils import make_assignment, make_doc, make_example_state
+from .utils import make_assignment, make_comment, make_doc, make_example_state
 from api.tests.utils import CRUDMixin
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
@@ -69,6 +71,46 @@ class TestExampleListCollaborative(CRUDMixin):
         self.assertTrue(response.data["results"][0]["is_confirmed"])
 
 
+class TestExampleListQueries(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.examples = [make_doc(self.project.item) for _ in range(6)]
+        for example in self.examples:
+            for member in self.project.members:
+                make_assignment(self.project.item, example, member)
+                make_comment(example, member)
+        make_example_state(self.examples[0], self.project.annotator)
+        self.base_url = reverse(viewname="example_list", args=[self.project.item.id])
+
+    def count_queries(self, user, limit):
+        self.client.force_login(user)
+        self.url = "{}?{}".format(self.base_url, urlencode({"limit": limit}))
+        with CaptureQueriesContext(connection) as context:
+            response = self.assert_fetch(expected=status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), limit)
+        return len(context.captured_queries), response
+
+    def test_number_of_queries_does_not_depend_on_page_size(self):
+        # The first request caches the content types of the polymorphic projects.
+        self.count_queries(self.project.admin, 1)
+        for user in [self.project.admin, self.project.annotator]:
+            with self.subTest(user=user.username):
+                small, _ = self.count_queries(user, 1)
+                large, _ = self.count_queries(user, 6)
+                self.assertEqual(small, large)
+
+    def test_serializes_annotated_values(self):
+        _, response = self.count_queries(self.project.annotator, 6)
+        first = response.data["results"][0]
+        self.assertEqual(first["comment_count"], len(self.project.members))
+        self.assertTrue(first["is_confirmed"])
+        self.assertFalse(response.data["results"][1]["is_confirmed"])
+        self.assertEqual(
+            {assignment["assignee"] for assignment in first["assignments"]},
+            {member.username for member in self.project.members},
+        )
+
+
 class TestExampleListFilter(CRUDMixin):
     def setUp(self):
         self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
@@ -107,6 +149,67 @@ class TestExampleListFilter(CRUDMixin):
         self.assert_filter(data={"confirmed": "True"}, user=user, expected=0)
 
 
+class TestExampleListKeysetPagination(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.examples = [make_doc(self.project.item) for _ in range(7)]
+        # Ties in the score are broken by the id.
+        for i, example in enumerate(self.examples):
+            example.score = i % 3
+            example.save()
+            make_assignment(self.project.item, example, self.project.annotator)
+        self.base_url = reverse(viewname="example_list", args=[self.project.item.id])
+
+    def fetch_all(self, user, **query):
+        self.url = "{}?{}".format(self.base_url, urlencode({"pagination": "cursor", "limit": 3, **query}))
+        pages = []
+        while self.url:
+            response = self.assert_fetch(user, status.HTTP_200_OK)
+            pages.append(response.data)
+            self.url = response.data["next"]
+        return pages
+
+    def test_walks_through_all_examples_in_order(self):
+        pages = self.fetch_all(self.project.admin)
+        ids = [item["id"] for page in pages for item in page["results"]]
+        self.assertEqual(ids, [example.id for example in self.examples])
+        self.assertEqual([len(page["results"]) for page in pages], [3, 3, 1])
+        self.assertIsNone(pages[0]["previous"])
+        self.assertIsNone(pages[0]["count"])
+
+    def test_orders_by_score(self):
+        pages = self.fetch_all(self.project.admin, ordering="-score")
+        ids = [item["id"] for page in pages for item in page["results"]]
+        expected = sorted(self.examples, key=lambda example: (-example.score, -example.id))
+        self.assertEqual(ids, [example.id for example in expected])
+
+    def test_goes_back_with_the_previous_link(self):
+        pages = self.fetch_all(self.project.admin)
+        self.url = pages[2]["previous"]
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], pages[1]["results"])
+        self.url = response.data["previous"]
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], pages[0]["results"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_walks_through_examples_assigned_in_random_order(self):
+        self.project.item.random_order = True
+        self.project.item.save()
+        pages = self.fetch_all(self.project.annotator)
+        ids = [item["id"] for page in pages for item in page["results"]]
+        assignments = self.project.item.assignments.order_by("id")
+        self.assertEqual(ids, [assignment.example_id for assignment in assignments])
+
+    def test_counts_only_if_asked(self):
+        pages = self.fetch_all(self.project.admin, count="true")
+        self.assertEqual(pages[0]["count"], 7)
+
+    def test_rejects_invalid_cursor(self):
+        self.url = "{}?{}".format(self.base_url, urlencode({"pagination": "cursor", "cursor": "invalid"}))
+        self.assert_fetch(self.project.admin, status.HTTP_404_NOT_FOUND)
+
+
 class TestExampleDetail(CRUDMixin):
     def setUp(self):
         self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
@@ -1,12 +1,16 @@
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from examples.filters import ExampleFilter
 from examples.models import Example
+from examples.pagination import KeysetPagination
 from examples.serializers import ExampleSerializer
+from metrics.models import LabelStatistics
 from projects.models import Member, Project
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
 
@@ -24,26 +28,37 @@ class ExampleList(generics.ListCreateAPIView):
     def project(self):
         return get_object_or_404(Project, pk=self.kwargs["project_id"])
 
+    @property
+    def pagination_class(self):
+        # Keyset pagination is opt-in, because it can't jump to a page by its number.
+        if self.request.query_params.get("pagination") == "cursor":
+            return KeysetPagination
+        return api_settings.DEFAULT_PAGINATION_CLASS
+
     def get_queryset(self):
-        member = get_object_or_404(Member, project=self.project, user=self.request.user)
+        project = self.project
+        member = get_object_or_404(Member, project=project, user=self.request.user)
         if member.is_admin():
-            return self.model.objects.filter(project=self.project)
-
-        queryset = self.model.objects.filter(project=self.project, assignments__assignee=self.request.user)
-        if self.project.random_order:
-            queryset = queryset.order_by("assignments__id")
-        return queryset
+            queryset = self.model.objects.filter(project=project)
+        else:
+            queryset = self.model.objects.filter(project=project, assignments__assignee=self.request.user)
+            if project.random_order:
+                queryset = queryset.order_by("assignments__id")
+        return ExampleSerializer.setup_eager_loading(queryset, self.request.user, project.collaborative_annotation)
 
     def perform_create(self, serializer):
         serializer.save(project=self.project)
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         queryset = self.project.examples
         delete_ids = request.data["ids"]
         if delete_ids:
-            queryset.filter(pk__in=delete_ids).delete()
+            queryset = queryset.filter(pk__in=delete_ids)
         else:
-            queryset.all().delete()
+            queryset = queryset.all()
+        LabelStatistics.objects.remove_examples(queryset)
+        queryset.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -52,3 +67,8 @@ class ExampleDetail(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ExampleSerializer
     lookup_url_kwarg = "example_id"
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        LabelStatistics.objects.remove_examples(Example.objects.filter(pk=instance.pk))
+        instance.delete()
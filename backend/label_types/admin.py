@@ -1,9 +1,10 @@
 from django.contrib import admin
 
 from .models import CategoryType, SpanType
+from metrics.admin import LabelStatisticsAdminMixin
 
 
-class LabelAdmin(admin.ModelAdmin):
+class LabelAdmin(LabelStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ("text", "project", "text_color", "background_color")
     ordering = ("project",)
     search_fields = ("text",)
@@ -19,6 +19,7 @@ from .serializers import (
     RelationTypeSerializer,
     SpanTypeSerializer,
 )
+from metrics.models import LabelStatistics
 from projects.models import Project
 from projects.permissions import (
     IsProjectAdmin,
@@ -56,22 +57,33 @@ class LabelList(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         serializer.save(project_id=self.kwargs["project_id"])
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         delete_ids = request.data["ids"]
-        self.model.objects.filter(pk__in=delete_ids).delete()
+        queryset = self.model.objects.filter(pk__in=delete_ids)
+        LabelStatistics.objects.remove_label_types(queryset)
+        queryset.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class LabelTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+    lookup_url_kwarg = "label_id"
+    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        LabelStatistics.objects.remove_label_types(type(instance).objects.filter(pk=instance.pk))
+        instance.delete()
+
+
 class CategoryTypeList(LabelList):
     model = CategoryType
     serializer_class = CategoryTypeSerializer
 
 
-class CategoryTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class CategoryTypeDetail(LabelTypeDetail):
     queryset = CategoryType.objects.all()
     serializer_class = CategoryTypeSerializer
-    lookup_url_kwarg = "label_id"
-    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
 
 class SpanTypeList(LabelList):
@@ -79,11 +91,9 @@ class SpanTypeList(LabelList):
     serializer_class = SpanTypeSerializer
 
 
-class SpanTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class SpanTypeDetail(LabelTypeDetail):
     queryset = SpanType.objects.all()
     serializer_class = SpanTypeSerializer
-    lookup_url_kwarg = "label_id"
-    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
 
 class RelationTypeList(LabelList):
@@ -91,11 +101,9 @@ class RelationTypeList(LabelList):
     serializer_class = RelationTypeSerializer
 
 
-class RelationTypeDetail(generics.RetrieveUpdateDestroyAPIView):
+class RelationTypeDetail(LabelTypeDetail):
     queryset = RelationType.objects.all()
     serializer_class = RelationTypeSerializer
-    lookup_url_kwarg = "label_id"
-    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
 
 
 class LabelUploadAPI(APIView):
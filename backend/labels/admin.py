@@ -1,21 +1,25 @@
 from django.contrib import admin
 
 from .models import BoundingBox, Category, DatasetReview, Segmentation, Span, TextLabel
+from metrics.admin import LabelStatisticsAdminMixin
 
 
-class SpanAdmin(admin.ModelAdmin):
+class SpanAdmin(LabelStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ("example", "label", "start_offset", "user")
     ordering = ("example",)
+    project_field = "example__project"
 
 
-class CategoryAdmin(admin.ModelAdmin):
+class CategoryAdmin(LabelStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ("example", "label", "user")
     ordering = ("example",)
+    project_field = "example__project"
 
 
-class TextLabelAdmin(admin.ModelAdmin):
+class TextLabelAdmin(LabelStatisticsAdminMixin, admin.ModelAdmin):
     list_display = ("example", "text", "user")
     ordering = ("example",)
+    project_field = "example__project"
 
 
 class BoundingBoxAdmin(admin.ModelAdmin):
@@ -0,0 +1,75 @@
+from typing import Iterable, Optional, Set
+
+import pandas as pd
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+
+# The label of the annotations without a label type, e.g. text labels, or with an empty one.
+NO_LABEL = "__NO_LABEL__"
+CHUNK_SIZE = 10000
+
+
+def label_text_field(queryset: QuerySet) -> Optional[str]:
+    """Returns the lookup of the label text of the annotations, or None if they have no label type."""
+    field = getattr(queryset.model.objects, "label_type_field", "label")
+    try:
+        queryset.model._meta.get_field(field)
+    except FieldDoesNotExist:
+        return None
+    return f"{field}__text"
+
+
+def read_labels(queryset: QuerySet) -> pd.DataFrame:
+    """Reads the distinct labels each user gave each example, as the example, user and label columns."""
+    field = label_text_field(queryset)
+    if field is None:
+        rows = queryset.order_by().values_list("example_id", "user_id").distinct()
+        labels = pd.DataFrame.from_records(rows.iterator(chunk_size=CHUNK_SIZE), columns=["example", "user"])
+        return labels.assign(label=NO_LABEL)
+    rows = queryset.order_by().values_list("example_id", "user_id", field).distinct()
+    return pd.DataFrame.from_records(rows.iterator(chunk_size=CHUNK_SIZE), columns=["example", "user", "label"])
+
+
+def discrepant_examples(labels: pd.DataFrame) -> Set[int]:
+    """Returns the examples whose users didn't give the same set of labels.
+
+    The label set of each user on each example is hashed as the sum of the hashes of its labels,
+    so an example is discrepant if it has more than one distinct hash. That's a few vectorized
+    passes over the labels instead of comparing every pair of users.
+
+    Args:
+        labels: the example, user and label columns, e.g. made by `read_labels`.
+    """
+    if labels.empty:
+        return set()
+    # Only the distinct labels are cleaned and hashed, the rows refer to them by code.
+    # The code of a missing label is -1, so NO_LABEL is put last.
+    raw_codes, raw_texts = pd.factorize(labels["label"])
+    texts = pd.Series([*raw_texts, NO_LABEL], dtype=object).astype(str).str.strip().replace("", NO_LABEL)
+    clean_codes, clean_texts = pd.factorize(texts)
+    codes = clean_codes[raw_codes]
+    labels = pd.DataFrame({"example": labels["example"].to_numpy(), "user": labels["user"].to_numpy(), "code": codes})
+    # The same label can be given by several annotation types, and sets count it once.
+    labels = labels.drop_duplicates()
+    labels["hash"] = pd.util.hash_array(clean_texts.to_numpy(dtype=object))[labels["code"].to_numpy()]
+    # The sum of the unsigned hashes wraps around, and doesn't depend on the order of the labels.
+    label_sets = labels.groupby(["example", "user"], sort=False)["hash"].sum()
+    distinct_sets = label_sets.groupby(level="example", sort=False).nunique()
+    return set(distinct_sets.index[distinct_sets > 1].tolist())
+
+
+def find_discrepant_examples(querysets: Iterable[QuerySet]) -> Set[int]:
+    """Returns the examples whose users didn't give the same set of labels across the annotations.
+
+    Example:
+        >>> find_discrepant_examples([
+        ...     Category.objects.filter(example__project=project),
+        ...     Span.objects.filter(example__project=project),
+        ... ])
+        {1, 5}
+    """
+    frames = [read_labels(queryset) for queryset in querysets]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return set()
+    return discrepant_examples(pd.concat(frames, ignore_index=True))
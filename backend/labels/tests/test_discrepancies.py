@@ -0,0 +1,69 @@
+import unittest
+
+import pandas as pd
+from django.test import TestCase
+from model_mommy import mommy
+
+from labels.discrepancies import (
+    NO_LABEL,
+    discrepant_examples,
+    find_discrepant_examples,
+    read_labels,
+)
+from labels.models import Category, TextLabel
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+def make_labels(rows):
+    return pd.DataFrame(rows, columns=["example", "user", "label"])
+
+
+class TestDiscrepantExamples(unittest.TestCase):
+    def test_same_label_sets_are_not_discrepant(self):
+        labels = make_labels([(1, 1, "a"), (1, 1, "b"), (1, 2, "b"), (1, 2, "a"), (1, 2, "a")])
+        self.assertEqual(discrepant_examples(labels), set())
+
+    def test_different_label_sets_are_discrepant(self):
+        labels = make_labels([(1, 1, "a"), (1, 2, "a"), (1, 2, "b"), (2, 1, "a"), (2, 2, "a")])
+        self.assertEqual(discrepant_examples(labels), {1})
+
+    def test_single_user_is_not_discrepant(self):
+        labels = make_labels([(1, 1, "a"), (1, 1, "b")])
+        self.assertEqual(discrepant_examples(labels), set())
+
+    def test_missing_label_is_a_label(self):
+        labels = make_labels([(1, 1, None), (1, 2, " "), (2, 1, None), (2, 2, "a")])
+        self.assertEqual(discrepant_examples(labels), {2})
+
+    def test_empty(self):
+        self.assertEqual(discrepant_examples(make_labels([])), set())
+
+
+class TestFindDiscrepantExamples(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.agreed = mommy.make("Example", project=self.project.item)
+        self.disputed = mommy.make("Example", project=self.project.item)
+        positive = mommy.make("CategoryType", project=self.project.item, text="positive")
+        negative = mommy.make("CategoryType", project=self.project.item, text="negative")
+        for user in [self.project.admin, self.project.annotator]:
+            mommy.make("Category", example=self.agreed, user=user, label=positive)
+        mommy.make("Category", example=self.disputed, user=self.project.admin, label=positive)
+        mommy.make("Category", example=self.disputed, user=self.project.annotator, label=negative)
+
+    def test_finds_examples_with_different_labels(self):
+        discrepant = find_discrepant_examples([Category.objects.all(), TextLabel.objects.all()])
+        self.assertEqual(discrepant, {self.disputed.id})
+
+    def test_labels_across_annotation_types_are_one_set(self):
+        mommy.make("TextLabel", example=self.agreed, user=self.project.admin, text="note")
+        discrepant = find_discrepant_examples([Category.objects.all(), TextLabel.objects.all()])
+        self.assertEqual(discrepant, {self.agreed.id, self.disputed.id})
+
+    def test_read_labels_without_label_type(self):
+        mommy.make("TextLabel", example=self.agreed, user=self.project.admin, text="note")
+        labels = read_labels(TextLabel.objects.all())
+        self.assertEqual(
+            labels.to_dict("records"), [{"example": self.agreed.id, "user": self.project.admin.id, "label": NO_LABEL}]
+        )
@@ -2,6 +2,7 @@ from functools import partial
 from typing import Type
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
@@ -25,6 +26,7 @@ from labels.models import (
     Span,
     TextLabel,
 )
+from metrics.models import LabelStatistics
 from projects.models import Project
 from projects.permissions import IsProjectMember
 
@@ -59,11 +61,15 @@ class BaseListAPI(generics.ListCreateAPIView):
             response = Response({"detail": err.messages}, status=status.HTTP_400_BAD_REQUEST)
         return response
 
+    @transaction.atomic
     def perform_create(self, serializer):
+        # The label is counted in the statistics in the same transaction.
         serializer.save(example_id=self.kwargs["example_id"], user=self.request.user)
 
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        LabelStatistics.objects.remove(queryset)
         queryset.all().delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -83,6 +89,15 @@ class BaseDetailAPI(generics.RetrieveUpdateDestroyAPIView):
             self.permission_classes = [IsAuthenticated & IsProjectMember & partial(CanEditLabel, self.queryset)]
         return super().get_permissions()
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        LabelStatistics.objects.remove(type(instance).objects.filter(pk=instance.pk))
+        instance.delete()
+
 
 class CategoryListAPI(BaseListAPI):
     label_class = Category
@@ -90,7 +105,9 @@ class CategoryListAPI(BaseListAPI):
 
     def create(self, request, *args, **kwargs):
         if self.project.single_class_classification:
-            self.get_queryset().delete()
+            with transaction.atomic():
+                LabelStatistics.objects.remove(self.get_queryset())
+                self.get_queryset().delete()
         return super().create(request, args, kwargs)
 
 
@@ -0,0 +1,37 @@
+from django.db import transaction
+
+from .models import LabelStatistics
+
+
+class LabelStatisticsAdminMixin:
+    """Marks the label statistics of the projects stale when their labels are changed in the admin.
+
+    The admin saves and deletes the objects without counting their labels in or out,
+    so the reports count them from the label tables until the next rebuild.
+
+    Attributes:
+        project_field: The lookup of the project of the objects.
+    """
+
+    project_field = "project"
+
+    def invalidate_statistics(self, queryset):
+        LabelStatistics.objects.invalidate(queryset.values_list(self.project_field, flat=True))
+
+    def save_model(self, request, obj, form, change):
+        if change:
+            # The object can be moved to another project, e.g. with its example.
+            self.invalidate_statistics(self.model.objects.filter(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+        if change:
+            self.invalidate_statistics(self.model.objects.filter(pk=obj.pk))
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            self.invalidate_statistics(self.model.objects.filter(pk=obj.pk))
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            self.invalidate_statistics(queryset)
+            super().delete_queryset(request, queryset)
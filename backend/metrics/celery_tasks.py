@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.db import DatabaseError
+
+from .models import LabelStatistics
+from projects.models import Project
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(autoretry_for=(DatabaseError,), retry_backoff=True, retry_jitter=True)
+def rebuild_label_statistics(project_ids: Optional[List[int]] = None):
+    """Rebuild the label statistics of the projects, or of all of them, e.g. every night.
+
+    Each project is rebuilt in its own transaction, so the statistics of the others can be updated meanwhile.
+    """
+    projects = Project.objects.all() if project_ids is None else Project.objects.filter(id__in=project_ids)
+    for project_id in projects.order_by("id").values_list("id", flat=True):
+        count = LabelStatistics.objects.rebuild(project_id)
+        logger.info("Rebuilt %d label statistics of project %d", count, project_id)
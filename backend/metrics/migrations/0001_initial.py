@@ -0,0 +1,80 @@
+# Generated by Django 4.1.13 on 2026-10-18 03:36
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("projects", "0022_delete_annotationruletype_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProjectStatistics",
+            fields=[
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="statistics",
+                        serialize=False,
+                        to="projects.project",
+                    ),
+                ),
+                ("rebuilt_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LabelStatistics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("category", "Category"),
+                            ("span", "Span"),
+                            ("relation", "Relation"),
+                            ("text", "Text"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("label_type_id", models.IntegerField(default=0)),
+                ("dataset", models.CharField(blank=True, max_length=512)),
+                ("day", models.DateField()),
+                ("count", models.IntegerField(default=0)),
+                ("first_created_at", models.DateTimeField()),
+                ("last_created_at", models.DateTimeField()),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="label_statistics",
+                        to="projects.project",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="label_statistics",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="labelstatistics",
+            constraint=models.UniqueConstraint(
+                fields=("project", "user", "kind", "label_type_id", "dataset", "day"), name="label_statistics_key"
+            ),
+        ),
+    ]
@@ -0,0 +1,309 @@
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Manager, Max, Min, Q, QuerySet, Value
+from django.db.models.functions import Greatest, Least, TruncDate
+from django.utils import timezone
+
+from labels.models import Category, Relation, Span, TextLabel
+from projects.models import Project
+
+
+class LabelKind(models.TextChoices):
+    CATEGORY = "category"
+    SPAN = "span"
+    RELATION = "relation"
+    TEXT = "text"
+
+
+# The label models counted by the statistics, with their kind and the field of their label type.
+LABEL_MODELS = {
+    Category: (LabelKind.CATEGORY, "label"),
+    Span: (LabelKind.SPAN, "label"),
+    Relation: (LabelKind.RELATION, "type"),
+    TextLabel: (LabelKind.TEXT, None),
+}
+
+
+# The first key of the advisory locks of the statistics on PostgreSQL, the second being the project id.
+LOCK_NAMESPACE = 8203
+
+
+def to_utc(value: datetime.datetime) -> datetime.datetime:
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.astimezone(datetime.timezone.utc)
+
+
+class LabelStatisticsManager(Manager):
+    def lock(self, project_id: int, exclusive: bool = False):
+        """Locks the statistics of the project until the end of the transaction.
+
+        The updates take a shared lock, so they don't wait for each other, and `rebuild` an exclusive one,
+        so that no label is counted in or out while the project is recounted. On the other databases,
+        only `rebuild` locks, the row of the project, as SQLite doesn't write in parallel anyway.
+        """
+        if connection.vendor == "postgresql":
+            function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT {function}(%s, %s)", [LOCK_NAMESPACE, project_id])
+        elif exclusive:
+            list(Project.objects.select_for_update().filter(pk=project_id).values_list("pk", flat=True))
+
+    def add(
+        self,
+        project_id: int,
+        user_id: int,
+        kind: str,
+        label_type_id: Optional[int],
+        dataset: str,
+        created_at: datetime.datetime,
+        count: int = 1,
+        last_created_at: Optional[datetime.datetime] = None,
+    ):
+        """Counts `count` more labels in the statistics of their key, or fewer if it's negative.
+
+        The labels were created at `created_at`, or from `created_at` to `last_created_at` if there are several.
+        It's meant to be called in the transaction that saves the labels, so the statistics
+        are committed or rolled back with them.
+        """
+        self.lock(project_id)
+        key = {
+            "project_id": project_id,
+            "user_id": user_id,
+            "kind": kind,
+            "label_type_id": label_type_id or 0,
+            "dataset": dataset or "",
+            "day": to_utc(created_at).date(),
+        }
+        if count < 0:
+            # The statistics of the moved labels exist, unless they have been deleted with their project or user.
+            self.filter(**key).update(count=F("count") + count)
+            return
+        last_created_at = last_created_at or created_at
+        updates = {
+            "count": F("count") + count,
+            "first_created_at": Least("first_created_at", Value(created_at)),
+            "last_created_at": Greatest("last_created_at", Value(last_created_at)),
+        }
+        if self.filter(**key).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                self.create(**key, count=count, first_created_at=created_at, last_created_at=last_created_at)
+        except IntegrityError:
+            # Another transaction has created them in the meantime.
+            self.filter(**key).update(**updates)
+
+    def add_labels(self, labels: Iterable[models.Model]):
+        """Counts in the labels inserted in bulk, e.g. by an import or the auto labeling, which sends no signals.
+
+        The labels are grouped by key in memory, from their examples, so it costs a query per key.
+        It's meant to be called in the transaction that inserts the labels.
+        """
+        created: Dict[tuple, List[datetime.datetime]] = defaultdict(list)
+        for label in labels:
+            if type(label) not in LABEL_MODELS:
+                continue
+            kind, type_field = LABEL_MODELS[type(label)]
+            label_type_id = getattr(label, f"{type_field}_id") if type_field else None
+            key = (label.example.project_id, label.user_id, kind, label_type_id, label.example.upload_name)
+            created[key, to_utc(label.created_at).date()].append(label.created_at)
+        for (key, _), times in created.items():
+            self.add(*key, min(times), count=len(times), last_created_at=max(times))
+
+    def invalidate(self, project_ids: Iterable[int]):
+        """Marks the statistics of the projects as stale after a change they can't follow, e.g. in the admin.
+
+        The reports count the labels of the projects from the label tables until the next rebuild.
+        """
+        project_ids = set(project_ids)
+        for project_id in sorted(project_ids):
+            self.lock(project_id)
+        ProjectStatistics.objects.filter(project_id__in=project_ids).delete()
+
+    def _remove(self, labels: QuerySet):
+        if labels.model not in LABEL_MODELS:
+            # The other annotations, e.g. bounding boxes, aren't counted.
+            return
+        kind, type_field = LABEL_MODELS[labels.model]
+        counts = (
+            labels.order_by()
+            .values(
+                removed_project_id=F("example__project_id"),
+                removed_user_id=F("user_id"),
+                removed_label_type_id=F(f"{type_field}_id") if type_field else Value(0),
+                removed_dataset=F("example__upload_name"),
+                removed_day=TruncDate("created_at", tzinfo=datetime.timezone.utc),
+            )
+            .annotate(removed_count=Count("id"))
+            .order_by("removed_project_id")
+        )
+        locked = set()
+        for row in counts:
+            if row["removed_project_id"] not in locked:
+                self.lock(row["removed_project_id"])
+                locked.add(row["removed_project_id"])
+            self.filter(
+                project_id=row["removed_project_id"],
+                user_id=row["removed_user_id"],
+                kind=kind,
+                label_type_id=row["removed_label_type_id"],
+                dataset=row["removed_dataset"] or "",
+                day=row["removed_day"],
+            ).update(count=F("count") - row["removed_count"])
+
+    def remove(self, labels: QuerySet):
+        """Counts out the labels, and the relations between them if they are spans, before they are deleted.
+
+        The labels are counted per key with one grouped query, so it costs a query per key rather than
+        per label, and the labels can still be deleted without being loaded, as there are no delete signals.
+        It's meant to be called in the transaction that deletes the labels. The admin, which doesn't call it,
+        marks the projects stale instead, see `invalidate`.
+
+        Example:
+            >>> with transaction.atomic():
+            ...     LabelStatistics.objects.remove(Category.objects.filter(example=example))
+            ...     Category.objects.filter(example=example).delete()
+        """
+        if labels.model is Span:
+            # The relations between the spans are deleted with them.
+            self._remove(Relation.objects.filter(Q(from_id__in=labels) | Q(to_id__in=labels)))
+        self._remove(labels)
+
+    def remove_examples(self, examples: QuerySet):
+        """Counts out the labels of the examples before they are deleted."""
+        for label_model in LABEL_MODELS:
+            self._remove(label_model.objects.filter(example__in=examples))
+
+    def remove_label_types(self, label_types: QuerySet):
+        """Counts out the labels of the label types before they are deleted."""
+        for label_model, (_, type_field) in LABEL_MODELS.items():
+            if type_field and label_model._meta.get_field(type_field).related_model is label_types.model:
+                self.remove(label_model.objects.filter(**{f"{type_field}__in": label_types}))
+
+    def rebuild(self, project_id: int) -> int:
+        """Recounts the labels of the project from the label tables. Returns the number of statistics.
+
+        The labels are counted and the statistics inserted by the database, with an `INSERT ... SELECT`
+        per label model, so that the statistics don't go through Python. The project is locked meanwhile,
+        so the labels saved at the same time are counted either by the rebuild or after it, not by both.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.lock(project_id, exclusive=True)
+            self.filter(project_id=project_id).delete()
+            count = 0
+            for label_model, (kind, type_field) in LABEL_MODELS.items():
+                counts = (
+                    label_model.objects.filter(example__project_id=project_id)
+                    .order_by()
+                    .values(
+                        counted_user_id=F("user_id"),
+                        counted_label_type_id=F(f"{type_field}_id") if type_field else Value(0),
+                        counted_dataset=F("example__upload_name"),
+                        counted_day=TruncDate("created_at", tzinfo=datetime.timezone.utc),
+                    )
+                    .annotate(
+                        counted_count=Count("id"),
+                        counted_first_created_at=Min("created_at"),
+                        counted_last_created_at=Max("created_at"),
+                    )
+                )
+                sql, params = counts.query.sql_with_params()
+                # The counts are selected by their aliases, whatever the order of the columns of the query.
+                fields = ["user_id", "label_type_id", "dataset", "day", "count", "first_created_at", "last_created_at"]
+                qn = connection.ops.quote_name
+                cursor.execute(
+                    f"INSERT INTO {qn(self.model._meta.db_table)} "
+                    f"({', '.join(qn(field) for field in ['project_id', 'kind', *fields])}) "
+                    f"SELECT %s, %s, {', '.join(qn(f'counted_{field}') for field in fields)} FROM ({sql}) counts",
+                    [project_id, kind, *params],
+                )
+                count += cursor.rowcount
+            ProjectStatistics.objects.update_or_create(project_id=project_id, defaults={"rebuilt_at": timezone.now()})
+        return count
+
+    def covering(
+        self,
+        project_ids: List[int],
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+    ) -> Optional[QuerySet]:
+        """Returns the statistics of the labels of the projects made between the dates, both included.
+
+        Returns None if the statistics can't count them exactly, i.e. if a project hasn't been rebuilt yet,
+        or if a date doesn't fall on a day boundary in UTC, as 2023-01-01T00:00:00Z and 2023-01-31T23:59:59.999999Z do.
+        """
+        project_ids = set(project_ids)
+        if ProjectStatistics.objects.filter(project_id__in=project_ids).count() != len(project_ids):
+            return None
+        queryset = self.filter(project_id__in=project_ids, count__gt=0)
+        if date_from is not None:
+            date_from = to_utc(date_from)
+            if date_from.time() != datetime.time.min:
+                return None
+            queryset = queryset.filter(day__gte=date_from.date())
+        if date_to is not None:
+            date_to = to_utc(date_to)
+            if date_to.time() != datetime.time.max:
+                return None
+            queryset = queryset.filter(day__lte=date_to.date())
+        return queryset
+
+    def label_texts(self, keys: Iterable[Tuple[str, int]]) -> Dict[Tuple[str, int], str]:
+        """Returns the texts of the label types, by their kind and id."""
+        type_ids = defaultdict(set)
+        for kind, type_id in keys:
+            type_ids[kind].add(type_id)
+        texts = {}
+        for label_model, (kind, type_field) in LABEL_MODELS.items():
+            if type_field is None or not type_ids[kind]:
+                continue
+            type_model = label_model._meta.get_field(type_field).related_model
+            for type_id, text in type_model.objects.filter(id__in=type_ids[kind]).values_list("id", "text"):
+                texts[kind, type_id] = text
+        return texts
+
+
+class LabelStatistics(models.Model):
+    """The number of labels of a type a user made in a dataset of a project on a day, in UTC.
+
+    It's a rollup of the label tables, so that reports don't scan them. It's kept up to date as labels are saved,
+    counted in by imports and the auto labeling, which don't send signals, counted out by the views that delete
+    labels, examples or label types, and rebuilt every night. Changes in the admin mark the project stale.
+    """
+
+    objects = LabelStatisticsManager()
+
+    project = models.ForeignKey(to=Project, on_delete=models.CASCADE, related_name="label_statistics")
+    user = models.ForeignKey(to=User, on_delete=models.CASCADE, related_name="label_statistics")
+    kind = models.CharField(max_length=16, choices=LabelKind.choices)
+    # The id of the CategoryType, SpanType or RelationType, depending on the kind. 0 for text labels.
+    label_type_id = models.IntegerField(default=0)
+    # The upload name of the examples.
+    dataset = models.CharField(max_length=512, blank=True)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+    # They are not moved when labels are deleted, until the next rebuild.
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["project", "user", "kind", "label_type_id", "dataset", "day"], name="label_statistics_key"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.project_id} {self.user_id} {self.kind} {self.label_type_id} {self.day}: {self.count}"
+
+
+class ProjectStatistics(models.Model):
+    """Tells that the label statistics of a project have been rebuilt, so that they count all its labels."""
+
+    project = models.OneToOneField(to=Project, on_delete=models.CASCADE, primary_key=True, related_name="statistics")
+    rebuilt_at = models.DateTimeField()
@@ -0,0 +1,60 @@
+from typing import Optional
+
+from django.db.models.signals import post_save, pre_save
+
+from .models import LABEL_MODELS, LabelStatistics
+from examples.models import Example
+
+
+def _count(label, label_type_id: Optional[int], count: int):
+    kind, _ = LABEL_MODELS[type(label)]
+    example = label._state.fields_cache.get("example")
+    if example is None:
+        example = Example.objects.only("project_id", "upload_name").get(pk=label.example_id)
+    LabelStatistics.objects.add(
+        example.project_id, label.user_id, kind, label_type_id, example.upload_name, label.created_at, count
+    )
+
+
+def _label_type_id(label) -> Optional[int]:
+    _, type_field = LABEL_MODELS[type(label)]
+    return getattr(label, f"{type_field}_id") if type_field else None
+
+
+def label_changing(sender, instance, raw, update_fields, **kwargs):
+    # Only the label type of a saved label can change, e.g. when a category is edited.
+    instance._previous_label_type_id = None
+    _, type_field = LABEL_MODELS[sender]
+    if raw or instance._state.adding or type_field is None:
+        return
+    if update_fields is not None and type_field not in update_fields and f"{type_field}_id" not in update_fields:
+        return
+    instance._previous_label_type_id = (
+        sender.objects.filter(pk=instance.pk).values_list(f"{type_field}_id", flat=True).first()
+    )
+
+
+def label_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        _count(instance, _label_type_id(instance), 1)
+        return
+    previous = getattr(instance, "_previous_label_type_id", None)
+    if previous is not None and previous != _label_type_id(instance):
+        _count(instance, previous, -1)
+        _count(instance, _label_type_id(instance), 1)
+
+
+def connect():
+    """Keeps the label statistics up to date as labels are saved one by one.
+
+    There are no delete receivers on purpose: they would stop Django from deleting the labels of examples
+    or projects without loading them. Deleted labels are counted out by `LabelStatistics.objects.remove`
+    instead. The labels made by `bulk_create`, e.g. by imports and the auto labeling, are counted in by
+    `LabelStatistics.objects.add_labels`. The labels are counted in the transaction that saves them,
+    if there is one, so that a rebuild at the same time doesn't count them twice.
+    """
+    for label_model in LABEL_MODELS:
+        pre_save.connect(label_changing, sender=label_model, dispatch_uid=f"label_statistics_{label_model.__name__}")
+        post_save.connect(label_saved, sender=label_model, dispatch_uid=f"label_statistics_{label_model.__name__}")
@@ -1,10 +1,23 @@
+import datetime
+import threading
+
+from django.contrib import admin
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from api.tests.utils import CRUDMixin
+from auto_labeling.pipeline.labels import Categories
+from examples.models import Example
 from examples.tests.utils import make_doc
+from label_types.models import SpanType
 from label_types.tests.utils import make_label
+from labels.models import Category
+from metrics.celery_tasks import rebuild_label_statistics
+from metrics.models import LabelKind, LabelStatistics, ProjectStatistics
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -78,3 +91,169 @@ class TestCategoryDistribution(CRUDMixin):
         expected = {member.username: {self.label.text: 0} for member in self.project.members}
         expected[self.project.admin.username][self.label.text] = 1
         self.assertEqual(response.data, expected)
+
+
+class TestLabelStatistics(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.positive = make_label(self.project.item, text="positive")
+        self.negative = make_label(self.project.item, text="negative")
+        self.user = self.project.annotator
+
+    def make_category(self, label, user=None):
+        return mommy.make("Category", example=self.example, label=label, user=user or self.user)
+
+    def delete(self, labels):
+        LabelStatistics.objects.remove(labels)
+        labels.delete()
+
+    def count(self, label):
+        statistics = LabelStatistics.objects.filter(project=self.project.item, kind=LabelKind.CATEGORY)
+        return sum(statistics.filter(label_type_id=label.id).values_list("count", flat=True))
+
+    def test_count_created_labels(self):
+        category = self.make_category(self.positive)
+        self.make_category(self.positive, user=self.project.admin)
+        statistics = LabelStatistics.objects.get(user=self.user)
+        self.assertEqual(statistics.count, 1)
+        self.assertEqual(statistics.label_type_id, self.positive.id)
+        self.assertEqual(statistics.dataset, self.example.upload_name)
+        self.assertEqual(statistics.day, category.created_at.astimezone(datetime.timezone.utc).date())
+        self.assertEqual(statistics.first_created_at, category.created_at)
+        self.assertEqual(self.count(self.positive), 2)
+
+    def test_count_out_deleted_labels(self):
+        category = self.make_category(self.positive)
+        self.make_category(self.positive, user=self.project.admin)
+        self.make_category(self.negative)
+        self.delete(Category.objects.filter(pk=category.pk))
+        self.assertEqual(self.count(self.positive), 1)
+        self.assertEqual(self.count(self.negative), 1)
+
+    def test_count_out_relations_of_deleted_spans(self):
+        span_type = mommy.make("SpanType", project=self.project.item)
+        relation_type = mommy.make("RelationType", project=self.project.item)
+        spans = [
+            mommy.make("Span", example=self.example, label=span_type, user=self.user, start_offset=i, end_offset=i + 1)
+            for i in range(2)
+        ]
+        mommy.make("Relation", example=self.example, from_id=spans[0], to_id=spans[1], type=relation_type)
+        LabelStatistics.objects.remove_label_types(SpanType.objects.filter(pk=span_type.pk))
+        span_type.delete()
+        statistics = LabelStatistics.objects.filter(project=self.project.item)
+        self.assertEqual(dict(statistics.values_list("kind", "count")), {LabelKind.SPAN: 0, LabelKind.RELATION: 0})
+
+    def test_move_changed_labels(self):
+        category = self.make_category(self.positive)
+        category.label = self.negative
+        category.save()
+        self.assertEqual(self.count(self.positive), 0)
+        self.assertEqual(self.count(self.negative), 1)
+
+    def test_count_out_labels_of_deleted_examples(self):
+        self.make_category(self.positive)
+        self.make_category(self.negative)
+        examples = Example.objects.filter(pk=self.example.pk)
+        LabelStatistics.objects.remove_examples(examples)
+        examples.delete()
+        self.assertEqual(self.count(self.positive), 0)
+        self.assertEqual(self.count(self.negative), 0)
+
+    def test_delete_examples_without_loading_labels(self):
+        def count_queries():
+            examples = Example.objects.filter(project=self.project.item)
+            with CaptureQueriesContext(connection) as context:
+                examples.delete()
+            return len(context.captured_queries)
+
+        self.make_category(self.positive)
+        few = count_queries()
+        self.example = make_doc(self.project.item)
+        for user in self.project.members:
+            self.make_category(self.positive, user=user)
+            self.make_category(self.negative, user=user)
+        self.assertEqual(count_queries(), few)
+
+    def test_count_auto_labeled_labels(self):
+        Categories([{"label": "positive"}, {"label": "negative"}]).save(self.project.item, self.example, self.user)
+        self.assertEqual(self.count(self.positive), 1)
+        self.assertEqual(self.count(self.negative), 1)
+
+    def test_admin_changes_mark_project_stale(self):
+        category = self.make_category(self.positive)
+        LabelStatistics.objects.rebuild(self.project.id)
+        admin.site._registry[Category].delete_queryset(None, Category.objects.filter(pk=category.pk))
+        self.assertIsNone(LabelStatistics.objects.covering([self.project.id]))
+        LabelStatistics.objects.rebuild(self.project.id)
+        self.assertEqual(LabelStatistics.objects.covering([self.project.id]).count(), 0)
+
+    def test_delete_project(self):
+        self.make_category(self.positive)
+        self.project.item.delete()
+        self.assertFalse(LabelStatistics.objects.exists())
+
+    def test_roll_back_with_labels(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.make_category(self.positive)
+            raise RuntimeError
+        self.assertEqual(self.count(self.positive), 0)
+
+    def test_rebuild_counts_the_same(self):
+        self.make_category(self.positive)
+        self.make_category(self.positive, user=self.project.admin)
+        self.delete(Category.objects.filter(pk=self.make_category(self.negative).pk))
+        fields = ["user", "kind", "label_type_id", "dataset", "day", "count", "first_created_at", "last_created_at"]
+        expected = list(LabelStatistics.objects.filter(count__gt=0).order_by("user").values(*fields))
+        rebuild_label_statistics([self.project.id])
+        self.assertEqual(list(LabelStatistics.objects.order_by("user").values(*fields)), expected)
+        self.assertTrue(ProjectStatistics.objects.filter(project=self.project.item).exists())
+
+    def test_cover_only_rebuilt_projects_on_day_boundaries(self):
+        category = self.make_category(self.positive)
+        self.assertIsNone(LabelStatistics.objects.covering([self.project.id]))
+        LabelStatistics.objects.rebuild(self.project.id)
+        self.assertEqual(LabelStatistics.objects.covering([self.project.id]).count(), 1)
+        day = datetime.datetime.combine(category.created_at.date(), datetime.time.min, tzinfo=datetime.timezone.utc)
+        next_day = day + datetime.timedelta(days=1)
+        self.assertIsNone(
+            LabelStatistics.objects.covering([self.project.id], date_from=day + datetime.timedelta(hours=1))
+        )
+        self.assertIsNone(LabelStatistics.objects.covering([self.project.id], date_to=next_day))
+        statistics = LabelStatistics.objects.covering([self.project.id], date_from=next_day)
+        self.assertEqual(statistics.count(), 0)
+        statistics = LabelStatistics.objects.covering(
+            [self.project.id], date_from=day, date_to=next_day - datetime.timedelta(microseconds=1)
+        )
+        self.assertEqual(statistics.count(), 1)
+
+
+class TestRebuildLock(TransactionTestCase):
+    def test_rebuild_waits_for_labels_being_saved(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        example = make_doc(project.item)
+        label = make_label(project.item)
+        saved, release = threading.Event(), threading.Event()
+
+        def save():
+            with transaction.atomic():
+                mommy.make("Category", example=example, label=label, user=project.annotator)
+                saved.set()
+                release.wait(10)
+            connection.close()
+
+        def rebuild():
+            LabelStatistics.objects.rebuild(project.id)
+            connection.close()
+
+        saving = threading.Thread(target=save)
+        saving.start()
+        saved.wait(10)
+        rebuilding = threading.Thread(target=rebuild)
+        rebuilding.start()
+        rebuilding.join(1)
+        self.assertTrue(rebuilding.is_alive())
+        release.set()
+        saving.join()
+        rebuilding.join()
+        self.assertEqual(LabelStatistics.objects.get().count, 1)
@@ -0,0 +1,66 @@
+import datetime
+import os
+from typing import Any, Dict
+
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.utils.log import get_task_logger
+from django.conf import settings
+
+from .exports import (
+    data_version,
+    expire_exports,
+    export_path,
+    render_export,
+    save_export,
+)
+
+logger = get_task_logger(__name__)
+
+
+@shared_task(
+    soft_time_limit=settings.REPORT_EXPORT_SOFT_TIME_LIMIT,
+    time_limit=settings.REPORT_EXPORT_TIME_LIMIT,
+)
+def export_report(report: str, export_format: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Exportar o relatório em CSV ou PDF para um ficheiro, ou reutilizar o ficheiro se já foi exportado
+
+    Args:
+        report: o nome do relatório, annotators ou annotations
+        export_format: csv ou pdf
+        params: os parâmetros normalizados do relatório
+    """
+    # A versão é lida antes do relatório, para que as alterações feitas entretanto gerem outra exportação
+    version = data_version(params["project_ids"])
+    filename = export_path(report, export_format, params, version)
+    try:
+        # Marcar a exportação como usada, para que não expire
+        os.utime(filename)
+        cached = True
+    except FileNotFoundError:
+        cached = False
+    if cached:
+        logger.info(f"Relatório {report} em {export_format} servido da cache: {filename}")
+    else:
+        try:
+            content = render_export(report, export_format, params)
+        except SoftTimeLimitExceeded:
+            logger.error(f"Exportação do relatório {report} em {export_format} excedeu o tempo limite: {params}")
+            raise
+        save_export(filename, content)
+    # Só o nome do ficheiro, porque o resultado é mostrado a quem consulta o estado da tarefa
+    return {
+        "filename": os.path.basename(filename),
+        "report": report,
+        "export_format": export_format,
+        "project_ids": params["project_ids"],
+        "cached": cached,
+    }
+
+
+@shared_task
+def expire_report_exports() -> int:
+    """Apagar as exportações que não foram usadas há mais de REPORT_EXPORT_MAX_AGE_DAYS dias"""
+    removed = expire_exports(datetime.timedelta(days=settings.REPORT_EXPORT_MAX_AGE_DAYS))
+    logger.info(f"{removed} exportações de relatórios expiradas")
+    return removed
@@ -0,0 +1,170 @@
+import datetime
+import glob
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .renderers import (
+    render_annotations_csv,
+    render_annotations_pdf,
+    render_annotators_csv,
+    render_annotators_pdf,
+)
+from .serializers import (
+    AnnotationReportFilterSerializer,
+    AnnotatorReportFilterSerializer,
+)
+from .services import AnnotationReportService, AnnotatorReportService
+from examples.models import Comment, Example, ExampleState
+from label_types.models import CategoryType, RelationType, SpanType
+from labels.models import Category, Relation, Span, TextLabel
+from projects.models import Answer, Member, Project, Question
+
+# Os filtros cuja ordem não muda o relatório, que são ordenados para terem a mesma chave
+UNORDERED_PARAMS = {
+    "user_ids",
+    "example_ids",
+    "label_ids",
+    "perspective_ids",
+    "dataset_names",
+    "perspective_question_ids",
+    "perspective_answer_ids",
+}
+
+# Os modelos dos quais os relatórios dependem, com o campo do projeto e um campo que muda quando são alterados.
+# As perguntas e as respostas não têm data de alteração, pelo que só se deteta quando são criadas ou apagadas.
+VERSIONED_MODELS = [
+    (Project, "id", "updated_at"),
+    (Member, "project_id", "updated_at"),
+    (Example, "project_id", "updated_at"),
+    (ExampleState, "example__project_id", "confirmed_at"),
+    (Comment, "example__project_id", "updated_at"),
+    (CategoryType, "project_id", "updated_at"),
+    (SpanType, "project_id", "updated_at"),
+    (RelationType, "project_id", "updated_at"),
+    (Category, "example__project_id", "updated_at"),
+    (Span, "example__project_id", "updated_at"),
+    (Relation, "example__project_id", "updated_at"),
+    (TextLabel, "example__project_id", "updated_at"),
+    (Question, "perspective__project_id", "id"),
+    (Answer, "member__project_id", "id"),
+]
+
+
+def normalize_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Retorna os filtros validados num dicionário JSON, com a mesma forma para os mesmos filtros
+
+    Os filtros vazios são omitidos, e as listas cuja ordem não importa são ordenadas e sem repetidos.
+    A ordem dos projetos mantém-se, porque o primeiro dá o nome do projeto do relatório.
+    """
+    normalized = {}
+    for name, value in sorted(params.items()):
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, datetime.datetime):
+            value = value.isoformat()
+        elif name in UNORDERED_PARAMS:
+            value = sorted(set(value))
+        normalized[name] = value
+    return normalized
+
+
+def data_version(project_ids: List[int]) -> str:
+    """Retorna a versão dos dados dos projetos, que muda quando algum dado dos relatórios é criado, alterado ou apagado
+
+    É o número de registos e a última alteração de cada modelo, pelo que custa uma query agregada por modelo,
+    muito menos do que gerar o relatório.
+    """
+    state = [
+        model.objects.filter(**{f"{project_field}__in": project_ids}).aggregate(
+            count=Count("pk"), changed=Max(changed_field)
+        )
+        for model, project_field, changed_field in VERSIONED_MODELS
+    ]
+    return hashlib.sha256(json.dumps(state, default=str).encode()).hexdigest()[:16]
+
+
+def export_directory() -> str:
+    return os.path.join(settings.MEDIA_ROOT, "reports")
+
+
+def export_path(report: str, export_format: str, params: Dict[str, Any], version: str) -> str:
+    """Retorna o ficheiro da exportação do relatório com os parâmetros normalizados, na versão dos dados"""
+    key = hashlib.sha256(json.dumps([report, export_format, params], sort_keys=True).encode()).hexdigest()
+    return os.path.join(export_directory(), f"{key}-{version}.{export_format}")
+
+
+def save_export(filename: str, content: bytes):
+    """Guarda a exportação, e apaga as exportações do mesmo relatório em versões anteriores dos dados"""
+    directory, name = os.path.split(filename)
+    os.makedirs(directory, exist_ok=True)
+    # Escrever num ficheiro temporário, para que um download em simultâneo não leia um ficheiro incompleto
+    temporary = os.path.join(directory, f".{uuid.uuid4()}.tmp")
+    with open(temporary, "wb") as f:
+        f.write(content)
+    os.replace(temporary, filename)
+    key, extension = name.split("-")[0], os.path.splitext(name)[1]
+    for previous in glob.glob(os.path.join(directory, f"{key}-*{extension}")):
+        if previous != filename:
+            os.remove(previous)
+
+
+def expire_exports(max_age: datetime.timedelta) -> int:
+    """Apaga as exportações que não foram usadas há mais de max_age, e retorna quantas foram apagadas
+
+    A data de alteração dos ficheiros é atualizada quando são servidos da cache, pelo que só expiram
+    as exportações que ninguém descarregou nesse tempo, incluindo as de relatórios que não voltaram a ser pedidos.
+    """
+    directory = export_directory()
+    if not os.path.isdir(directory):
+        return 0
+    oldest = time.time() - max_age.total_seconds()
+    removed = 0
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.stat().st_mtime < oldest:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Já foi substituída por uma exportação mais recente
+                continue
+            removed += 1
+    return removed
+
+
+def generate_annotators_report(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Gera o relatório sobre anotadores com os parâmetros normalizados"""
+    serializer = AnnotatorReportFilterSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    return AnnotatorReportService.get_report(**serializer.validated_data)
+
+
+def generate_annotations_report(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Gera o relatório de anotações com os parâmetros normalizados, até max_results anotações"""
+    params = dict(params)
+    max_results = params.pop("max_results")
+    serializer = AnnotationReportFilterSerializer(data=params)
+    serializer.is_valid(raise_exception=True)
+    return AnnotationReportService.get_report(**serializer.validated_data, page=1, page_size=max_results)
+
+
+# Os relatórios exportados, pelo nome nas tarefas, com a função que gera os dados e as que os renderizam por formato
+REPORT_EXPORTS: Dict[str, Any] = {
+    "annotators": (generate_annotators_report, {"csv": render_annotators_csv, "pdf": render_annotators_pdf}),
+    "annotations": (generate_annotations_report, {"csv": render_annotations_csv, "pdf": render_annotations_pdf}),
+}
+
+
+def render_export(report: str, export_format: str, params: Dict[str, Any]) -> bytes:
+    """Gera o relatório e retorna o ficheiro exportado no formato"""
+    generate, renderers = REPORT_EXPORTS[report]
+    # Os ficheiros mostram os filtros aplicados como na query string, que é refeita dos parâmetros normalizados
+    query_params = {
+        name: ",".join(map(str, value)) if isinstance(value, list) else str(value) for name, value in params.items()
+    }
+    return renderers[export_format](generate(params), query_params)
@@ -1,13 +1,25 @@
-from typing import Dict, List, Optional, Any
-from django.db.models import Count, Q, Min, Max, Avg, Case, When, IntegerField
+import logging
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+from django.db import connection
+from django.db.models import Count, Q, Min, Max, Avg, Case, When, IntegerField, QuerySet, Sum
+from django.db.models.functions import Substr
 from django.contrib.auth.models import User
 from django.utils import timezone
 from collections import defaultdict
 
+from labels.discrepancies import find_discrepant_examples
 from labels.models import Category, Span, TextLabel, Relation
 from projects.models import Project, Member, Question, Answer
 from label_types.models import CategoryType, SpanType, RelationType
 from examples.models import Example
+from metrics.models import LabelKind, LabelStatistics
+
+logger = logging.getLogger(__name__)
+
+# O número de anotações lidas de cada vez do cursor do servidor
+ANNOTATION_CHUNK_SIZE = 2000
+# O número de caracteres do texto do exemplo usados como nome, se não tiver ficheiro
+EXAMPLE_NAME_LENGTH = 50
 
 
 class AnnotatorReportService:
@@ -43,24 +55,30 @@ class AnnotatorReportService:
             Dicionário com summary e data do relatório
         """
         
+        # Usar as estatísticas de rótulos em vez das tabelas de rótulos, se as puderem contar
+        statistics = LabelStatistics.objects.covering(project_ids, date_from, date_to)
+
         # Obter dados agregados por utilizador
         annotator_data = AnnotatorReportService._get_annotator_data(
-            project_ids, user_ids, date_from, date_to, label_ids, perspective_ids, dataset_names, perspective_question_ids, perspective_answer_ids
+            project_ids, user_ids, date_from, date_to, label_ids, perspective_ids, dataset_names, perspective_question_ids, perspective_answer_ids,
+            statistics
         )
         
-        # Calcular breakdown de rótulos para cada anotador
+        # Calcular os breakdowns de todos os anotadores de uma vez
+        annotator_ids = [annotator['annotator_id'] for annotator in annotator_data]
+        label_breakdowns, dataset_label_breakdowns = AnnotatorReportService._get_label_breakdowns(
+            annotator_ids, project_ids, date_from, date_to, label_ids, dataset_names, statistics
+        )
+        questions_answers = AnnotatorReportService._get_perspective_questions_answers(
+            annotator_ids, project_ids, perspective_question_ids, perspective_answer_ids
+        )
         for annotator in annotator_data:
-            annotator['label_breakdown'] = AnnotatorReportService._get_label_breakdown(
-                annotator['annotator_id'], project_ids, date_from, date_to, label_ids, perspective_ids, dataset_names, perspective_question_ids, perspective_answer_ids
-            )
+            annotator_id = annotator['annotator_id']
+            annotator['label_breakdown'] = label_breakdowns.get(annotator_id, {})
             # Adicionar informação detalhada sobre labels por dataset
-            annotator['dataset_label_breakdown'] = AnnotatorReportService._get_dataset_label_breakdown(
-                annotator['annotator_id'], project_ids, date_from, date_to, label_ids, perspective_ids, dataset_names, perspective_question_ids, perspective_answer_ids
-            )
+            annotator['dataset_label_breakdown'] = dataset_label_breakdowns.get(annotator_id, {})
             # Adicionar informações sobre perguntas e respostas das perspectivas
-            annotator['perspective_questions_answers'] = AnnotatorReportService._get_perspective_questions_answers(
-                annotator['annotator_id'], project_ids, perspective_question_ids, perspective_answer_ids
-            )
+            annotator['perspective_questions_answers'] = questions_answers[annotator_id]
         
         # Calcular resumo geral
         summary = AnnotatorReportService._calculate_summary(
@@ -84,9 +102,10 @@ class AnnotatorReportService:
         perspective_ids: Optional[List[int]] = None,
         dataset_names: Optional[List[str]] = None,
         perspective_question_ids: Optional[List[int]] = None,
-        perspective_answer_ids: Optional[List[int]] = None
+        perspective_answer_ids: Optional[List[int]] = None,
+        statistics: Optional[QuerySet] = None
     ) -> List[Dict[str, Any]]:
-        """Obter dados agregados por anotador"""
+        """Obter dados agregados por anotador, das estatísticas de rótulos se forem dadas"""
         
         # Base query para filtrar por projeto
         base_filter = Q(example__project_id__in=project_ids)
@@ -97,9 +116,12 @@ class AnnotatorReportService:
         if date_to:
             base_filter &= Q(created_at__lte=date_to)
         
+        # Os filtros de utilizadores ficam à parte, para filtrar também as estatísticas
+        user_filter = Q()
+
         # Aplicar filtro de utilizadores
         if user_ids:
-            base_filter &= Q(user_id__in=user_ids)
+            user_filter &= Q(user_id__in=user_ids)
         
         # Filtrar apenas anotadores (excluir admins)
         from django.conf import settings
@@ -109,7 +131,7 @@ class AnnotatorReportService:
         ).values_list('user_id', flat=True).distinct()
         
         if annotator_user_ids:
-            base_filter &= Q(user_id__in=annotator_user_ids)
+            user_filter &= Q(user_id__in=annotator_user_ids)
         
         # Aplicar filtro de datasets
         if dataset_names:
@@ -124,7 +146,7 @@ class AnnotatorReportService:
             ).values_list('user_id', flat=True)
             
             if perspective_user_ids:
-                base_filter &= Q(user_id__in=perspective_user_ids)
+                user_filter &= Q(user_id__in=perspective_user_ids)
             else:
                 # Se não há utilizadores nas perspectivas especificadas, retornar vazio
                 return []
@@ -159,7 +181,7 @@ class AnnotatorReportService:
             print(f"[DEBUG] SQL Query: {query.query}")
             
             if question_user_ids:
-                base_filter &= Q(user_id__in=question_user_ids)
+                user_filter &= Q(user_id__in=question_user_ids)
                 print(f"[DEBUG] Filtro aplicado com {len(question_user_ids)} utilizadores")
             else:
                 # Se não há utilizadores que responderam às perguntas especificadas, retornar vazio
@@ -178,13 +200,73 @@ class AnnotatorReportService:
             print(f"[DEBUG] Utilizadores que deram as respostas: {list(answer_user_ids)}")
             
             if answer_user_ids:
-                base_filter &= Q(user_id__in=answer_user_ids)
+                user_filter &= Q(user_id__in=answer_user_ids)
                 print(f"[DEBUG] Filtro aplicado com {len(answer_user_ids)} utilizadores")
             else:
                 # Se não há utilizadores que deram as respostas especificadas, retornar vazio
                 print(f"[DEBUG] Nenhum utilizador encontrado para as respostas especificadas")
                 return []
         
+        # Obter os anotadores das estatísticas se estiverem completas, sem percorrer as tabelas de rótulos
+        if statistics is not None:
+            all_data = AnnotatorReportService._get_annotators_from_statistics(
+                statistics, user_filter, label_ids, dataset_names
+            )
+        else:
+            all_data = AnnotatorReportService._get_annotators_from_labels(base_filter & user_filter, label_ids)
+        
+        # Consolidar dados por utilizador
+        user_data = defaultdict(lambda: {
+            'annotator_id': None,
+            'annotator_username': '',
+            'annotator_name': '',
+            'project_name': '',
+            'project_id': None
+        })
+        
+        # Obter informações dos projetos
+        projects_info = {}
+        for project_id in project_ids:
+            try:
+                project = Project.objects.get(id=project_id)
+                projects_info[project_id] = {
+                    'name': project.name,
+                    'id': project_id
+                }
+            except Project.DoesNotExist:
+                projects_info[project_id] = {
+                    'name': f"Projeto {project_id}",
+                    'id': project_id
+                }
+        
+        # Usar o primeiro projeto como referência para o nome do projeto
+        first_project = list(projects_info.values())[0] if projects_info else {'name': 'N/A', 'id': None}
+        
+        # Processar todos os dados para obter informações básicas dos utilizadores
+        for item in all_data:
+            user_id = item['user_id']
+            user_data[user_id].update({
+                'annotator_id': user_id,
+                'annotator_username': item['user__username'],
+                'annotator_name': AnnotatorReportService._format_user_name(
+                    item['user__first_name'], item['user__last_name'], item['user__username']
+                ),
+                'project_name': first_project['name'],
+                'project_id': first_project['id']
+            })
+        
+        # Converter para lista
+        result = list(user_data.values())
+        
+        # Ordenar por nome do utilizador
+        result.sort(key=lambda x: x['annotator_username'])
+        
+        return result
+
+    @staticmethod
+    def _get_annotators_from_labels(base_filter: Q, label_ids: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Obter os anotadores com rótulos das tabelas de rótulos"""
+
         # Obter dados de Categories
         categories_filter = base_filter
         if label_ids:
@@ -251,366 +333,141 @@ class AnnotatorReportService:
             .values('user_id', 'user__username', 'user__first_name', 'user__last_name', 'user__email')
             .annotate(relations_count=Count('id'))
         )
-        
-        # Consolidar dados por utilizador
-        user_data = defaultdict(lambda: {
-            'annotator_id': None,
-            'annotator_username': '',
-            'annotator_name': '',
-            'project_name': '',
-            'project_id': None
-        })
-        
-        # Obter informações dos projetos
-        projects_info = {}
-        for project_id in project_ids:
-            try:
-                project = Project.objects.get(id=project_id)
-                projects_info[project_id] = {
-                    'name': project.name,
-                    'id': project_id
-                }
-            except Project.DoesNotExist:
-                projects_info[project_id] = {
-                    'name': f"Projeto {project_id}",
-                    'id': project_id
-                }
-        
-        # Usar o primeiro projeto como referência para o nome do projeto
-        first_project = list(projects_info.values())[0] if projects_info else {'name': 'N/A', 'id': None}
-        
-        # Processar todos os dados para obter informações básicas dos utilizadores
-        all_data = list(categories_data) + list(spans_data) + list(texts_data) + list(relations_data)
-        
-        for item in all_data:
-            user_id = item['user_id']
-            user_data[user_id].update({
-                'annotator_id': user_id,
-                'annotator_username': item['user__username'],
-                'annotator_name': AnnotatorReportService._format_user_name(
-                    item['user__first_name'], item['user__last_name'], item['user__username']
-                ),
-                'project_name': first_project['name'],
-                'project_id': first_project['id']
-            })
-        
-        # Converter para lista
-        result = list(user_data.values())
-        
-        # Ordenar por nome do utilizador
-        result.sort(key=lambda x: x['annotator_username'])
-        
-        return result
+
+        return list(categories_data) + list(spans_data) + list(texts_data) + list(relations_data)
 
     @staticmethod
-    def _get_label_breakdown(
-        user_id: int,
+    def _get_annotators_from_statistics(
+        statistics: QuerySet,
+        user_filter: Q,
+        label_ids: Optional[List[int]] = None,
+        dataset_names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Obter os anotadores com rótulos das estatísticas de rótulos"""
+        statistics_filter = user_filter
+        if dataset_names:
+            statistics_filter &= Q(dataset__in=dataset_names)
+        if label_ids:
+            # TextLabels não têm labels específicos, então se label_ids está definido, excluir
+            statistics_filter &= Q(label_type_id__in=label_ids) & ~Q(kind=LabelKind.TEXT)
+        return list(
+            statistics
+            .filter(statistics_filter)
+            .values('user_id', 'user__username', 'user__first_name', 'user__last_name', 'user__email')
+            .distinct()
+        )
+
+    @staticmethod
+    def _get_label_breakdowns(
+        user_ids: List[int],
         project_ids: List[int],
         date_from: Optional[timezone.datetime] = None,
         date_to: Optional[timezone.datetime] = None,
         label_ids: Optional[List[int]] = None,
-        perspective_ids: Optional[List[int]] = None,
         dataset_names: Optional[List[str]] = None,
-        perspective_question_ids: Optional[List[int]] = None,
-        perspective_answer_ids: Optional[List[int]] = None
-    ) -> Dict[str, int]:
-        """Obter breakdown de rótulos para um utilizador específico"""
-        
-        try:
-            base_filter = Q(user_id=user_id, example__project_id__in=project_ids)
-            
-            if date_from:
-                base_filter &= Q(created_at__gte=date_from)
-            if date_to:
-                base_filter &= Q(created_at__lte=date_to)
-            
-            # Aplicar filtro de datasets
-            if dataset_names:
-                base_filter &= Q(example__upload_name__in=dataset_names)
-            
-            # Aplicar filtro de perspectivas - verificar se o utilizador pertence às perspectivas especificadas
-            if perspective_ids:
-                # Verificar se o utilizador pertence a alguma das perspectivas especificadas
-                user_in_perspectives = Member.objects.filter(
-                    user_id=user_id,
-                    perspective_id__in=perspective_ids,
-                    project_id__in=project_ids
-                ).exists()
-                
-                if not user_in_perspectives:
-                    # Se o utilizador não pertence às perspectivas especificadas, retornar vazio
-                    return {}
-            
-            # Aplicar filtro de perguntas da perspectiva
-            if perspective_question_ids:
-                # Obter os utilizadores que responderam às perguntas especificadas
-                question_members = Member.objects.filter(
-                    user_id=user_id,
-                    project_id__in=project_ids,
-                    answer__question_id__in=perspective_question_ids
-                ).values_list('user_id', flat=True).distinct()
-                
-                if user_id not in question_members:
-                    return {}
-            
-            # Aplicar filtro de respostas da perspectiva
-            if perspective_answer_ids:
-                # Obter os utilizadores que deram as respostas especificadas
-                answer_members = Member.objects.filter(
-                    user_id=user_id,
-                    project_id__in=project_ids,
-                    answer__id__in=perspective_answer_ids
-                ).values_list('user_id', flat=True).distinct()
-                
-                if user_id not in answer_members:
-                    return {}
-            
-            breakdown = {}
-            
-            # Categories breakdown
-            try:
-                category_filter = base_filter
-                if label_ids:
-                    category_type_ids = CategoryType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if category_type_ids:
-                        category_filter &= Q(label_id__in=category_type_ids)
-                    else:
-                        category_filter = Q(pk__isnull=True)
-                
-                categories = (
-                    Category.objects
-                    .filter(category_filter)
-                    .values('label__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in categories:
-                    label_text = item.get('label__text')
-                    count = item.get('count', 0)
-                    if label_text and count > 0:
-                        breakdown[label_text] = count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar categories breakdown: {e}")
-            
-            # Spans breakdown
-            try:
-                span_filter = base_filter
-                if label_ids:
-                    span_type_ids = SpanType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if span_type_ids:
-                        span_filter &= Q(label_id__in=span_type_ids)
-                    else:
-                        span_filter = Q(pk__isnull=True)
-                
-                spans = (
-                    Span.objects
-                    .filter(span_filter)
-                    .values('label__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in spans:
-                    label_text = item.get('label__text')
-                    count = item.get('count', 0)
-                    if label_text and count > 0:
-                        if label_text in breakdown:
-                            breakdown[label_text] += count
-                        else:
-                            breakdown[label_text] = count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar spans breakdown: {e}")
-            
-            # Relations breakdown
-            try:
-                relation_filter = base_filter
-                if label_ids:
-                    relation_type_ids = RelationType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if relation_type_ids:
-                        relation_filter &= Q(type_id__in=relation_type_ids)
-                    else:
-                        relation_filter = Q(pk__isnull=True)
-                
-                relations = (
-                    Relation.objects
-                    .filter(relation_filter)
-                    .values('type__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in relations:
-                    label_text = item.get('type__text')
-                    count = item.get('count', 0)
-                    if label_text and count > 0:
-                        if label_text in breakdown:
-                            breakdown[label_text] += count
-                        else:
-                            breakdown[label_text] = count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar relations breakdown: {e}")
-            
-            return breakdown
-            
-        except Exception as e:
-            print(f"[DEBUG] Erro geral em _get_label_breakdown: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
+        statistics: Optional[QuerySet] = None
+    ) -> Tuple[Dict[int, Dict[str, int]], Dict[int, Dict[str, Dict[str, int]]]]:
+        """
+        Obter o breakdown de rótulos e o breakdown por dataset de todos os anotadores
+
+        Faz uma query agrupada por utilizador, dataset e rótulo para cada modelo de rótulo,
+        e reparte os resultados em memória, pelo que o número de queries não depende do número de anotadores.
+        Os filtros de perspectivas, perguntas e respostas já foram aplicados ao escolher os anotadores.
+        Se forem dadas as estatísticas de rótulos, já filtradas por projeto e por data, são lidas em vez dos rótulos.
+
+        Returns:
+            Breakdown de rótulos e breakdown por dataset, por ID de utilizador
+        """
+        label_breakdowns = defaultdict(lambda: defaultdict(int))
+        dataset_breakdowns = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        if not user_ids:
+            return {}, {}
+
+        if statistics is not None:
+            rows = AnnotatorReportService._count_labels_from_statistics(statistics, user_ids, label_ids, dataset_names)
+        else:
+            rows = AnnotatorReportService._count_labels(
+                user_ids, project_ids, date_from, date_to, label_ids, dataset_names
+            )
+        for user_id, upload_name, label_text, count in rows:
+            if not label_text:
+                continue
+            label_breakdowns[user_id][label_text] += count
+            if upload_name:
+                dataset_breakdowns[user_id][upload_name][label_text] += count
+
+        return (
+            {user_id: dict(labels) for user_id, labels in label_breakdowns.items()},
+            {
+                user_id: {dataset: dict(labels) for dataset, labels in datasets.items()}
+                for user_id, datasets in dataset_breakdowns.items()
+            },
+        )
 
     @staticmethod
-    def _get_dataset_label_breakdown(
-        user_id: int,
+    def _count_labels(
+        user_ids: List[int],
         project_ids: List[int],
         date_from: Optional[timezone.datetime] = None,
         date_to: Optional[timezone.datetime] = None,
         label_ids: Optional[List[int]] = None,
-        perspective_ids: Optional[List[int]] = None,
-        dataset_names: Optional[List[str]] = None,
-        perspective_question_ids: Optional[List[int]] = None,
-        perspective_answer_ids: Optional[List[int]] = None
-    ) -> Dict[str, Dict[str, int]]:
-        """Obter breakdown detalhado de labels por dataset para o utilizador"""
-        
-        try:
-            base_filter = Q(user_id=user_id, example__project_id__in=project_ids)
-            
-            if date_from:
-                base_filter &= Q(created_at__gte=date_from)
-            if date_to:
-                base_filter &= Q(created_at__lte=date_to)
-            
-            # Aplicar filtro de datasets
-            if dataset_names:
-                base_filter &= Q(example__upload_name__in=dataset_names)
-            
-            # Aplicar filtro de perspectivas
-            if perspective_ids:
-                user_in_perspectives = Member.objects.filter(
-                    user_id=user_id,
-                    perspective_id__in=perspective_ids,
-                    project_id__in=project_ids
-                ).exists()
-                
-                if not user_in_perspectives:
-                    return {}
-            
-            # Aplicar filtro de perguntas da perspectiva
-            if perspective_question_ids:
-                # Obter os utilizadores que responderam às perguntas especificadas
-                question_members = Member.objects.filter(
-                    user_id=user_id,
-                    project_id__in=project_ids,
-                    answer__question_id__in=perspective_question_ids
-                ).values_list('user_id', flat=True).distinct()
-                
-                if user_id not in question_members:
-                    return {}
-            
-            # Aplicar filtro de respostas da perspectiva
-            if perspective_answer_ids:
-                # Obter os utilizadores que deram as respostas especificadas
-                answer_members = Member.objects.filter(
-                    user_id=user_id,
-                    project_id__in=project_ids,
-                    answer__id__in=perspective_answer_ids
-                ).values_list('user_id', flat=True).distinct()
-                
-                if user_id not in answer_members:
-                    return {}
-            
-            result = defaultdict(lambda: defaultdict(int))
-            
-            # Categories
-            try:
-                category_filter = base_filter
-                if label_ids:
-                    category_type_ids = CategoryType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if category_type_ids:
-                        category_filter &= Q(label_id__in=category_type_ids)
-                    else:
-                        category_filter = Q(pk__isnull=True)  # Não incluir se não há CategoryTypes nos label_ids
-                
-                categories = (
-                    Category.objects
-                    .filter(category_filter)
-                    .select_related('label', 'example')
-                    .values('example__upload_name', 'label__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in categories:
-                    upload_name = item.get('example__upload_name')
-                    label_text = item.get('label__text')
-                    count = item.get('count', 0)
-                    
-                    if upload_name and label_text and count > 0:
-                        result[upload_name][label_text] += count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar categories: {e}")
-            
-            # Spans
-            try:
-                span_filter = base_filter
-                if label_ids:
-                    span_type_ids = SpanType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if span_type_ids:
-                        span_filter &= Q(label_id__in=span_type_ids)
-                    else:
-                        span_filter = Q(pk__isnull=True)  # Não incluir se não há SpanTypes nos label_ids
-                
-                spans = (
-                    Span.objects
-                    .filter(span_filter)
-                    .select_related('label', 'example')
-                    .values('example__upload_name', 'label__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in spans:
-                    upload_name = item.get('example__upload_name')
-                    label_text = item.get('label__text')
-                    count = item.get('count', 0)
-                    
-                    if upload_name and label_text and count > 0:
-                        result[upload_name][label_text] += count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar spans: {e}")
-            
-            # Relations
-            try:
-                relation_filter = base_filter
-                if label_ids:
-                    relation_type_ids = RelationType.objects.filter(id__in=label_ids).values_list('id', flat=True)
-                    if relation_type_ids:
-                        relation_filter &= Q(type_id__in=relation_type_ids)
-                    else:
-                        relation_filter = Q(pk__isnull=True)  # Não incluir se não há RelationTypes nos label_ids
-                
-                relations = (
-                    Relation.objects
-                    .filter(relation_filter)
-                    .select_related('type', 'example')
-                    .values('example__upload_name', 'type__text')
-                    .annotate(count=Count('id'))
-                )
-                
-                for item in relations:
-                    upload_name = item.get('example__upload_name')
-                    type_text = item.get('type__text')
-                    count = item.get('count', 0)
-                    
-                    if upload_name and type_text and count > 0:
-                        result[upload_name][type_text] += count
-            except Exception as e:
-                print(f"[DEBUG] Erro ao processar relations: {e}")
-            
-            # Converter defaultdict para dict normal
-            return {dataset: dict(labels) for dataset, labels in result.items()}
-            
-        except Exception as e:
-            print(f"[DEBUG] Erro geral em _get_dataset_label_breakdown: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
+        dataset_names: Optional[List[str]] = None
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """Contar os rótulos por utilizador, dataset e rótulo nas tabelas de rótulos"""
+        base_filter = Q(user_id__in=user_ids, example__project_id__in=project_ids)
+        if date_from:
+            base_filter &= Q(created_at__gte=date_from)
+        if date_to:
+            base_filter &= Q(created_at__lte=date_to)
+        if dataset_names:
+            base_filter &= Q(example__upload_name__in=dataset_names)
+
+        label_models = [
+            (Category, CategoryType, 'label'),
+            (Span, SpanType, 'label'),
+            (Relation, RelationType, 'type'),
+        ]
+        for label_model, type_model, type_field in label_models:
+            label_filter = base_filter
+            if label_ids:
+                type_ids = list(type_model.objects.filter(id__in=label_ids).values_list('id', flat=True))
+                if not type_ids:
+                    # Se não há tipos deste modelo nos label_ids, não incluir os seus rótulos
+                    continue
+                label_filter &= Q(**{f'{type_field}_id__in': type_ids})
+
+            rows = (
+                label_model.objects
+                .filter(label_filter)
+                .values('user_id', 'example__upload_name', f'{type_field}__text')
+                .annotate(count=Count('id'))
+            )
+            for row in rows:
+                yield row['user_id'], row['example__upload_name'], row[f'{type_field}__text'], row['count']
+
+    @staticmethod
+    def _count_labels_from_statistics(
+        statistics: QuerySet,
+        user_ids: List[int],
+        label_ids: Optional[List[int]] = None,
+        dataset_names: Optional[List[str]] = None
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """Contar os rótulos por utilizador, dataset e rótulo nas estatísticas de rótulos"""
+        # Os TextLabels não entram nos breakdowns
+        statistics_filter = Q(user_id__in=user_ids) & ~Q(kind=LabelKind.TEXT)
+        if label_ids:
+            statistics_filter &= Q(label_type_id__in=label_ids)
+        if dataset_names:
+            statistics_filter &= Q(dataset__in=dataset_names)
+        rows = list(
+            statistics
+            .filter(statistics_filter)
+            .values('user_id', 'dataset', 'kind', 'label_type_id')
+            .annotate(count=Sum('count'))
+        )
+        label_texts = LabelStatistics.objects.label_texts((row['kind'], row['label_type_id']) for row in rows)
+        for row in rows:
+            yield row['user_id'], row['dataset'], label_texts.get((row['kind'], row['label_type_id'])), row['count']
 
     @staticmethod
     def _calculate_summary(
@@ -660,75 +517,56 @@ class AnnotatorReportService:
 
     @staticmethod
     def _get_perspective_questions_answers(
-        user_id: int,
+        user_ids: List[int],
         project_ids: List[int],
         perspective_question_ids: Optional[List[int]] = None,
         perspective_answer_ids: Optional[List[int]] = None
-    ) -> Dict[str, List[Dict[str, Any]]]:
-        """Obter perguntas e respostas das perspectivas para um utilizador"""
-        
-        try:
-            result = {}
-            
-            # Construir filtro base
-            filter_kwargs = {
-                'member__user_id': user_id,
-                'member__project_id__in': project_ids
-            }
-            
-            # Aplicar filtro de perguntas se especificado
-            if perspective_question_ids:
-                filter_kwargs['question_id__in'] = perspective_question_ids
-            
-            # Aplicar filtro de respostas se especificado
-            if perspective_answer_ids:
-                filter_kwargs['id__in'] = perspective_answer_ids
-            
-            # Obter perguntas e respostas do utilizador com filtros aplicados
-            user_answers = Answer.objects.filter(**filter_kwargs).select_related('question')
-            
-            print(f"[DEBUG] Filtros aplicados para utilizador {user_id}: {filter_kwargs}")
-            print(f"[DEBUG] Respostas encontradas: {user_answers.count()}")
-            
-            if user_answers.exists():
-                # Organizar perguntas únicas
-                questions = {}
-                answers_list = []
-                
-                for answer in user_answers:
-                    # Adicionar pergunta
-                    if answer.question_id not in questions:
-                        questions[answer.question_id] = {
-                            'question_id': answer.question_id,
-                            'question_text': answer.question.question
-                        }
-                    
-                    # Adicionar resposta
-                    answer_text = answer.answer_text or (answer.answer_option.option if answer.answer_option else 'Sem resposta')
-                    answers_list.append({
-                        'answer_id': answer.id,
-                        'answer_text': answer_text,
-                        'question_id': answer.question_id,
-                        'question_text': answer.question.question
-                    })
-                
-                result['questions'] = list(questions.values())
-                result['answers'] = answers_list
-                
-                print(f"[DEBUG] Perguntas retornadas: {len(result['questions'])}")
-                print(f"[DEBUG] Respostas retornadas: {len(result['answers'])}")
-            else:
-                result['questions'] = []
-                result['answers'] = []
-                print(f"[DEBUG] Nenhuma resposta encontrada para utilizador {user_id}")
-            
+    ) -> Dict[int, Dict[str, List[Dict[str, Any]]]]:
+        """Obter perguntas e respostas das perspectivas de todos os anotadores, por ID de utilizador"""
+
+        result = {user_id: {'questions': [], 'answers': []} for user_id in user_ids}
+        if not user_ids:
             return result
-            
-        except Exception as e:
-            print(f"[DEBUG] Erro ao obter perguntas e respostas das perspectivas: {e}")
-            import traceback
-            traceback.print_exc()
-            return {'questions': [], 'answers': []} 
+
+        # Construir filtro base
+        filter_kwargs = {
+            'member__user_id__in': user_ids,
+            'member__project_id__in': project_ids
+        }
+
+        # Aplicar filtro de perguntas se especificado
+        if perspective_question_ids:
+            filter_kwargs['question_id__in'] = perspective_question_ids
+
+        # Aplicar filtro de respostas se especificado
+        if perspective_answer_ids:
+            filter_kwargs['id__in'] = perspective_answer_ids
+
+        answers = (
+            Answer.objects
+            .filter(**filter_kwargs)
+            .values('id', 'answer_text', 'question_id', 'question__question', 'member__user_id')
+            .order_by('id')
+        )
+
+        # Organizar perguntas únicas por utilizador
+        questions = defaultdict(dict)
+        for answer in answers:
+            user_id = answer['member__user_id']
+            question = {
+                'question_id': answer['question_id'],
+                'question_text': answer['question__question']
+            }
+            questions[user_id].setdefault(answer['question_id'], question)
+            result[user_id]['answers'].append({
+                'answer_id': answer['id'],
+                'answer_text': answer['answer_text'] or 'Sem resposta',
+                **question
+            })
+        for user_id, user_questions in questions.items():
+            result[user_id]['questions'] = list(user_questions.values())
+
+        return result
 
 
 class AnnotationReportService:
@@ -741,6 +579,13 @@ class AnnotationReportService:
         'relation': Relation,
     }
     
+    # O campo do tipo de rótulo de cada tipo de anotação
+    LABEL_FIELDS = {
+        'category': 'label',
+        'span': 'label',
+        'relation': 'type',
+    }
+    
     @staticmethod
     def get_report(
         project_ids: List[int],
@@ -943,64 +788,30 @@ class AnnotationReportService:
             if annotator_user_ids:
                 discrepancy_base_filter &= Q(user_id__in=annotator_user_ids)
             
-            # Coletar todas as anotações para análise de discrepâncias
-            all_annotations_for_discrepancy = []
-            
+            # Obter as anotações de cada tipo para análise de discrepâncias (sem filtro de utilizador)
+            discrepancy_querysets = []
             for anno_type in valid_types:
                 model_class = AnnotationReportService.ANNOTATION_TYPES[anno_type]
                 
                 # Construir filtro específico para o tipo
                 type_filter = Q()
-                if label_ids:
-                    if anno_type == 'category':
-                        type_filter &= Q(label_id__in=label_ids)
-                    elif anno_type == 'span':
-                        type_filter &= Q(label_id__in=label_ids)
-                    elif anno_type == 'relation':
-                        type_filter &= Q(type_id__in=label_ids)
-                
-                # Obter anotações para análise de discrepâncias (sem filtro de utilizador)
-                discrepancy_annotations = model_class.objects.filter(discrepancy_base_filter & type_filter)
-                
-                if anno_type == 'category':
-                    discrepancy_annotations = discrepancy_annotations.select_related('example', 'user', 'label')
-                elif anno_type == 'span':
-                    discrepancy_annotations = discrepancy_annotations.select_related('example', 'user', 'label')
-                elif anno_type == 'relation':
-                    discrepancy_annotations = discrepancy_annotations.select_related('example', 'user', 'type')
-                else:
-                    discrepancy_annotations = discrepancy_annotations.select_related('example', 'user')
+                label_field = AnnotationReportService.LABEL_FIELDS.get(anno_type)
+                if label_ids and label_field:
+                    type_filter &= Q(**{f'{label_field}_id__in': label_ids})
                 
-                # Processar anotações para análise de discrepâncias
-                for anno in discrepancy_annotations:
-                    try:
-                        if anno_type == 'category':
-                            label_text = anno.label.text if hasattr(anno, 'label') and anno.label else None
-                        elif anno_type == 'span':
-                            label_text = anno.label.text if hasattr(anno, 'label') and anno.label else None
-                        elif anno_type == 'relation':
-                            label_text = anno.type.text if hasattr(anno, 'type') and anno.type else None
-                        else:
-                            label_text = None
-                        
-                        annotation_item = {
-                            'user_id': anno.user_id if hasattr(anno, 'user_id') else None,
-                            'example_id': anno.example_id if hasattr(anno, 'example_id') else None,
-                            'label_text': label_text,
-                            'type': anno_type
-                        }
-                        
-                        all_annotations_for_discrepancy.append(annotation_item)
-                    except Exception as e:
-                        print(f"Erro ao processar anotação para discrepâncias {anno.id}: {str(e)}")
+                discrepancy_querysets.append(model_class.objects.filter(discrepancy_base_filter & type_filter))
             
             # Detectar exemplos com discrepâncias
-            examples_with_discrepancy = AnnotationReportService._get_examples_with_discrepancy(all_annotations_for_discrepancy)
-            print(f"[DEBUG] Exemplos com discrepâncias detectados: {examples_with_discrepancy}")
+            examples_with_discrepancy = find_discrepant_examples(discrepancy_querysets)
+            logger.debug(f"Exemplos com discrepâncias detectados: {len(examples_with_discrepancy)}")
         
-        all_annotations = []
-        type_counts = defaultdict(int)
+        # Obter informações dos projetos uma única vez
+        projects = {
+            project['id']: project
+            for project in Project.objects.filter(id__in=project_ids).values('id', 'name', 'project_type')
+        }
         
+        annotation_querysets = {}
         # Para cada tipo de anotação
         for anno_type in valid_types:
             model_class = AnnotationReportService.ANNOTATION_TYPES[anno_type]
@@ -1031,235 +842,199 @@ class AnnotationReportService:
                         type_filter &= ~Q(example_id__in=examples_with_discrepancy)
                     # Se não há exemplos com discrepâncias, todos os exemplos são válidos
                     
-            # Obter anotações para este tipo
-            annotations = model_class.objects.filter(base_filter & type_filter)
-            
-            # Se não houver anotações, continuar para o próximo tipo
-            if not annotations.exists():
-                continue
-                
-            # Contar anotações deste tipo
-            type_counts[anno_type] = annotations.count()
-            
-            # Aqui vamos usar select_related para otimizar as queries e apenas IDs para relações
-            if anno_type == 'category':
-                annotations = annotations.select_related('example', 'user', 'label')
-            elif anno_type == 'span':
-                annotations = annotations.select_related('example', 'user', 'label')
-            elif anno_type == 'relation':
-                annotations = annotations.select_related('example', 'user', 'type')
-            else:  # text
-                annotations = annotations.select_related('example', 'user')
-            
-            # Processar em blocos para reduzir uso de memória
-            batch_size = 1000
-            for i in range(0, annotations.count(), batch_size):
-                for anno in annotations[i:i+batch_size]:
-                    try:
-                        # Obter detalhes específicos de acordo com o tipo de anotação
-                        if anno_type == 'category':
-                            label_id = anno.label_id if hasattr(anno, 'label_id') else None
-                            label_text = anno.label.text if hasattr(anno, 'label') and anno.label else None
-                            detail = None
-                        elif anno_type == 'span':
-                            label_id = anno.label_id if hasattr(anno, 'label_id') else None
-                            label_text = anno.label.text if hasattr(anno, 'label') and anno.label else None
-                            detail = {
-                                'start_offset': anno.start_offset if hasattr(anno, 'start_offset') else None,
-                                'end_offset': anno.end_offset if hasattr(anno, 'end_offset') else None,
-                                'text': anno.text if hasattr(anno, 'text') else None
-                            }
-                        elif anno_type == 'relation':
-                            label_id = anno.type_id if hasattr(anno, 'type_id') else None
-                            label_text = anno.type.text if hasattr(anno, 'type') and anno.type else None
-                            detail = {
-                                'from_id': anno.from_id.id if hasattr(anno, 'from_id') and anno.from_id else None,
-                                'to_id': anno.to_id.id if hasattr(anno, 'to_id') and anno.to_id else None
-                            }
-                        elif anno_type == 'text':
-                            label_id = None
-                            label_text = None
-                            detail = {
-                                'text': anno.text if hasattr(anno, 'text') else None
-                            }
-                        
-                        # Obter informações do projeto - apenas o ID e nome
-                        project_id = anno.example.project_id if hasattr(anno, 'example') and anno.example else None
-                        project_name = ""
-                        project_type = ""
-                        if project_id:
-                            try:
-                                from projects.models import Project
-                                project = Project.objects.only('name', 'project_type').get(id=project_id)
-                                project_name = project.name
-                                project_type = project.project_type
-                            except Project.DoesNotExist:
-                                project_name = f"Projeto {project_id}"
-                        
-                        # Obter informações do exemplo - segurança para evitar acesso a arquivos
-                        example_id = anno.example_id if hasattr(anno, 'example_id') else None
-                        example_name = f"Exemplo {example_id}"
-                        if hasattr(anno, 'example') and anno.example:
-                            # Tentar usar o filename primeiro
-                            if hasattr(anno.example, 'upload_name') and anno.example.upload_name:
-                                example_name = str(anno.example.upload_name)
-                            # Se não tiver filename, usar parte do texto
-                            elif hasattr(anno.example, 'text') and anno.example.text:
-                                text_content = str(anno.example.text)
-                                example_name = text_content[:50] + ('...' if len(text_content) > 50 else '')
-                        
-                        # Obter informações do usuário - apenas string
-                        user_id = anno.user_id if hasattr(anno, 'user_id') else None
-                        username = "Desconhecido"
-                        if hasattr(anno, 'user') and anno.user:
-                            username = str(anno.user.username)
-                        
-                        # Garantir que timestamps sejam strings ISO
-                        created_at = anno.created_at.isoformat() if hasattr(anno, 'created_at') and anno.created_at else None
-                        updated_at = anno.updated_at.isoformat() if hasattr(anno, 'updated_at') and anno.updated_at else None
-                        
-                        # Criar item de anotação formatado - garantindo apenas tipos primitivos
-                        annotation_item = {
-                            'id': anno.id,
-                            'type': anno_type,
-                            'project_id': project_id,
-                            'project_name': project_name,
-                            'project_type': project_type,
-                            'example_id': example_id,
-                            'example_name': example_name,
-                            'user_id': user_id,
-                            'username': username,
-                            'label_id': label_id,
-                            'label_text': label_text,
-                            'created_at': created_at,
-                            'updated_at': updated_at,
-                            'detail': detail
-                        }
-                        
-                        all_annotations.append(annotation_item)
-                    except Exception as e:
-                        # Log erro sem interromper o processamento
-                        print(f"Erro ao processar anotação {anno.id} do tipo {anno_type}: {str(e)}")
-        
-        print(f"[DEBUG] Total de anotações coletadas: {len(all_annotations)}")
-        if all_annotations:
-            # Debug: mostrar utilizadores únicos nas anotações
-            unique_users = set(anno.get('user_id') for anno in all_annotations if anno.get('user_id'))
-            print(f"[DEBUG] Utilizadores únicos nas anotações finais: {list(unique_users)}")
-            
-            # Debug: mostrar exemplos únicos nas anotações
-            unique_examples = set(anno.get('example_id') for anno in all_annotations if anno.get('example_id'))
-            print(f"[DEBUG] Exemplos únicos nas anotações finais: {list(unique_examples)[:5]}...")  # Mostrar apenas os primeiros 5
-        
-        # Agrupar anotações por utilizador e exemplo para consolidar labels
-        consolidated_annotations = AnnotationReportService._consolidate_annotations_by_user_example(all_annotations)
-        
-        # Ordenar anotações consolidadas por data de criação (mais recentes primeiro)
-        consolidated_annotations.sort(key=lambda x: x['created_at'] if x['created_at'] else '', reverse=True)
-        
-        # Calcular paginação
-        start_idx = (page - 1) * page_size
-        end_idx = start_idx + page_size
-        paginated_annotations = consolidated_annotations[start_idx:end_idx] if len(consolidated_annotations) > start_idx else []
-        
-        # Calcular resumo geral
-        # Usar valores já coletados em vez de fazer novas consultas
-        unique_examples = set(a['example_id'] for a in all_annotations if a['example_id'])
-        unique_users = set(a['user_id'] for a in all_annotations if a['user_id'])
+            annotation_querysets[anno_type] = model_class.objects.filter(base_filter & type_filter)
+        
+        # Contar anotações de cada tipo
+        type_counts = {}
+        for anno_type, annotations in annotation_querysets.items():
+            count = annotations.count()
+            if count:
+                type_counts[anno_type] = count
+        
+        # As anotações são consolidadas por utilizador e exemplo, e a base de dados agrupa-as, ordena-as e pagina-as,
+        # pelo que só se leem as anotações da página pedida
+        total_consolidated, total_examples, total_users = 0, 0, 0
+        paginated_annotations = []
+        if type_counts:
+            groups_sql, groups_params = AnnotationReportService._groups_sql(
+                [annotation_querysets[anno_type] for anno_type in type_counts]
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*), COUNT(DISTINCT example_id), COUNT(DISTINCT user_id) FROM ({groups_sql}) AS consolidated',
+                    groups_params
+                )
+                total_consolidated, total_examples, total_users = cursor.fetchone()
+                cursor.execute(
+                    f'SELECT user_id, example_id FROM ({groups_sql}) AS consolidated '
+                    'ORDER BY last_created_at DESC, user_id, example_id LIMIT %s OFFSET %s',
+                    groups_params + [page_size, max(page - 1, 0) * page_size]
+                )
+                page_keys = [tuple(row) for row in cursor.fetchall()]
+            paginated_annotations = AnnotationReportService._read_page(
+                {anno_type: annotation_querysets[anno_type] for anno_type in type_counts},
+                page_keys,
+                projects,
+                # Se a página tem todos os grupos, não é preciso filtrá-los
+                whole=len(page_keys) == total_consolidated
+            )
+        logger.debug(f"Anotações consolidadas: {total_consolidated}, na página: {len(paginated_annotations)}")
         
         summary = {
-            'total_annotations': len(consolidated_annotations),  # Usar anotações consolidadas
-            'total_examples': len(unique_examples),
-            'total_annotators': len(unique_users),
+            'total_annotations': total_consolidated,  # Usar anotações consolidadas
+            'total_examples': total_examples,
+            'total_annotators': total_users,
             'date_range_from': date_from.isoformat() if date_from else None,
             'date_range_to': date_to.isoformat() if date_to else None,
-            'annotation_type_counts': dict(type_counts)
+            'annotation_type_counts': type_counts
         }
         
         result = {
             'summary': summary,
             'data': paginated_annotations,
-            'total_pages': (len(consolidated_annotations) + page_size - 1) // page_size if page_size > 0 else 1,  # Usar anotações consolidadas
+            'total_pages': (total_consolidated + page_size - 1) // page_size if page_size > 0 else 1,  # Usar anotações consolidadas
             'current_page': page
         }
         
         return result
     
     @staticmethod
-    def _get_examples_with_discrepancy(all_annotations: List[Dict[str, Any]]) -> set:
+    def _groups_sql(querysets: List[QuerySet]) -> Tuple[str, List[Any]]:
         """
-        Identifica exemplos que têm discrepâncias usando lógica simples e eficaz.
-        
-        Um exemplo tem discrepância se:
-        - Há múltiplos utilizadores que anotaram o mesmo exemplo
-        - E esses utilizadores usaram labels diferentes
-        
+        SQL dos pares de utilizador e exemplo das anotações, com a data da anotação mais recente de cada par
+
+        Cada tipo de anotação é agrupado na sua tabela, e os grupos dos tipos são juntos e agrupados de novo.
+
         Args:
-            all_annotations: Lista de todas as anotações
-            
+            querysets: Anotações já filtradas de cada tipo
+
         Returns:
-            Set com IDs dos exemplos que têm discrepâncias
+            O SQL, com as colunas user_id, example_id e last_created_at, e os seus parâmetros
         """
-        examples_with_discrepancy = set()
-        
-        # Agrupar anotações por exemplo
-        examples_annotations = {}
-        for anno in all_annotations:
-            example_id = anno.get('example_id')
-            if example_id:
-                if example_id not in examples_annotations:
-                    examples_annotations[example_id] = []
-                examples_annotations[example_id].append(anno)
-        
-        print(f"[DEBUG] Analisando {len(examples_annotations)} exemplos para discrepâncias")
-        
-        # Verificar cada exemplo
-        for example_id, annotations in examples_annotations.items():
-            # Agrupar por utilizador e coletar labels usadas
-            user_labels = {}
-            for anno in annotations:
-                user_id = anno.get('user_id')
-                label_text = anno.get('label_text', '').strip()
-                
-                if user_id:
-                    if user_id not in user_labels:
-                        user_labels[user_id] = set()
-                    # Incluir também casos onde não há label (anotação vazia)
-                    if label_text:
-                        user_labels[user_id].add(label_text)
-                    else:
-                        user_labels[user_id].add('__NO_LABEL__')  # Marcador para ausência de label
-            
-            # Se há menos de 2 utilizadores, não há discrepância
-            if len(user_labels) < 2:
-                continue
-            
-            print(f"[DEBUG] Exemplo {example_id}: {len(user_labels)} utilizadores")
-            for user_id, labels in user_labels.items():
-                print(f"[DEBUG]   Utilizador {user_id}: {labels}")
-            
-            # Verificar se há diferenças nas labels entre utilizadores
-            all_label_sets = list(user_labels.values())
-            has_discrepancy = False
-            
-            # Comparar labels entre utilizadores
-            for i, labels1 in enumerate(all_label_sets):
-                for j, labels2 in enumerate(all_label_sets[i+1:], i+1):
-                    # Se os conjuntos de labels são diferentes, há discrepância
-                    if labels1 != labels2:
-                        has_discrepancy = True
-                        print(f"[DEBUG] Discrepância detectada no exemplo {example_id}: {labels1} vs {labels2}")
-                        break
-                
-                if has_discrepancy:
-                    break
-            
-            if has_discrepancy:
-                examples_with_discrepancy.add(example_id)
-                print(f"[DEBUG] ✓ Exemplo {example_id} marcado como discrepante")
-        
-        print(f"[DEBUG] Total de exemplos com discrepância detectados: {len(examples_with_discrepancy)}")
-        return examples_with_discrepancy
+        groups = [
+            annotations.order_by().values('user_id', 'example_id').annotate(last_created_at=Max('created_at'))
+            for annotations in querysets
+        ]
+        sql, params = groups[0].union(*groups[1:], all=True).query.sql_with_params()
+        return (
+            'SELECT user_id, example_id, MAX(last_created_at) AS last_created_at '
+            f'FROM ({sql}) AS annotation_groups GROUP BY user_id, example_id'
+        ), list(params)
+    
+    @staticmethod
+    def _read_page(
+        annotation_querysets: Dict[str, QuerySet],
+        page_keys: List[Tuple[int, int]],
+        projects: Dict[int, Dict[str, Any]],
+        whole: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Lê e consolida as anotações dos pares de utilizador e exemplo de uma página, pela ordem da página
+
+        Args:
+            annotation_querysets: Anotações já filtradas, por tipo
+            page_keys: Pares de utilizador e exemplo da página, por ordem
+            projects: Nome e tipo dos projetos, por ID
+            whole: Se a página tem todos os pares, e as anotações não precisam de ser filtradas
+        """
+        if not page_keys:
+            return []
+        keys = set(page_keys)
+        page_annotations = []
+        for anno_type, annotations in annotation_querysets.items():
+            if not whole:
+                annotations = annotations.filter(
+                    user_id__in={user_id for user_id, _ in keys},
+                    example_id__in={example_id for _, example_id in keys}
+                )
+            for annotation_item in AnnotationReportService._iter_annotations(anno_type, annotations, projects):
+                if whole or (annotation_item['user_id'], annotation_item['example_id']) in keys:
+                    page_annotations.append(annotation_item)
+        consolidated = AnnotationReportService._consolidate_annotations_by_user_example(page_annotations)
+        position = {key: index for index, key in enumerate(page_keys)}
+        consolidated.sort(key=lambda item: position[(item['user_id'], item['example_id'])])
+        return consolidated
+    
+    @staticmethod
+    def _iter_annotations(
+        anno_type: str,
+        annotations: QuerySet,
+        projects: Dict[int, Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as anotações de um tipo e gera os itens do relatório
+
+        As linhas são lidas com values() em blocos de ANNOTATION_CHUNK_SIZE, por um cursor do servidor,
+        e os projetos vêm do mapa já carregado, pelo que não há queries por anotação.
+
+        Args:
+            anno_type: Tipo das anotações
+            annotations: Anotações já filtradas
+            projects: Nome e tipo dos projetos, por ID
+
+        Returns:
+            Iterador de itens de anotação com apenas tipos primitivos
+        """
+        label_field = AnnotationReportService.LABEL_FIELDS.get(anno_type)
+        fields = [
+            'id', 'example_id', 'example__project_id', 'example__upload_name', 'example_excerpt',
+            'user_id', 'user__username', 'created_at', 'updated_at'
+        ]
+        if label_field:
+            fields += [f'{label_field}_id', f'{label_field}__text']
+        if anno_type == 'span':
+            fields += ['start_offset', 'end_offset']
+        elif anno_type == 'relation':
+            fields += ['from_id', 'to_id']
+        elif anno_type == 'text':
+            fields += ['text']
+
+        # Apenas o início do texto do exemplo é necessário para o nome
+        rows = (
+            annotations
+            .annotate(example_excerpt=Substr('example__text', 1, EXAMPLE_NAME_LENGTH + 1))
+            .values(*fields)
+            .iterator(chunk_size=ANNOTATION_CHUNK_SIZE)
+        )
+        for row in rows:
+            # Obter detalhes específicos de acordo com o tipo de anotação
+            if anno_type == 'span':
+                detail = {'start_offset': row['start_offset'], 'end_offset': row['end_offset'], 'text': None}
+            elif anno_type == 'relation':
+                detail = {'from_id': row['from_id'], 'to_id': row['to_id']}
+            elif anno_type == 'text':
+                detail = {'text': row['text']}
+            else:
+                detail = None
+
+            project_id = row['example__project_id']
+            project = projects.get(project_id, {'name': f"Projeto {project_id}", 'project_type': ""})
+
+            # Usar o nome do ficheiro ou, se não houver, o início do texto
+            example_id = row['example_id']
+            example_name = f"Exemplo {example_id}"
+            if row['example__upload_name']:
+                example_name = row['example__upload_name']
+            elif row['example_excerpt']:
+                excerpt = row['example_excerpt']
+                example_name = excerpt[:EXAMPLE_NAME_LENGTH] + ('...' if len(excerpt) > EXAMPLE_NAME_LENGTH else '')
+
+            yield {
+                'id': row['id'],
+                'type': anno_type,
+                'project_id': project_id,
+                'project_name': project['name'],
+                'project_type': project['project_type'],
+                'example_id': example_id,
+                'example_name': example_name,
+                'user_id': row['user_id'],
+                'username': row['user__username'] or "Desconhecido",
+                'label_id': row[f'{label_field}_id'] if label_field else None,
+                'label_text': row[f'{label_field}__text'] if label_field else None,
+                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+                'updated_at': row['updated_at'].isoformat() if row['updated_at'] else None,
+                'detail': detail
+            }
     
     @staticmethod
     def _consolidate_annotations_by_user_example(all_annotations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
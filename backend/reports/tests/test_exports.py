@@ -0,0 +1,188 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django_celery_results.models import TaskResult
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from reports.celery_tasks import expire_report_exports, export_report
+from reports.exports import (
+    data_version,
+    export_directory,
+    normalize_params,
+    render_export,
+)
+from reports.services import AnnotatorReportService
+
+from api.tests.utils import CRUDMixin
+from examples.tests.utils import make_doc
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestNormalizeParams(TestCase):
+    def test_sorts_unordered_filters(self):
+        params = normalize_params({"project_ids": [2, 1], "user_ids": [3, 1, 3], "dataset_names": ["b", "a"]})
+        self.assertEqual(params, {"dataset_names": ["a", "b"], "project_ids": [2, 1], "user_ids": [1, 3]})
+
+    def test_omits_empty_filters(self):
+        date = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+        params = normalize_params({"project_ids": [1], "user_ids": [], "date_from": date, "date_to": None})
+        self.assertEqual(params, {"date_from": "2023-01-01T00:00:00+00:00", "project_ids": [1]})
+
+
+class TestDataVersion(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.label = mommy.make("CategoryType", project=self.project.item)
+
+    def assert_changes_version(self, change):
+        version = data_version([self.project.id])
+        change()
+        self.assertNotEqual(data_version([self.project.id]), version)
+
+    def test_version_does_not_change_without_changes(self):
+        self.assertEqual(data_version([self.project.id]), data_version([self.project.id]))
+
+    def test_label_changes_version(self):
+        category = mommy.make("Category", example=self.example, user=self.project.admin, label=self.label)
+        self.assert_changes_version(lambda: mommy.make("Category", example=self.example, label=self.label))
+        self.assert_changes_version(category.save)
+        self.assert_changes_version(category.delete)
+
+    def test_confirmation_changes_version(self):
+        self.assert_changes_version(lambda: mommy.make("ExampleState", example=self.example))
+        self.assert_changes_version(self.example.states.all().delete)
+
+    def test_comment_changes_version(self):
+        comment = mommy.make("Comment", example=self.example, user=self.project.admin)
+        self.assert_changes_version(comment.save)
+        self.assert_changes_version(comment.delete)
+
+    def test_other_projects_do_not_change_version(self):
+        other = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        version = data_version([self.project.id])
+        make_doc(other.item)
+        self.assertEqual(data_version([self.project.id]), version)
+
+
+class TestRenderExport(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        label = mommy.make("CategoryType", project=self.project.item, text="positive")
+        mommy.make("Category", example=make_doc(self.project.item), user=self.project.annotator, label=label)
+
+    def test_renders_reports_without_request(self):
+        params = {"project_ids": [self.project.id], "user_ids": [self.project.annotator.id]}
+        for report, report_params in [("annotators", params), ("annotations", {**params, "max_results": 10})]:
+            with self.subTest(report=report):
+                self.assertIn(b"positive", render_export(report, "csv", report_params))
+                self.assertIn(self.project.annotator.username.encode(), render_export(report, "csv", report_params))
+                self.assertTrue(render_export(report, "pdf", report_params).startswith(b"%PDF"))
+
+
+class TestReportExport(CRUDMixin):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.label = mommy.make("CategoryType", project=self.project.item, text="positive")
+        mommy.make("Category", example=self.example, user=self.project.annotator, label=self.label)
+        self.url = reverse(viewname="annotator_report_export") + f"?project_ids={self.project.id}&export_format=csv"
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def download(self, result, user=None, expected=status.HTTP_200_OK):
+        task_id = result["filename"]
+        TaskResult.objects.get_or_create(
+            task_id=task_id,
+            status="SUCCESS",
+            result=json.dumps(result),
+            content_type="application/json",
+            content_encoding="utf-8",
+        )
+        self.url = reverse(viewname="annotator_report_export") + f"?taskId={task_id}"
+        return self.assert_fetch(user or self.project.admin, expected)
+
+    def test_serves_unchanged_report_from_cache(self):
+        get_report = AnnotatorReportService.get_report
+        with patch("reports.exports.AnnotatorReportService.get_report", wraps=get_report) as report:
+            first = export_report("annotators", "csv", {"project_ids": [self.project.id]})
+            second = export_report("annotators", "csv", {"project_ids": [self.project.id]})
+        self.assertEqual(report.call_count, 1)
+        self.assertTrue(second["cached"])
+        self.assertEqual(first["filename"], second["filename"])
+        response = self.download(second)
+        self.assertIn(b"positive", b"".join(response.streaming_content))
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="annotators_report.csv"')
+
+    def test_exports_again_when_data_changes(self):
+        first = self.download(export_report("annotators", "csv", {"project_ids": [self.project.id]}))
+        first = b"".join(first.streaming_content)
+        negative = mommy.make("CategoryType", project=self.project.item, text="negative")
+        mommy.make("Category", example=self.example, user=self.project.annotator, label=negative)
+        second = self.download(export_report("annotators", "csv", {"project_ids": [self.project.id]}))
+        second = b"".join(second.streaming_content)
+        self.assertNotIn(b"negative", first)
+        self.assertIn(b"negative", second)
+        # The export of the previous version of the data is removed.
+        self.assertEqual(len(os.listdir(export_directory())), 1)
+
+    def test_requires_task_to_download(self):
+        with patch("reports.exports.AnnotatorReportService.get_report") as report:
+            self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        report.assert_not_called()
+
+    def test_allows_project_admin_to_start_export(self):
+        self.client.force_login(self.project.admin)
+        with patch("reports.views.export_report.delay") as delay:
+            delay.return_value.task_id = "task"
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"task_id": "task"})
+        delay.assert_called_once_with("annotators", "csv", {"project_ids": [self.project.id]})
+
+    def test_denies_project_annotator_to_start_export(self):
+        self.client.force_login(self.project.annotator)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_downloads_export_of_task(self):
+        result = export_report("annotators", "csv", {"project_ids": [self.project.id]})
+        response = self.download(result)
+        self.assertIn(b"positive", b"".join(response.streaming_content))
+        self.download(result, self.project.annotator, status.HTTP_403_FORBIDDEN)
+
+    def test_limits_export_time(self):
+        self.assertEqual(export_report.soft_time_limit, settings.REPORT_EXPORT_SOFT_TIME_LIMIT)
+        self.assertEqual(export_report.time_limit, settings.REPORT_EXPORT_TIME_LIMIT)
+        with patch("reports.celery_tasks.render_export", side_effect=SoftTimeLimitExceeded):
+            with self.assertRaises(SoftTimeLimitExceeded):
+                export_report("annotators", "csv", {"project_ids": [self.project.id]})
+        self.assertFalse(os.path.exists(export_directory()) and os.listdir(export_directory()))
+
+    @override_settings(REPORT_EXPORT_MAX_AGE_DAYS=7)
+    def test_expires_unused_exports(self):
+        old = export_report("annotators", "csv", {"project_ids": [self.project.id]})
+        used = export_report("annotators", "pdf", {"project_ids": [self.project.id]})
+        eight_days_ago = time.time() - 8 * 24 * 60 * 60
+        for result in [old, used]:
+            os.utime(os.path.join(export_directory(), result["filename"]), (eight_days_ago, eight_days_ago))
+        # Serving an export from the cache keeps it.
+        self.assertTrue(export_report("annotators", "pdf", {"project_ids": [self.project.id]})["cached"])
+        self.assertEqual(expire_report_exports(), 1)
+        self.assertEqual(os.listdir(export_directory()), [used["filename"]])
@@ -0,0 +1,173 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+
+from reports.services import AnnotationReportService, AnnotatorReportService
+
+from examples.tests.utils import make_doc
+from labels.models import Span
+from metrics.models import LabelStatistics
+from projects.models import Member, ProjectType
+from projects.tests.utils import assign_user_to_role, prepare_project
+from users.tests.utils import make_user
+
+
+class TestAnnotatorReportService(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        self.example.upload_name = "dataset.jsonl"
+        self.example.save()
+        self.positive = mommy.make("CategoryType", project=self.project.item, text="positive")
+        self.negative = mommy.make("CategoryType", project=self.project.item, text="negative")
+        perspective = mommy.make("Perspective", project=self.project.item)
+        self.question = mommy.make("Question", perspective=perspective, question="Age?")
+        self.annotators = []
+        self.add_annotator(self.project.annotator)
+
+    def add_annotator(self, user):
+        assign_user_to_role(user, self.project.item, settings.ROLE_ANNOTATOR)
+        mommy.make("Category", example=self.example, user=user, label=self.positive)
+        mommy.make("Category", example=self.example, user=user, label=self.negative)
+        member = Member.objects.get(user=user, project=self.project.item)
+        mommy.make("Answer", member=member, question=self.question, answer_text="30")
+        self.annotators.append(user)
+
+    def get_report(self):
+        with CaptureQueriesContext(connection) as context:
+            report = AnnotatorReportService.get_report(project_ids=[self.project.id])
+        return report, len(context.captured_queries)
+
+    def test_report_breakdowns(self):
+        report, _ = self.get_report()
+        self.assertEqual(report["summary"]["total_annotators"], 1)
+        annotator = report["data"][0]
+        self.assertEqual(annotator["annotator_id"], self.project.annotator.id)
+        self.assertEqual(annotator["label_breakdown"], {"positive": 1, "negative": 1})
+        self.assertEqual(annotator["dataset_label_breakdown"], {"dataset.jsonl": {"positive": 1, "negative": 1}})
+        answers = annotator["perspective_questions_answers"]
+        self.assertEqual(answers["questions"], [{"question_id": self.question.id, "question_text": "Age?"}])
+        self.assertEqual([answer["answer_text"] for answer in answers["answers"]], ["30"])
+
+    def test_report_from_statistics(self):
+        expected, _ = self.get_report()
+        LabelStatistics.objects.rebuild(self.project.id)
+        with CaptureQueriesContext(connection) as context:
+            report = AnnotatorReportService.get_report(project_ids=[self.project.id])
+        self.assertEqual(report, expected)
+        self.assertFalse(any("labels_category" in query["sql"] for query in context.captured_queries))
+
+    def test_number_of_queries_does_not_depend_on_number_of_annotators(self):
+        # The first report caches the content types of the polymorphic projects.
+        self.get_report()
+        _, few = self.get_report()
+        for _ in range(5):
+            self.add_annotator(make_user(f"annotator{len(self.annotators)}"))
+        report, many = self.get_report()
+        self.assertEqual(report["summary"]["total_annotators"], 6)
+        self.assertEqual(few, many)
+
+
+class TestAnnotationReportService(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.user = self.project.annotator
+        self.example = mommy.make("Example", project=self.project.item, text="a" * 60, upload_name="")
+        self.label = mommy.make("SpanType", project=self.project.item, text="person")
+        self.relation_type = mommy.make("RelationType", project=self.project.item, text="knows")
+
+    def add_spans(self, count):
+        offset = Span.objects.count() * 2
+        return [
+            mommy.make(
+                "Span",
+                example=self.example,
+                user=self.user,
+                label=self.label,
+                start_offset=offset + i * 2,
+                end_offset=offset + i * 2 + 1,
+            )
+            for i in range(count)
+        ]
+
+    def get_report(self):
+        with CaptureQueriesContext(connection) as context:
+            report = AnnotationReportService.get_report(project_ids=[self.project.id])
+        return report, len(context.captured_queries)
+
+    def test_report_items(self):
+        from_span, to_span = self.add_spans(2)
+        mommy.make(
+            "Relation", example=self.example, user=self.user, from_id=from_span, to_id=to_span, type=self.relation_type
+        )
+        report, _ = self.get_report()
+        self.assertEqual(report["summary"]["annotation_type_counts"], {"span": 2, "relation": 1})
+        item = report["data"][0]
+        self.assertEqual(item["project_name"], self.project.item.name)
+        self.assertEqual(item["project_type"], ProjectType.SEQUENCE_LABELING)
+        self.assertEqual(item["example_name"], "a" * 50 + "...")
+        self.assertEqual(item["username"], self.user.username)
+        self.assertEqual(item["annotation_count"], 3)
+        details = {entry["type"]: entry["detail"] for entry in item["details"]}
+        self.assertEqual(details["relation"], {"from_id": from_span.id, "to_id": to_span.id})
+
+    def test_number_of_queries_does_not_depend_on_number_of_annotations(self):
+        self.add_spans(1)
+        _, few = self.get_report()
+        self.add_spans(20)
+        report, many = self.get_report()
+        self.assertEqual(report["summary"]["annotation_type_counts"], {"span": 21})
+        self.assertEqual(few, many)
+
+    def test_paginates_consolidated_annotations(self):
+        other = make_user("other_annotator")
+        assign_user_to_role(other, self.project.item, settings.ROLE_ANNOTATOR)
+        examples = [self.example, *[mommy.make("Example", project=self.project.item) for _ in range(2)]]
+        for example in examples:
+            for user in [self.user, other]:
+                mommy.make("Span", example=example, user=user, label=self.label, start_offset=0, end_offset=1)
+        # The text label makes the first example of the annotator the most recent one.
+        mommy.make("TextLabel", example=self.example, user=self.user, text="note")
+
+        consolidate = AnnotationReportService._consolidate_annotations_by_user_example
+        with patch.object(
+            AnnotationReportService, "_consolidate_annotations_by_user_example", wraps=consolidate
+        ) as read:
+            first = AnnotationReportService.get_report(project_ids=[self.project.id], page=1, page_size=4)
+            second = AnnotationReportService.get_report(project_ids=[self.project.id], page=2, page_size=4)
+        # Only the annotations of the page are read.
+        self.assertEqual([len(call.args[0]) for call in read.call_args_list], [5, 2])
+        self.assertEqual(first["total_pages"], 2)
+        self.assertEqual(first["summary"]["total_annotations"], 6)
+        self.assertEqual(first["summary"]["total_examples"], 3)
+        self.assertEqual(first["summary"]["total_annotators"], 2)
+        self.assertEqual(first["summary"]["annotation_type_counts"], {"span": 6, "text": 1})
+        self.assertEqual((first["data"][0]["user_id"], first["data"][0]["example_id"]), (self.user.id, self.example.id))
+        self.assertEqual(first["data"][0]["annotation_count"], 2)
+        items = first["data"] + second["data"]
+        self.assertEqual(len({(item["user_id"], item["example_id"]) for item in items}), 6)
+        dates = [item["created_at"] for item in items]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_discrepancy_filter(self):
+        self.add_spans(1)
+        other = make_user("other_annotator")
+        assign_user_to_role(other, self.project.item, settings.ROLE_ANNOTATOR)
+        other_label = mommy.make("SpanType", project=self.project.item, text="place")
+        mommy.make("Span", example=self.example, user=other, label=other_label, start_offset=50, end_offset=51)
+        agreed = mommy.make("Example", project=self.project.item, text="b")
+        for user in [self.user, other]:
+            mommy.make("Span", example=agreed, user=user, label=self.label, start_offset=0, end_offset=1)
+
+        report = AnnotationReportService.get_report(
+            project_ids=[self.project.id], discrepancy_filter="with_discrepancy"
+        )
+        self.assertEqual({item["example_id"] for item in report["data"]}, {self.example.id})
+        report = AnnotationReportService.get_report(
+            project_ids=[self.project.id], discrepancy_filter="without_discrepancy"
+        )
+        self.assertEqual({item["example_id"] for item in report["data"]}, {agreed.id})
@@ -0,0 +1,15 @@
+#!/usr/bin/env bash
+
+set -o errexit
+set -o nounset
+
+cd /backend
+
+(
+  echo "Waiting for database"
+  python manage.py wait_for_db
+
+  # The scheduler sends each periodic task once, so it must run as a single instance, however many workers there are.
+  echo "Starting celery beat"
+  "celery" --app=config beat --loglevel=info
+)
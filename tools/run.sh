@@ -48,6 +48,13 @@ echo "Starting celery"
 celery --app=config worker --loglevel=INFO --concurrency="${CELERY_WORKERS:-1}" &
 celery_pid="$!"
 
+# The scheduler of the periodic tasks, e.g. the nightly rebuild of the label statistics.
+# It must run in a single container: set CELERY_BEAT=False on the others.
+if [[ "${CELERY_BEAT:-True}" == "True" ]]; then
+  echo "Starting celery beat"
+  celery --app=config beat --loglevel=INFO &
+fi
+
 echo "Starting flower"
 if [[ -n "${FLOWER_BASIC_AUTH:-}" ]]; then
   celery --app=config flower --basic_auth="${FLOWER_BASIC_AUTH}" &